@@ -1,11 +1,20 @@
 # --- START OF FILE app.py ---
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, make_response, stream_with_context
 import datetime, os
 import calendar
+import functools
+import hashlib
+import itertools
+import json
+import time
 from datetime import timedelta
+from markupsafe import Markup
 from core import manager
-from core.models import ALL_TABLES, ALL_ROOMS, ALL_RESOURCES, Reservation, Reservation as ResModel
+from core.fragment_cache import FragmentCache
+from core import live_updates
+from core.models import Reservation, Reservation as ResModel
+from core import floor_plan
 from core.translations import TRANSLATIONS
 import logging
 
@@ -24,16 +33,159 @@ if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug:
     with app.app_context():
         pass
 
-with app.app_context():
-    print("Führe initiale Bereinigung alter Reservierungen durch...")
-    manager.cleanup_old_reservations()
+# Gerenderte Tischkarten der Startseite je (table_id, date, shift), Variante (Sprache, Tisch-Version,
+# Verbindungs-Version). Änderungen im Manager verwerfen die betroffenen Karten sofort.
+TABLE_CARD_CACHE_SIZE = 2000
+TABLE_CARD_CACHE = FragmentCache(max_entries=TABLE_CARD_CACHE_SIZE)
+
+
+def _invalidate_table_cards(changed_keys, version):
+    if changed_keys is None:
+        TABLE_CARD_CACHE.clear()
+    else:
+        TABLE_CARD_CACHE.invalidate(changed_keys)
+
+
+manager.add_change_listener(_invalidate_table_cards)
+manager.add_change_listener(live_updates.bus.publish)
+
+
+def _table_card_data(table_model, merge_groups, table_reservations):
+    """Daten für _table_card_inline_macro.html (table_reservations nach Uhrzeit sortiert)."""
+    merged_with_list = list(merge_groups.partners(table_model.id))
+    group_id_str = merge_groups.group_id(table_model.id)
+
+    table_data = {
+        'id': table_model.id,
+        'area': table_model.area,
+        'capacity': table_model.capacity,
+        'display_name': table_model.display_name,
+        'row': table_model.row,
+        'number_in_row': table_model.number_in_row,
+        'type': table_model.type,
+        'status': "frei",
+        'reservations_on_table': [],
+        'merged_with': merged_with_list,
+        'group_id': group_id_str
+    }
+
+    current_table_reservations_details_for_display = []
+    is_table_actively_occupied = False
+
+    for res_obj in table_reservations:
+        current_table_reservations_details_for_display.append({
+            'id': res_obj.id,
+            'name': res_obj.name,
+            'time': res_obj.time,
+            'persons': res_obj.persons,
+            'info': res_obj.info,
+            'arrived': res_obj.arrived,
+            'departed': getattr(res_obj, 'departed', False),
+            'parent_id': res_obj.parent_id
+        })
+        if res_obj.arrived and not getattr(res_obj, 'departed', False):
+            is_table_actively_occupied = True
+
+    if is_table_actively_occupied:
+        table_data['status'] = 'belegt'
+    elif current_table_reservations_details_for_display:
+        table_data['status'] = 'belegt'
+
+    if current_table_reservations_details_for_display:
+        table_data['reservations_on_table'] = current_table_reservations_details_for_display
+
+    return table_data
+
+
+def _floor_cards(date_str, shift, current_lang, table_ids=None, with_html=True):
+    """
+    Kartendaten (siehe _table_card_data) für alle Tische oder nur table_ids, mit with_html zusätzlich
+    das gerenderte HTML unter 'card_html'. Nur Karten, deren Tisch sich geändert hat, werden neu gerendert.
+    """
+    # Versionen vor den Daten lesen: ein Eintrag kann dann höchstens neuer sein als sein Schlüssel
+    if with_html:
+        merge_version = manager.get_merge_version()
+        table_versions = manager.get_table_versions(date_str, shift)
+    merge_groups = manager.get_merge_groups()
+    registry = floor_plan.get_registry()
+
+    # Filterung für TISCHE (genauer Match von Datum und Schicht) über den (date, shift)-Index,
+    # einmalig nach Tisch gruppiert und nach Uhrzeit sortiert
+    reservations_by_table = manager.get_reservations_by_table(date_str, shift)
+
+    texts = TRANSLATIONS.get(current_lang, TRANSLATIONS['de'])
+    card_template = app.jinja_env.get_template('_table_card_inline_macro.html')
+
+    cards = []
+    for table_model in registry.tables:
+        if table_ids is not None and table_model.id not in table_ids:
+            continue
+        table_data = _table_card_data(table_model, merge_groups, reservations_by_table.get(table_model.id, []))
+        cards.append(table_data)
+        if not with_html:
+            continue
+        group = (table_model.id, date_str, shift)
+        variant = (current_lang, table_versions.get(table_model.id, 0), merge_version, registry.version)
+        card_html = TABLE_CARD_CACHE.get(group, variant)
+        if card_html is None:
+            card_html = Markup(card_template.render(table=table_data, t=texts))
+            TABLE_CARD_CACHE.put(group, variant, card_html)
+        table_data['card_html'] = card_html
+    return cards
+
+
+def _room_cards(date_str, current_lang, room_ids=None, with_html=True):
+    """
+    Kartendaten aller Zimmer oder nur room_ids für date_str: Gäste, die an dem Tag im Haus sind.
+    Mit with_html zusätzlich das gerenderte HTML (_room_card_snippet.html) unter 'card_html'.
+    """
+    # Liegt das Datum im Bereich [Anreise, Abreise)? Ein Gast der am 1. anreist und am 3. abreist,
+    # ist am 1. und 2. da. Tageszimmer (Anreise = Abreise) zählen nur an dem Tag.
+    # Die Abfrage läuft über den Intervall-Index der Zimmer im Manager.
+    reservations_for_date = manager.get_room_reservations_on_date(date_str)
+    texts = TRANSLATIONS.get(current_lang, TRANSLATIONS['de'])
+    card_template = app.jinja_env.get_template('_room_card_snippet.html')
+
+    cards = []
+    for room_model in floor_plan.get_registry().rooms:
+        if room_ids is not None and room_model.id not in room_ids:
+            continue
+        room_data = {
+            'id': room_model.id,
+            'area': room_model.area,
+            'capacity': room_model.capacity,
+            'display_name': room_model.display_name,
+            'type': room_model.type,
+            'status': "frei",
+            'reservations_on_table': []
+        }
+
+        is_occupied = False
+        for res_obj in reservations_for_date:
+            if res_obj.table_id == room_model.id:
+                room_data['reservations_on_table'].append({
+                    'id': res_obj.id,
+                    'name': res_obj.name,
+                    'time': res_obj.time,
+                    'persons': res_obj.persons,
+                    'info': res_obj.info,
+                    'arrived': res_obj.arrived,
+                    'departed': getattr(res_obj, 'departed', False)
+                })
+                if not getattr(res_obj, 'departed', False):
+                    is_occupied = True
+
+        if is_occupied:
+            room_data['status'] = 'belegt'
+
+        cards.append(room_data)
+        if with_html:
+            room_data['card_html'] = Markup(card_template.render(room=room_data, t=texts))
+    return cards
 
 
 def get_table_display_name_by_id(table_id):
-    for t in ALL_RESOURCES:
-        if t.id == table_id:
-            return t.display_name
-    return table_id
+    return floor_plan.get_registry().display_name(table_id)
 
 
 def format_date_european(date_str_yyyy_mm_dd):
@@ -92,6 +244,53 @@ def require_login():
         return redirect(url_for('login'))
 
 
+@app.after_request
+def wait_for_durable_write(response):
+    # Bei Gruppen-Commit erst antworten, wenn die Änderung dieses Requests auf der Platte ist
+    if request.method in ('POST', 'PUT', 'DELETE') and manager.GROUP_COMMIT_WAIT_FOR_DURABILITY:
+        if not manager.wait_for_durability(timeout=manager.DURABILITY_WAIT_TIMEOUT_SECONDS):
+            app.logger.warning(f"Änderung von {request.path} nach {manager.DURABILITY_WAIT_TIMEOUT_SECONDS}s noch nicht geschrieben.")
+    return response
+
+
+def current_etag():
+    """
+    ETag aus Datenversion, Version der Tisch-Verbindungen und des Grundrisses, Sprache, Benutzer, heutigem Datum
+    (Standardwerte der Seiten) und der URL samt Parametern (Datum, Schicht, Filter).
+    """
+    key = "|".join((
+        manager.get_data_version(),
+        manager.get_merge_version(),
+        str(floor_plan.get_registry().version),
+        session.get('language', 'de'),
+        session.get('username', ''),
+        datetime.date.today().isoformat(),
+        request.full_path,
+    ))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_get(view):
+    """
+    Bedingtes GET: Stimmt If-None-Match mit dem aktuellen ETag überein, wird sofort 304 geantwortet,
+    ohne Filterung oder Template-Rendering der View.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = current_etag()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Der Browser darf die Seite speichern, muss aber jedes Mal nachfragen
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+
 @app.route('/logout')
 def logout():
     session.clear()
@@ -106,6 +305,7 @@ def set_language(lang_code):
 
 
 @app.route('/')
+@conditional_get
 def index():
     current_date_obj = datetime.date.today()
     default_date_str = current_date_obj.strftime("%Y-%m-%d")
@@ -120,73 +320,17 @@ def index():
     if selected_shift not in Reservation.VALID_SHIFTS:
         selected_shift = Reservation.SHIFT_DINNER
 
-    all_reservations_objects = manager.load_reservations()
-    merges = manager.load_merges()
-
-    # Filterung für TISCHE (genauer Match von Datum und Schicht)
-    reservations_for_selected_date_and_shift = []
-    for res_obj in all_reservations_objects:
-        if res_obj.date == selected_date_str and res_obj.shift == selected_shift:
-            reservations_for_selected_date_and_shift.append(res_obj)
-
-    display_tables_data = []
-    for table_model in ALL_TABLES:
-        merged_with_list = merges.get(table_model.id, [])
-
-        group_id_str = ""
-        if merged_with_list:
-            all_ids = [table_model.id] + merged_with_list
-            all_ids.sort()
-            group_id_str = "-".join(all_ids)
-
-        table_data = {
-            'id': table_model.id,
-            'area': table_model.area,
-            'capacity': table_model.capacity,
-            'display_name': table_model.display_name,
-            'row': table_model.row,
-            'number_in_row': table_model.number_in_row,
-            'type': table_model.type,
-            'status': "frei",
-            'reservations_on_table': [],
-            'merged_with': merged_with_list,
-            'group_id': group_id_str
-        }
-
-        current_table_reservations_details_for_display = []
-        is_table_actively_occupied = False
-
-        for res_obj in reservations_for_selected_date_and_shift:
-            if res_obj.table_id == table_model.id:
-                current_table_reservations_details_for_display.append({
-                    'id': res_obj.id,
-                    'name': res_obj.name,
-                    'time': res_obj.time,
-                    'persons': res_obj.persons,
-                    'info': res_obj.info,
-                    'arrived': res_obj.arrived,
-                    'departed': getattr(res_obj, 'departed', False)
-                })
-                if res_obj.arrived and not getattr(res_obj, 'departed', False):
-                    is_table_actively_occupied = True
-
-        if is_table_actively_occupied:
-            table_data['status'] = 'belegt'
-        elif current_table_reservations_details_for_display:
-            table_data['status'] = 'belegt'
-
-        if current_table_reservations_details_for_display:
-            table_data['reservations_on_table'] = sorted(
-                current_table_reservations_details_for_display,
-                key=lambda r: datetime.datetime.strptime(r['time'], "%H:%M").time() if r.get(
-                    'time') else datetime.time.min
-            )
-
-        display_tables_data.append(table_data)
+    # Vor den Karten lesen: die Seite zeigt mindestens diesen Stand (Startpunkt der Live-Updates)
+    data_version = manager.get_data_version()
+    display_tables_data = _floor_cards(selected_date_str, selected_shift, session.get('language', 'de'))
+    registry = floor_plan.get_registry()
 
     return render_template(
         'index.html',
-        tables=display_tables_data,
+        cards_by_id={table['id']: table for table in display_tables_data},
+        area_layouts=[registry.area(name) for name in registry.table_areas()],
+        layout_version=registry.version,
+        data_version=data_version,
         selected_date=selected_date_str,
         selected_shift=selected_shift,
         valid_shifts=Reservation.VALID_SHIFTS
@@ -210,7 +354,16 @@ def generate_time_slots(start_hour, start_minute, end_hour, end_minute, interval
     return slots
 
 
+def get_time_slots_for_shift(shift):
+    if shift == Reservation.SHIFT_LUNCH:
+        return generate_time_slots(11, 0, 14, 0, 15)
+    elif shift == Reservation.SHIFT_DINNER:
+        return generate_time_slots(17, 0, 22, 0, 15)
+    return []
+
+
 @app.route('/reservieren', methods=['GET'])
+@conditional_get
 def reservation_form_page():
     table_id = request.args.get('table_id')
     table_name = request.args.get('table_name',
@@ -229,22 +382,11 @@ def reservation_form_page():
     if current_shift_from_url not in Reservation.VALID_SHIFTS:
         current_shift_from_url = Reservation.SHIFT_DINNER
 
-    possible_times_for_current_shift = []
-    if current_shift_from_url == Reservation.SHIFT_LUNCH:
-        possible_times_for_current_shift = generate_time_slots(11, 0, 14, 0, 15)
-    elif current_shift_from_url == Reservation.SHIFT_DINNER:
-        possible_times_for_current_shift = generate_time_slots(17, 0, 22, 0, 15)
+    possible_times_for_current_shift = get_time_slots_for_shift(current_shift_from_url)
 
-    available_times = []
     if table_id:
-        for time_slot in possible_times_for_current_shift:
-            if manager.is_table_available_for_specific_reservation_time(
-                    table_id,
-                    final_selected_date,
-                    time_slot,
-                    current_shift_from_url
-            ):
-                available_times.append(time_slot)
+        available_times = manager.get_free_time_slots(
+            table_id, final_selected_date, current_shift_from_url, possible_times_for_current_shift)
     else:
         available_times = possible_times_for_current_shift
 
@@ -261,6 +403,66 @@ def reservation_form_page():
     )
 
 
+@app.route('/api/belegungsmatrix', methods=['GET'])
+@conditional_get
+def api_slot_matrix():
+    selected_date_str = request.args.get('date', datetime.date.today().strftime("%Y-%m-%d"))
+    try:
+        datetime.datetime.strptime(selected_date_str, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"success": False, "message": "Ungültiges Datum."}), 400
+
+    selected_shift = request.args.get('shift', Reservation.SHIFT_DINNER)
+    if selected_shift not in Reservation.VALID_SHIFTS:
+        return jsonify({"success": False, "message": "Ungültige Schicht."}), 400
+
+    time_slots = get_time_slots_for_shift(selected_shift)
+    matrix = manager.get_slot_matrix(selected_date_str, selected_shift, time_slots)
+
+    tables_data = {}
+    for table_id, row in matrix.items():
+        tables_data[table_id] = {
+            "free": [not row[slot] for slot in time_slots],
+            "reservations": {
+                slot: [{"id": r.id, "name": r.name, "persons": r.persons, "arrived": r.arrived, "departed": r.departed}
+                       for r in row[slot]]
+                for slot in time_slots if row[slot]
+            }
+        }
+
+    return jsonify({
+        "success": True,
+        "date": selected_date_str,
+        "shift": selected_shift,
+        "time_slots": time_slots,
+        "tables": tables_data
+    })
+
+
+@app.route('/api/archiv', methods=['GET'])
+@conditional_get
+def api_archive_search():
+    """Nur lesende Suche in archivierten Reservierungen (?von=&bis=&name=&tisch=&limit=)."""
+    date_from = request.args.get('von') or None
+    date_to = request.args.get('bis') or None
+    for value in (date_from, date_to):
+        if value:
+            try:
+                datetime.datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                return jsonify({"success": False, "message": "Ungültiges Datum."}), 400
+    try:
+        limit = min(int(request.args.get('limit', 200)), 1000)
+    except ValueError:
+        return jsonify({"success": False, "message": "Ungültiges Limit."}), 400
+
+    found = manager.get_archived_reservations(date_from, date_to, request.args.get('name') or None,
+                                              request.args.get('tisch') or None)
+    # Der Generator wird nach limit Treffern nicht weiter gelesen
+    reservations = [r.to_dict() for r in itertools.islice(found, limit)]
+    return jsonify({"success": True, "reservations": reservations, "limit_reached": len(reservations) == limit})
+
+
 @app.route('/api/tische_verbinden', methods=['POST'])
 def api_merge_tables():
     data = request.get_json()
@@ -299,6 +501,7 @@ def api_unmerge_tables():
 
 
 @app.route('/reservierung_bearbeiten/<string:reservation_id>', methods=['GET'])
+@conditional_get
 def edit_reservation_page(reservation_id):
     reservation_object = manager.get_reservation_by_id(reservation_id)
 
@@ -307,22 +510,17 @@ def edit_reservation_page(reservation_id):
 
     table_name_for_form = get_table_display_name_by_id(reservation_object.table_id)
 
-    possible_times_for_current_shift = []
-    if reservation_object.shift == Reservation.SHIFT_LUNCH:
-        possible_times_for_current_shift = generate_time_slots(11, 0, 14, 0, 15)
-    elif reservation_object.shift == Reservation.SHIFT_DINNER:
-        possible_times_for_current_shift = generate_time_slots(17, 0, 22, 0, 15)
-
-    available_times = []
-    for time_slot in possible_times_for_current_shift:
-        if manager.is_table_available_for_specific_reservation_time(
-                reservation_object.table_id,
-                reservation_object.date,
-                time_slot,
-                reservation_object.shift,
-                reservation_id_to_ignore=reservation_object.id
-        ):
-            available_times.append(time_slot)
+    possible_times_for_current_shift = get_time_slots_for_shift(reservation_object.shift)
+
+    available_times = manager.get_free_time_slots(
+        reservation_object.table_id,
+        reservation_object.date,
+        reservation_object.shift,
+        possible_times_for_current_shift,
+        ignore_id=reservation_object.id,
+        persons=reservation_object.persons,
+        duration=reservation_object.duration
+    )
 
     if reservation_object.time not in available_times:
         available_times.append(reservation_object.time)
@@ -345,7 +543,31 @@ def edit_reservation_page(reservation_id):
     )
 
 
+def _reservation_list_entry(res_obj, merge_groups):
+    """Eine Zeile der Reservierungsliste (to_dict plus Anzeigefelder)."""
+    res_dict = res_obj.to_dict()
+
+    t_name = get_table_display_name_by_id(res_obj.table_id)
+    partners = merge_groups.partners(res_obj.table_id)
+    if partners:
+        partner_names = [get_table_display_name_by_id(p) for p in partners]
+        t_name += f" (+ {', '.join(partner_names)})"
+
+    res_dict['table_display_name'] = t_name
+    res_dict['display_date'] = format_date_european(res_obj.date)
+    res_dict['display_end_date'] = format_date_european(res_obj.end_date)
+
+    res_dict['checkout_time'] = "10:00"
+    if "Abreise:" in res_obj.info:
+        try:
+            res_dict['checkout_time'] = res_obj.info.split("Abreise:")[1].strip().split(" ")[0]
+        except:
+            pass
+    return res_dict
+
+
 @app.route('/reservierungen')
+@conditional_get
 def reservations_list_page():
     filter_date_param = request.args.get('filter_date')
     filter_shift_param = request.args.get('shift', Reservation.SHIFT_DINNER)
@@ -353,38 +575,6 @@ def reservations_list_page():
     current_date_obj = datetime.date.today()
     today_str = current_date_obj.strftime("%Y-%m-%d")
 
-    all_raw_reservations = manager.load_reservations()
-    merges = manager.load_merges()
-
-    reservations_processed = []
-
-    for res_obj in all_raw_reservations:
-        if "[LINKED:" in res_obj.info:
-            continue
-
-        res_dict = res_obj.to_dict()
-
-        t_name = get_table_display_name_by_id(res_obj.table_id)
-        if res_obj.table_id in merges:
-            partners = merges[res_obj.table_id]
-            partner_names = [get_table_display_name_by_id(p) for p in partners]
-            t_name += f" (+ {', '.join(partner_names)})"
-
-        res_dict['table_display_name'] = t_name
-        res_dict['display_date'] = format_date_european(res_obj.date)
-        res_dict['display_end_date'] = format_date_european(res_obj.end_date)
-
-        res_dict['checkout_time'] = "10:00"
-        if "Abreise:" in res_obj.info:
-            try:
-                res_dict['checkout_time'] = res_obj.info.split("Abreise:")[1].strip().split(" ")[0]
-            except:
-                pass
-
-        reservations_processed.append(res_dict)
-
-    current_page_reservations = []
-
     # --- UPDATE: Filter Logik für Zimmer (Schicht ignorieren, Datum ignorieren wenn leer) ---
     if filter_date_param is None:
         # Default: Heute, aber für Zimmer auch laufende
@@ -398,48 +588,42 @@ def reservations_list_page():
         target_date = filter_date_param
         target_shift = filter_shift_param
 
-    for r in reservations_processed:
-        is_room = "zimmer" in str(r.get('table_id', '')).lower()
+    # Vor den Daten lesen: Startpunkt der Live-Updates
+    data_version = manager.get_data_version()
+    merge_groups = manager.get_merge_groups()
+    registry = floor_plan.get_registry()
 
-        # 1. Datum Filter
-        date_match = False
-        if target_date is None:
-            # "Alle anzeigen" -> ab heute
-            if r.get('date') >= today_str or (is_room and r.get('end_date') >= today_str):
-                date_match = True
-        else:
-            if not is_room:
-                if r.get('date') == target_date:
-                    date_match = True
-            else:
-                # Zimmer: Ist das Filter-Datum im gebuchten Zeitraum?
-                # [start, end) Prinzip oder [start, end] ? Hier meist [Start, Ende)
-                # Aber für Listenansicht zeigen wir meist den Starttag.
-                # Wenn wir filtern wollen "Wer ist heute im Haus?", müssen wir Ranges prüfen.
-                # ABER: Die Listenansicht zeigt meist "Anreisen".
-                # Wir belassen es hier auf Anreise-Datum für die Liste, sonst wird es unübersichtlich.
-                if r.get('date') == target_date:
-                    date_match = True
-
-        # 2. Schicht Filter (Nur für Tische relevant)
-        shift_match = False
-        if is_room:
-            shift_match = True  # Zimmer immer anzeigen egal welche Schicht
-        else:
-            if target_shift is None or r.get('shift') == target_shift:
-                shift_match = True
+    # Nur die Reservierungen des gewählten Zeitraums aus den Indizes holen und nur diese aufbereiten
+    if target_date is None:
+        # "Alle anzeigen" -> ab heute, Zimmer auch, wenn der Gast schon da ist und frühestens heute abreist
+        candidates = manager.get_reservations_from_date(today_str)
+    else:
+        # Tische: Tag und Schicht. Zimmer: Anreisetag, Schicht egal (die Liste zeigt Anreisen)
+        candidates = [r for shift in Reservation.VALID_SHIFTS
+                      for r in manager.get_reservations_for_date_and_shift(target_date, shift)]
 
-        if date_match and shift_match:
-            current_page_reservations.append(r)
+    current_page_reservations = []
+    for res_obj in candidates:
+        # Schattenbuchungen auf verbundenen Tischen nicht extra auflisten
+        if res_obj.parent_id:
+            continue
+        if not registry.is_room(res_obj.table_id) and target_shift is not None and res_obj.shift != target_shift:
+            continue
+        current_page_reservations.append(_reservation_list_entry(res_obj, merge_groups))
 
     # Split
-    reservations_rooms = [r for r in current_page_reservations if 'zimmer' in str(r.get('table_id', '')).lower()]
-    reservations_tables = [r for r in current_page_reservations if 'zimmer' not in str(r.get('table_id', '')).lower()]
+    reservations_rooms = [r for r in current_page_reservations if registry.is_room(r.get('table_id'))]
+    reservations_tables = [r for r in current_page_reservations if not registry.is_room(r.get('table_id'))]
 
     # Sortieren
     reservations_tables.sort(key=lambda x: x['time'])
     reservations_rooms.sort(key=lambda x: x['date'])
 
+    # Live-Updates nur für einen bestimmten Tag und eine Schicht ("Alle anzeigen" bleibt statisch)
+    live_url = None
+    if target_date and target_shift in Reservation.VALID_SHIFTS:
+        live_url = url_for('live_updates_stream', date=target_date, shift=target_shift, since=data_version)
+
     return render_template(
         'reservations_list.html',
         reservations_tables=reservations_tables,
@@ -447,11 +631,133 @@ def reservations_list_page():
         active_filter_date=filter_date_param if filter_date_param is not None else today_str,
         available_shifts=Reservation.VALID_SHIFTS,
         current_filter_shift=filter_shift_param,
+        live_url=live_url,
         page_title="Reservierungen"
     )
 
 
+@app.route('/reservierungen/zeile/<string:reservation_id>')
+def reservation_list_row(reservation_id):
+    """Eine Zeile der Reservierungsliste als HTML, damit die Seite sie nach einer Änderung ersetzen kann."""
+    res_obj = manager.get_reservation_by_id(reservation_id)
+    if not res_obj or res_obj.parent_id:
+        return "", 404
+    r = _reservation_list_entry(res_obj, manager.get_merge_groups())
+    is_room = floor_plan.get_registry().is_room(r.get('table_id'))
+    return render_template('_room_row_snippet.html' if is_room else '_reservation_row_snippet.html', r=r)
+
+
+# Live-Updates per Server-Sent Events: Ein Stream je Seite und (Datum, Schicht). Jede Verbindung
+# belegt einen Waitress-Thread; nach LIVE_STREAM_MAX_SECONDS wird sie beendet und der Browser
+# verbindet sich nach LIVE_RETRY_MS neu (mit Last-Event-ID, es geht nichts verloren).
+# Höchstens LIVE_MAX_STREAMS Verbindungen sind gleichzeitig offen, damit immer Threads für normale
+# Anfragen frei bleiben (run_server.py startet LIVE_MAX_STREAMS Threads zusätzlich). Jede weitere
+# Verbindung wird sofort beendet und versucht es nach LIVE_BUSY_RETRY_MS erneut; bis dahin
+# aktualisiert sich diese Seite nicht von selbst.
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_STREAM_MAX_SECONDS = 300
+LIVE_RETRY_MS = 2000
+LIVE_MAX_STREAMS = 16
+LIVE_BUSY_RETRY_MS = 30000
+
+
+def _sse_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route('/api/floor_state')
+def api_floor_state():
+    """
+    Tischplan als JSON für Tablets. Mit since=<version> aus einer vorherigen Antwort nur die Tische,
+    die sich seitdem geändert haben ("full": false); sonst oder wenn das Änderungsprotokoll nicht
+    weit genug zurückreicht alle ("full": true). "version" ist der Cursor für die nächste Abfrage.
+    """
+    date_str = request.args.get('date', '')
+    shift = request.args.get('shift', '')
+    try:
+        datetime.datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"success": False, "message": "Ungültiges Datum."}), 400
+    if shift not in Reservation.VALID_SHIFTS:
+        return jsonify({"success": False, "message": "Ungültige Schicht."}), 400
+
+    # Cursor vor den Daten lesen: die gelieferten Tische sind mindestens auf diesem Stand
+    table_ids, version = manager.get_changed_tables(request.args.get('since'), date_str, shift)
+    if table_ids is not None and not table_ids:
+        return jsonify({"success": True, "version": version, "full": False, "tables": []})
+    tables = _floor_cards(date_str, shift, session.get('language', 'de'), table_ids, with_html=False)
+    return jsonify({"success": True, "version": version, "full": table_ids is None, "tables": tables})
+
+
+@app.route('/api/live')
+def live_updates_stream():
+    """
+    Server-Sent Events für ein (Datum, Schicht): Event "tables" mit den Kartendaten der geänderten
+    Tische (siehe _floor_cards) und Zimmer (siehe _room_cards, Gäste an diesem Datum). Zuerst kommen
+    die, die sich seit dem Stand des Clients (Last-Event-ID bzw. since) geändert haben, oder alle,
+    wenn sich das nicht mehr feststellen lässt.
+    """
+    date_str = request.args.get('date', '')
+    shift = request.args.get('shift', '')
+    try:
+        datetime.datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"success": False, "message": "Ungültiges Datum."}), 400
+    if shift not in Reservation.VALID_SHIFTS:
+        return jsonify({"success": False, "message": "Ungültige Schicht."}), 400
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    current_lang = session.get('language', 'de')
+
+    def generate():
+        # Erst im Generator abonnieren: wird die Antwort nie gelesen, bleibt kein Abonnement zurück.
+        # Erst abonnieren, dann die Version vergleichen: eine Änderung dazwischen geht nicht verloren
+        subscription = live_updates.bus.subscribe(date_str, shift, limit=LIVE_MAX_STREAMS)
+        if subscription is None:
+            app.logger.warning(f"Live-Updates: bereits {LIVE_MAX_STREAMS} Verbindungen offen, neuer Versuch "
+                               f"in {LIVE_BUSY_RETRY_MS // 1000} s.")
+            yield f"retry: {LIVE_BUSY_RETRY_MS}\n\n: busy\n\n"
+            return
+        try:
+            yield f"retry: {LIVE_RETRY_MS}\n\n"
+            # Was seit dem Stand des Clients passiert ist (alles, wenn das Protokoll nicht reicht)
+            table_ids = manager.get_changed_tables(since, date_str, shift)[0]
+            everything, table_ids = table_ids is None, table_ids or set()
+            deadline = time.monotonic() + LIVE_STREAM_MAX_SECONDS
+            while True:
+                if everything or table_ids:
+                    version = manager.get_data_version()
+                    registry = floor_plan.get_registry()
+                    changed = None if everything else table_ids
+                    cards = _floor_cards(date_str, shift, current_lang, changed)
+                    room_ids = None if everything else {rid for rid in table_ids if registry.is_room(rid)}
+                    rooms = _room_cards(date_str, current_lang, room_ids) if room_ids is None or room_ids else []
+                    if cards or rooms:
+                        payload = {"version": version, "layout": registry.version, "tables": cards, "rooms": rooms}
+                        yield _sse_event("tables", payload, event_id=version)
+                if time.monotonic() >= deadline:
+                    return
+                everything, table_ids = subscription.wait(LIVE_HEARTBEAT_SECONDS)
+                if not everything and not table_ids:
+                    if manager.MULTI_PROCESS:
+                        # Lädt neu, falls ein anderer Prozess geschrieben hat (meldet dann alles geändert)
+                        manager.get_data_version()
+                    yield ": ping\n\n"
+        finally:
+            live_updates.bus.unsubscribe(subscription)
+
+    response = app.response_class(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/zimmer-buchen')
+@conditional_get
 def room_booking_calendar():
     today = datetime.date.today()
     try:
@@ -504,32 +810,42 @@ def api_create_reservation():
     try:
         data = request.get_json()
         table_id = data.get('table_id', '')
-        is_room = "zimmer" in table_id.lower()
+        is_room = floor_plan.get_registry().is_room(table_id)
 
         if is_room:
-            if not manager.is_room_available(table_id, data['date'], data['end_date']):
-                return jsonify({"success": False, "message": "Zimmer im gewählten Zeitraum bereits belegt."}), 409
-
-            manager.create_reservation(
-                name=data['name'], date=data['date'], time=data['time'], persons=int(data['persons']),
-                table_id=table_id, info=data.get('info', "") + f" | Abreise: {data.get('checkout_time', 'Standard')}",
-                shift="abend", end_date=data['end_date']
-            )
+            # Prüfen und Anlegen unter der Sperre der belegten Tage (kein Doppelbuchen durch parallele Requests)
+            with manager.partition_lock(*manager.room_lock_keys(data['date'], data['end_date'])):
+                if not manager.is_room_available(table_id, data['date'], data['end_date']):
+                    return jsonify({"success": False, "message": "Zimmer im gewählten Zeitraum bereits belegt."}), 409
+
+                manager.create_reservation(
+                    name=data['name'], date=data['date'], time=data['time'], persons=int(data['persons']),
+                    table_id=table_id, info=data.get('info', "") + f" | Abreise: {data.get('checkout_time', 'Standard')}",
+                    shift="abend", end_date=data['end_date']
+                )
             return jsonify({
                 "success": True, "message": "Zimmer erfolgreich gebucht!",
                 "redirect_url": url_for('reservations_list_page')
             })
 
         else:
-            if not manager.is_table_available_for_specific_reservation_time(
-                    table_id, data['date'], data['time'], data['shift']
-            ):
-                return jsonify({"success": False, "message": "Tisch zur gewählten Zeit bereits belegt."}), 409
-
-            manager.create_reservation(
-                name=data['name'], date=data['date'], time=data['time'], persons=int(data['persons']),
-                table_id=table_id, info=data.get('info', ""), shift=data['shift']
-            )
+            persons = int(data['persons'])
+            # Verweildauer in Minuten (optional), sonst Standard des Grundrisses für Bereich und Personenzahl
+            duration = _requested_duration(data)
+            with manager.partition_lock((data['date'], data['shift'])):
+                if not manager.is_table_available_for_specific_reservation_time(
+                        table_id, data['date'], data['time'], data['shift'], persons=persons, duration=duration
+                ):
+                    next_free_time = manager.get_next_free_time(table_id, data['date'], data['time'], persons, duration)
+                    message = "Tisch zur gewählten Zeit bereits belegt."
+                    if next_free_time:
+                        message += f" Nächste freie Zeit: {next_free_time}."
+                    return jsonify({"success": False, "message": message, "next_free_time": next_free_time}), 409
+
+                manager.create_reservation(
+                    name=data['name'], date=data['date'], time=data['time'], persons=persons,
+                    table_id=table_id, info=data.get('info', ""), shift=data['shift'], duration=duration
+                )
 
             return jsonify({
                 "success": True,
@@ -537,6 +853,12 @@ def api_create_reservation():
                 "redirect_url": url_for('index', date=data['date'], shift=data['shift'])
             })
 
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e}"}), 409
+    except manager.TransactionError as e:
+        return jsonify({"success": False, "message": f"Ungültige Reservierung: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Ungültige Eingabe: {e}"}), 400
     except Exception as e:
         app.logger.error(f"Fehler beim Erstellen einer Reservierung: {e}", exc_info=True)
         return jsonify({"success": False, "message": f"Ein Serverfehler ist aufgetreten: {str(e)}"}), 500
@@ -549,14 +871,13 @@ def api_search_rooms():
     end = data.get('end_date')
 
     free_rooms = []
-    for room in ALL_ROOMS:
-        if manager.is_room_available(room.id, start, end):
-            free_rooms.append({
-                "id": room.id,
-                "display_name": room.display_name,
-                "area": room.area,
-                "capacity": room.capacity
-            })
+    for room in manager.get_free_rooms(start, end):
+        free_rooms.append({
+            "id": room.id,
+            "display_name": room.display_name,
+            "area": room.area,
+            "capacity": room.capacity
+        })
 
     return jsonify({"success": True, "rooms": free_rooms})
 
@@ -570,59 +891,138 @@ def api_update_reservation(reservation_id):
             return jsonify({"success": False, "message": "Reservierung nicht gefunden."}), 404
 
         table_id = data.get('table_id', original_res.table_id)
-        is_room = "zimmer" in table_id.lower()
+        is_room = floor_plan.get_registry().is_room(table_id)
+        # Version, die das Formular angezeigt hat: wurde die Reservierung inzwischen geändert -> 409
+        expected_version = _expected_version(data)
 
         if is_room:
             start_date = data.get('date', original_res.date)
             end_date = data.get('end_date', original_res.end_date)
 
-            manager.update_reservation(
-                reservation_id_to_update=reservation_id,
-                name=data.get('name'),
-                date_str=start_date,
-                time_str=data.get('time'),
-                persons=int(data['persons']),
-                table_id=table_id,
-                info=data.get('info'),
-                shift="abend"
-            )
-
-            res = manager.get_reservation_by_id(reservation_id)
-            res.end_date = end_date
-            manager.save_reservations(manager.load_reservations())
+            with manager.partition_lock(*manager.room_lock_keys(original_res.date, original_res.end_date),
+                                        *manager.room_lock_keys(start_date, end_date)):
+                # Neues Zimmer bzw. neue Tage unter derselben Sperre prüfen wie beim Anlegen
+                if not manager.is_room_available(table_id, start_date, end_date, ignore_id=reservation_id):
+                    return jsonify({"success": False, "message": "Zimmer im gewählten Zeitraum bereits belegt."}), 409
+
+                manager.update_reservation(
+                    reservation_id_to_update=reservation_id,
+                    name=data.get('name'),
+                    date_str=start_date,
+                    time_str=data.get('time'),
+                    persons=int(data['persons']),
+                    table_id=table_id,
+                    info=data.get('info'),
+                    shift="abend",
+                    end_date_str=end_date,
+                    expected_version=expected_version
+                )
 
         else:
             target_date = data.get('date', original_res.date)
             target_time = data.get('time', original_res.time)
             target_shift = data.get('shift', original_res.shift)
-
-            if (
-                    target_date != original_res.date or target_time != original_res.time or target_shift != original_res.shift):
-                if not manager.is_table_available_for_specific_reservation_time(
-                        table_id, target_date, target_time, target_shift, reservation_id_to_ignore=reservation_id):
-                    return jsonify({"success": False, "message": "Tisch ist zur neuen Zeit belegt."}), 409
-
-            manager.update_reservation(
-                reservation_id_to_update=reservation_id,
-                name=data.get('name'),
-                date_str=target_date,
-                time_str=target_time,
-                persons=int(data['persons']),
-                table_id=table_id,
-                info=data.get('info'),
-                shift=target_shift
-            )
+            persons = int(data['persons'])
+            # Verweildauer in Minuten, 0 = zurück auf den Standard des Grundrisses, fehlt = unverändert
+            requested_duration = _requested_duration(data, allow_reset=True)
+            if requested_duration is None:
+                duration = original_res.duration
+            elif requested_duration == 0:
+                duration = None
+            else:
+                duration = requested_duration
+
+            # Alles, was das belegte Intervall [Beginn, Beginn + Verweildauer) verschiebt oder verlängert,
+            # wird gegen die übrigen Buchungen des Tisches geprüft. Reine Namens-/Info-Änderungen nicht,
+            # damit sich alte, überlappende Daten weiter bearbeiten lassen.
+            occupancy_changed = (
+                target_date != original_res.date or target_time != original_res.time
+                or target_shift != original_res.shift or table_id != original_res.table_id
+                or persons != original_res.persons or duration != original_res.duration)
+
+            with manager.partition_lock((original_res.date, original_res.shift), (target_date, target_shift)):
+                if occupancy_changed:
+                    if not manager.is_table_available_for_specific_reservation_time(
+                            table_id, target_date, target_time, target_shift, reservation_id_to_ignore=reservation_id,
+                            persons=persons, duration=duration):
+                        next_free_time = manager.get_next_free_time(table_id, target_date, target_time, persons,
+                                                                    duration, ignore_id=reservation_id)
+                        message = "Tisch ist zur gewählten Zeit und Dauer belegt."
+                        if next_free_time:
+                            message += f" Nächste freie Zeit: {next_free_time}."
+                        return jsonify({"success": False, "message": message, "next_free_time": next_free_time}), 409
+
+                manager.update_reservation(
+                    reservation_id_to_update=reservation_id,
+                    name=data.get('name'),
+                    date_str=target_date,
+                    time_str=target_time,
+                    persons=persons,
+                    table_id=table_id,
+                    info=data.get('info'),
+                    shift=target_shift,
+                    expected_version=expected_version,
+                    duration=requested_duration
+                )
 
         return jsonify({"success": True, "message": "Aktualisiert.", "redirect_url": url_for('reservations_list_page')})
 
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e} Bitte die Seite neu laden."}), 409
+    except manager.TransactionError as e:
+        return jsonify({"success": False, "message": f"Ungültige Änderung: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Ungültige Eingabe: {e}"}), 400
     except Exception as e:
         app.logger.error(f"Fehler beim Update: {e}", exc_info=True)
         return jsonify({"success": False, "message": f"Serverfehler: {str(e)}"}), 500
 
 
+def _requested_duration(data, allow_reset=False):
+    """
+    Verweildauer in Minuten aus dem JSON-Feld "duration": None, wenn nicht angegeben, sonst eine positive
+    ganze Zahl. Mit allow_reset ist auch 0 erlaubt (Bearbeiten: zurück auf den Standard des Grundrisses).
+    Negative Werte, 0 beim Anlegen und Nicht-Ganzzahlen werfen ValueError, die Endpunkte antworten mit 400.
+    """
+    value = data.get('duration')
+    if value is None or value == "":
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        minutes = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        minutes = int(value)
+    else:
+        raise ValueError(f"Ungültige Verweildauer: {value!r}")
+    if minutes > 0 or (allow_reset and minutes == 0):
+        return minutes
+    raise ValueError(f"Ungültige Verweildauer: {value!r}")
+
+
+def _expected_version(data=None):
+    """
+    Optionale, vom Client zuletzt gesehene Version einer Reservierung (JSON-Feld "version") als int
+    oder None. Ein ungültiger Wert wirft ValueError, die Endpunkte antworten dann mit 400.
+    """
+    if data is None:
+        data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if version is None or version == "":
+        return None
+    if isinstance(version, int) and not isinstance(version, bool) and version > 0:
+        return version
+    if isinstance(version, str) and version.strip().isdigit() and int(version) > 0:
+        return int(version)
+    raise ValueError(f"Ungültige Version: {version!r}")
+
+
 @app.route('/api/reservierung_loeschen/<string:reservation_id>', methods=['DELETE'])
 def api_delete_reservation(reservation_id):
-    success = manager.delete_reservation(reservation_id)
+    try:
+        success = manager.delete_reservation(reservation_id, _expected_version())
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e}"}), 409
+    except (manager.TransactionError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     if success:
         return jsonify({"success": True, "message": "Reservierung erfolgreich gelöscht."})
     else:
@@ -630,30 +1030,22 @@ def api_delete_reservation(reservation_id):
 
 
 @app.route('/api/available_tables_for_move/<string:reservation_id>', methods=['GET'])
+@conditional_get
 def api_get_available_tables_for_move(reservation_id):
     original_reservation = manager.get_reservation_by_id(reservation_id)
     if not original_reservation:
         return jsonify({"success": False, "message": "Ursprüngliche Reservierung nicht gefunden."}), 404
 
     try:
-        available_tables_objects = manager.get_available_tables_for_moving(original_reservation)
         available_tables_data = []
-        for table_obj in available_tables_objects:
-            reservations_on_target_table_same_day_shift = [
-                res.to_dict() for res in manager.load_reservations()
-                if res.table_id == table_obj.id and \
-                   res.date == original_reservation.date and \
-                   res.shift == original_reservation.shift and \
-                   res.id != original_reservation.id
-            ]
+        for table_obj, reservations_on_target_table_same_day_shift in manager.get_move_targets(original_reservation):
             available_tables_data.append({
                 "id": table_obj.id,
                 "display_name": table_obj.display_name,
                 "capacity": table_obj.capacity,
-                "existing_reservations_at_other_times": sorted(
-                    [{'time': r['time'], 'name': r['name']} for r in reservations_on_target_table_same_day_shift],
-                    key=lambda x: x['time']
-                )
+                "existing_reservations_at_other_times": [
+                    {'time': r.time, 'name': r.name} for r in reservations_on_target_table_same_day_shift
+                ]
             })
 
         return jsonify({
@@ -681,7 +1073,12 @@ def api_move_reservation(reservation_id):
     new_table_id = data['new_table_id']
 
     try:
-        moved_reservation = manager.move_reservation(reservation_id, new_table_id)
+        expected_version = _expected_version(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        moved_reservation = manager.move_reservation(reservation_id, new_table_id, expected_version)
         if moved_reservation:
             return jsonify({
                 "success": True,
@@ -691,6 +1088,8 @@ def api_move_reservation(reservation_id):
         else:
             return jsonify({"success": False,
                             "message": "Reservierung konnte nicht verschoben werden. Entweder nicht gefunden oder der Ziel-Tisch ist nicht verfügbar."}), 409
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e}"}), 409
     except Exception as e:
         app.logger.error(f"Fehler in api_move_reservation: {e}", exc_info=True)
         return jsonify({"success": False, "message": f"Serverfehler beim Verschieben der Reservierung: {e}"}), 500
@@ -698,13 +1097,19 @@ def api_move_reservation(reservation_id):
 
 @app.route('/api/reservierung_angekommen/<string:reservation_id>', methods=['POST'])
 def api_toggle_arrival(reservation_id):
-    updated_reservation = manager.toggle_arrival_status(reservation_id)
+    try:
+        updated_reservation = manager.toggle_arrival_status(reservation_id, _expected_version())
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e}"}), 409
+    except (manager.TransactionError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     if updated_reservation:
         return jsonify({
             "success": True,
             "message": "Ankunftsstatus aktualisiert.",
             "reservation_id": updated_reservation.id,
-            "arrived": updated_reservation.arrived
+            "arrived": updated_reservation.arrived,
+            "version": updated_reservation.version
         })
     else:
         return jsonify({"success": False, "message": "Reservierung nicht gefunden."}), 404
@@ -715,7 +1120,12 @@ def api_mark_as_departed(reservation_id):
     if not reservation_id:
         return jsonify({"success": False, "message": "Keine Reservierungs-ID angegeben."}), 400
 
-    updated_reservation = manager.mark_as_departed(reservation_id)
+    try:
+        updated_reservation = manager.mark_as_departed(reservation_id, _expected_version())
+    except manager.ConflictError as e:
+        return jsonify({"success": False, "message": f"Konflikt: {e}"}), 409
+    except (manager.TransactionError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
     if updated_reservation:
         return jsonify({
@@ -723,7 +1133,8 @@ def api_mark_as_departed(reservation_id):
             "message": f"Reservierung für '{updated_reservation.name}' als gegangen markiert.",
             "reservation_id": updated_reservation.id,
             "arrived": updated_reservation.arrived,
-            "departed": updated_reservation.departed
+            "departed": updated_reservation.departed,
+            "version": updated_reservation.version
         })
     else:
         reservation_check = manager.get_reservation_by_id(reservation_id)
@@ -741,6 +1152,7 @@ def api_mark_as_departed(reservation_id):
 
 
 @app.route('/zimmer')
+@conditional_get
 def rooms_index():
     current_date_obj = datetime.date.today()
     default_date_str = current_date_obj.strftime("%Y-%m-%d")
@@ -754,73 +1166,26 @@ def rooms_index():
 
     # Schicht wird bei Zimmern ignoriert für die Anzeige
     selected_shift = request.args.get('shift', Reservation.SHIFT_DINNER)
+    live_shift = selected_shift if selected_shift in Reservation.VALID_SHIFTS else Reservation.SHIFT_DINNER
+    check_date_str = check_date.strftime("%Y-%m-%d")
 
-    all_reservations_objects = manager.load_reservations()
-
-    # --- KORRIGIERTE LOGIK: Datumsbereichsprüfung für Zimmer ---
-    reservations_for_date = []
-    for r in all_reservations_objects:
-        # Ist es ein Zimmer?
-        if "zimmer" in r.table_id.lower():
-            # Datum parsen
-            try:
-                r_start = datetime.datetime.strptime(r.date, "%Y-%m-%d").date()
-                # Fallback falls kein end_date (sollte nicht passieren bei Zimmern)
-                r_end_str = getattr(r, 'end_date', r.date)
-                r_end = datetime.datetime.strptime(r_end_str, "%Y-%m-%d").date()
-
-                # Check: Liegt das ausgewählte Datum im Bereich [Anreise, Abreise)?
-                # Ein Gast der am 1. anreist und am 3. abreist, ist am 1. und 2. da.
-                if r_start <= check_date < r_end:
-                    reservations_for_date.append(r)
-                # Sonderfall: Wenn Anreise = Abreise (Tageszimmer), dann exakter Match
-                elif r_start == r_end == check_date:
-                    reservations_for_date.append(r)
-
-            except ValueError:
-                continue
-
-    display_rooms_data = []
-
-    for room_model in ALL_ROOMS:
-        room_data = {
-            'id': room_model.id,
-            'area': room_model.area,
-            'capacity': room_model.capacity,
-            'display_name': room_model.display_name,
-            'type': room_model.type,
-            'status': "frei",
-            'reservations_on_table': []
-        }
-
-        is_occupied = False
-        for res_obj in reservations_for_date:
-            if res_obj.table_id == room_model.id:
-                room_data['reservations_on_table'].append({
-                    'id': res_obj.id,
-                    'name': res_obj.name,
-                    'time': res_obj.time,
-                    'persons': res_obj.persons,
-                    'info': res_obj.info,
-                    'arrived': res_obj.arrived,
-                    'departed': getattr(res_obj, 'departed', False)
-                })
-                if not getattr(res_obj, 'departed', False):
-                    is_occupied = True
-
-        if is_occupied:
-            room_data['status'] = 'belegt'
-
-        display_rooms_data.append(room_data)
+    # Vor den Daten lesen: Startpunkt der Live-Updates
+    data_version = manager.get_data_version()
+    display_rooms_data = _room_cards(check_date_str, session.get('language', 'de'), with_html=False)
+    registry = floor_plan.get_registry()
 
     return render_template(
         'rooms.html',
         rooms=display_rooms_data,
+        room_areas=registry.room_areas(),
         selected_date=selected_date_str,
         selected_shift=selected_shift,
-        valid_shifts=Reservation.VALID_SHIFTS
+        valid_shifts=Reservation.VALID_SHIFTS,
+        live_url=url_for('live_updates_stream', date=check_date_str, shift=live_shift, since=data_version),
+        layout_version=registry.version
     )
 
 
 if __name__ == '__main__':
+    manager.start_maintenance()
     app.run(debug=False, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import random
+import time
+import tracemalloc
+from datetime import datetime, date, timedelta
+from core.models import Reservation
+
+RECORD_COUNT = 100_000
+
+
+class LegacyReservation:
+    """Nachbau des alten Modells (__dict__, Datum nur als String) zum Vergleich."""
+
+    def __init__(self, reservation_id, name, date_str, time_str, persons, table_id, info="", arrived=False, departed=False, shift=Reservation.SHIFT_DINNER, end_date_str=None, parent_id=None):
+        self.id = reservation_id
+        self.name = name
+        self.date = date_str
+        self.end_date = end_date_str if end_date_str else date_str
+        self.time = time_str
+        self.persons = persons
+        self.table_id = table_id
+        self.info = info
+        self.arrived = arrived
+        self.departed = departed
+        self.shift = shift
+        self.parent_id = parent_id
+
+
+def _make_records(cls):
+    rnd = random.Random(42)
+    start = date.today() - timedelta(days=30)
+    records = []
+    for i in range(RECORD_COUNT):
+        day = start + timedelta(days=rnd.randrange(120))
+        # str(...) erzeugt wie beim JSON-Laden für jeden Datensatz ein eigenes String-Objekt
+        table_id = str(f"T{rnd.randrange(1, 60)}")
+        shift = str(rnd.choice(Reservation.VALID_SHIFTS))
+        # Uhrzeiten wie in den Formularen: Mittag 11-14 Uhr, Abend 17-22 Uhr
+        hour = rnd.randrange(11, 14) if shift == Reservation.SHIFT_LUNCH else rnd.randrange(17, 22)
+        time_str = f"{hour:02d}:{rnd.choice((0, 15, 30, 45)):02d}"
+        records.append(cls(f"id{i}", f"Gast {i}", day.strftime("%Y-%m-%d"), time_str, 2, table_id, shift=shift))
+    return records
+
+
+def _measure(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"INFO: {label}: {(time.perf_counter() - started) * 1000:.1f} ms")
+    return result
+
+
+def _memory(cls):
+    tracemalloc.start()
+    records = _make_records(cls)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, current
+
+
+if __name__ == '__main__':
+    print(f"INFO: Vergleiche altes Modell mit __slots__-Modell bei {RECORD_COUNT} Reservierungen ...")
+    legacy, legacy_bytes = _memory(LegacyReservation)
+    slotted, slotted_bytes = _memory(Reservation)
+    print(f"INFO: Speicher alt: {legacy_bytes / 1024 / 1024:.1f} MiB, neu: {slotted_bytes / 1024 / 1024:.1f} MiB")
+
+    limit = date.today() - timedelta(days=7)
+    _measure("Bereinigung alt (strptime)", lambda: [r for r in legacy if datetime.strptime(r.date, "%Y-%m-%d").date() >= limit])
+    limit_ordinal = limit.toordinal()
+    _measure("Bereinigung neu (date_ordinal)", lambda: [r for r in slotted if r.date_ordinal >= limit_ordinal])
+
+    _measure("Sortierung alt (strptime)", lambda: sorted(legacy, key=lambda r: datetime.strptime(r.time, "%H:%M").time()))
+    _measure("Sortierung neu (time_minutes)", lambda: sorted(slotted, key=lambda r: r.time_minutes))
@@ -0,0 +1,170 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import logging
+
+from .models import Reservation, parse_date_ordinal
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'data', 'archive')
+INDEX_NAME = 'index.json'
+UNDATED = "ohne-datum"
+
+# Abgelaufene Reservierungen werden pro Jahr (des Datums) an reservations_<Jahr>.jsonl.gz angehängt:
+# ein JSON-Datensatz pro Zeile, jeder Anhang ist ein eigenes gzip-Member. Die Dateien werden nur
+# erweitert, nie umgeschrieben. index.json führt je Jahr die gültige Dateigröße, Anzahl und
+# Datumsbereich; ein nach einem Absturz halb geschriebener Anhang wird beim nächsten Anhängen
+# auf die gültige Größe zurückgeschnitten.
+
+_lock = threading.Lock()
+
+
+def _index_path():
+    return os.path.join(ARCHIVE_DIR, INDEX_NAME)
+
+
+def archive_path(year):
+    return os.path.join(ARCHIVE_DIR, f"reservations_{year}.jsonl.gz")
+
+
+def load_index():
+    if not os.path.exists(_index_path()):
+        return {}
+    try:
+        with open(_index_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Archiv-Index {_index_path()} nicht lesbar: {e}. Durchsuche alle Archivdateien.")
+        index = {}
+        for file_name in os.listdir(ARCHIVE_DIR):
+            if file_name.startswith('reservations_') and file_name.endswith('.jsonl.gz'):
+                year = file_name[len('reservations_'):-len('.jsonl.gz')]
+                index[year] = {"size": os.path.getsize(os.path.join(ARCHIVE_DIR, file_name))}
+        return index
+
+
+def _save_index(index):
+    temp_fd, temp_path = tempfile.mkstemp(dir=ARCHIVE_DIR, prefix='archive_temp_', suffix='.json')
+    with os.fdopen(temp_fd, 'w', encoding='utf-8') as tmp:
+        json.dump(index, tmp, indent=1)
+    os.replace(temp_path, _index_path())
+
+
+def _year_of(r_data):
+    date_str = r_data.get('date')
+    return date_str[:4] if parse_date_ordinal(date_str) is not None else UNDATED
+
+
+def append_reservations(reservations_data):
+    """Hängt Reservierungen (Liste von to_dict-Daten) an die Jahresarchive an. Rückgabe: Anzahl."""
+    if not reservations_data:
+        return 0
+    by_year = {}
+    for r_data in reservations_data:
+        by_year.setdefault(_year_of(r_data), []).append(r_data)
+    with _lock:
+        if not os.path.exists(ARCHIVE_DIR):
+            os.makedirs(ARCHIVE_DIR)
+        index = load_index()
+        for year, records in sorted(by_year.items()):
+            path = archive_path(year)
+            info = index.get(year, {"size": 0, "records": 0, "first_date": None, "last_date": None})
+            if os.path.exists(path) and os.path.getsize(path) > info["size"]:
+                logger.warning(f"Archiv {path} enthält einen unvollständigen Anhang. Schneide auf {info['size']} Bytes ab.")
+                with open(path, 'r+b') as f:
+                    f.truncate(info["size"])
+            lines = "".join(json.dumps(r_data, ensure_ascii=False, separators=(',', ':')) + "\n" for r_data in records)
+            member = gzip.compress(lines.encode('utf-8'))
+            with open(path, 'ab') as f:
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+            dates = sorted(r_data['date'] for r_data in records if year != UNDATED)
+            info = {
+                "size": info["size"] + len(member),
+                "records": info.get("records", 0) + len(records),
+                "first_date": min(filter(None, [info.get("first_date")] + dates[:1]), default=None),
+                "last_date": max(filter(None, [info.get("last_date")] + dates[-1:]), default=None),
+            }
+            index[year] = info
+        _save_index(index)
+    logger.info(f"{len(reservations_data)} Reservierungen archiviert ({', '.join(sorted(by_year))}).")
+    return len(reservations_data)
+
+
+def _iter_year(year, info):
+    """Liest ein Jahresarchiv zeilenweise, ohne es komplett in den Speicher zu laden."""
+    path = archive_path(year)
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as raw:
+        # Nur den im Index bestätigten Teil lesen (ein unvollständiger Anhang wird ignoriert)
+        limited = _LimitedReader(raw, info.get("size"))
+        try:
+            with gzip.open(limited, 'rt', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Archivzeile {line_no} in {path} ist korrupt. Überspringe.")
+        except (EOFError, OSError) as e:
+            logger.warning(f"Archiv {path} endet unerwartet: {e}")
+
+
+class _LimitedReader:
+    """Dateiobjekt, das höchstens limit Bytes liefert (None = alles)."""
+
+    def __init__(self, raw, limit):
+        self._raw = raw
+        self._remaining = limit
+
+    def read(self, size=-1):
+        if self._remaining is None:
+            return self._raw.read(size)
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._raw.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def iter_archived_reservations(date_from=None, date_to=None, name=None, table_id=None):
+    """
+    Nur lesende Abfrage über das Archiv (Generator von Reservation-Objekten, älteste Jahre zuerst).
+    date_from/date_to: 'YYYY-MM-DD' inklusive; name: Teilstring, ohne Groß-/Kleinschreibung;
+    table_id: exakter Tisch/Zimmer. Jahre außerhalb des Datumsbereichs werden nicht geöffnet.
+    """
+    name_lower = name.lower() if name else None
+    # Bricht die Bereinigung zwischen Archivieren und Löschen ab, wird beim nächsten Lauf erneut
+    # archiviert -> doppelte IDs nur einmal liefern
+    seen_ids = set()
+    for year, info in sorted(load_index().items()):
+        if year != UNDATED:
+            if date_from and info.get("last_date") and info["last_date"] < date_from:
+                continue
+            if date_to and info.get("first_date") and info["first_date"] > date_to:
+                continue
+        elif date_from or date_to:
+            continue
+        for r_data in _iter_year(year, info):
+            if date_from and (r_data.get('date') or "") < date_from:
+                continue
+            if date_to and (r_data.get('date') or "") > date_to:
+                continue
+            if table_id and r_data.get('table_id') != table_id:
+                continue
+            if name_lower and name_lower not in (r_data.get('name') or "").lower():
+                continue
+            if r_data.get('id') in seen_ids:
+                continue
+            seen_ids.add(r_data.get('id'))
+            try:
+                yield Reservation.from_dict(r_data)
+            except Exception as e:
+                logger.error(f"Fehler bei Erstellung eines Reservation-Objekts aus dem Archiv: {e} - Daten: {r_data}")
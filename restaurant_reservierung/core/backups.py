@@ -0,0 +1,236 @@
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import tempfile
+import threading
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_DIR = os.path.join(BASE_DIR, 'data', 'backups')
+MANIFEST_NAME = 'manifest.json'
+OBJECTS_SUBDIR = 'objects'
+
+# Snapshots werden unter ihrem SHA-256 (über den unkomprimierten Inhalt) abgelegt. Gleicher
+# Inhalt wird nur einmal gespeichert, das Manifest führt die Zeitpunkte. "gzip" ist schneller,
+# "lzma" kleiner.
+# Manifest-Eintrag: series, ts, hash (Inhalt), file, file_sha256 (komprimierte Datei), size
+# (Bytes unkomprimiert), records (Anzahl Reservierungen). Damit lässt sich ein Snapshot ohne
+# JSON-Parsen auf Unversehrtheit prüfen. "series" trennt die gesicherten Dateien
+# (reservations.json bzw. je Monats-Partition), Aufbewahrung und Dedupe gelten pro Serie.
+DEFAULT_SERIES = "reservations"
+BACKUP_COMPRESSION = "gzip"
+
+# Aufbewahrung: alles aus der letzten Stunde, danach der jeweils neueste Stand pro Tag
+# und darüber hinaus pro Kalenderwoche.
+KEEP_ALL_HOURS = 1
+KEEP_DAILY_DAYS = 14
+KEEP_WEEKLY_WEEKS = 12
+
+_COMPRESSORS = {
+    "gzip": (".json.gz", gzip.compress, gzip.decompress),
+    "lzma": (".json.xz", lzma.compress, lzma.decompress),
+}
+
+_lock = threading.Lock()
+_manifest_cache = None  # (Pfad, Liste der Einträge, älteste zuerst)
+
+
+def _manifest_path():
+    return os.path.join(BACKUP_DIR, MANIFEST_NAME)
+
+
+def _objects_dir():
+    return os.path.join(BACKUP_DIR, OBJECTS_SUBDIR)
+
+
+def ensure_backup_dir_exists():
+    if not os.path.exists(_objects_dir()):
+        try:
+            os.makedirs(_objects_dir())
+            logger.info(f"Backup-Verzeichnis erstellt: {BACKUP_DIR}")
+        except OSError as e:
+            logger.error(f"Fehler beim Erstellen des Backup-Verzeichnisses {BACKUP_DIR}: {e}")
+            return False
+    return True
+
+
+def _atomic_write(path, data):
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='backup_temp_')
+    try:
+        with os.fdopen(temp_fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_manifest():
+    """Einträge des Manifests (älteste zuerst). Wird nach dem ersten Lesen im Speicher gehalten."""
+    global _manifest_cache
+    path = _manifest_path()
+    if _manifest_cache is not None and _manifest_cache[0] == path:
+        return _manifest_cache[1]
+    entries = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('snapshots', [])
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Backup-Manifest {path} nicht lesbar: {e}. Beginne neues Manifest.")
+            entries = []
+    _manifest_cache = (path, entries)
+    return entries
+
+
+def forget_manifest():
+    """Verwirft das Manifest im Speicher (ein anderer Prozess hat Snapshots angelegt)."""
+    global _manifest_cache
+    _manifest_cache = None
+
+
+def _save_manifest(entries):
+    global _manifest_cache
+    payload = json.dumps({"snapshots": entries}, ensure_ascii=False, indent=1).encode('utf-8')
+    _atomic_write(_manifest_path(), payload)
+    _manifest_cache = (_manifest_path(), entries)
+
+
+def object_path(entry):
+    return os.path.join(_objects_dir(), entry['file'])
+
+
+def _series(entry):
+    return entry.get('series', DEFAULT_SERIES)
+
+
+def has_snapshot(series=DEFAULT_SERIES):
+    return any(_series(e) == series for e in load_manifest())
+
+
+def store_snapshot(content_bytes, record_count=None, now=None, series=DEFAULT_SERIES):
+    """
+    Legt content_bytes (Inhalt von reservations.json bzw. einer Partition) als Snapshot ab.
+    Ist der Inhalt identisch mit dem letzten Snapshot der Serie, passiert nichts. Ein bereits vorhandenes
+    Objekt mit demselben Hash wird nicht neu geschrieben, nur im Manifest referenziert.
+    """
+    if not ensure_backup_dir_exists():
+        return None
+    now = now or datetime.now()
+    digest = hashlib.sha256(content_bytes).hexdigest()
+    with _lock:
+        entries = list(load_manifest())
+        last = next((e for e in reversed(entries) if _series(e) == series), None)
+        if last is not None and last['hash'] == digest:
+            return last
+        extension, compress, _ = _COMPRESSORS[BACKUP_COMPRESSION]
+        file_name = digest + extension
+        file_digest = None
+        existing = next((e for e in entries if e['hash'] == digest), None)
+        if existing is not None:
+            file_name = existing['file']
+            file_digest = existing.get('file_sha256')
+        if file_digest is None or not os.path.exists(os.path.join(_objects_dir(), file_name)):
+            compressed = compress(content_bytes)
+            file_digest = hashlib.sha256(compressed).hexdigest()
+            _atomic_write(os.path.join(_objects_dir(), file_name), compressed)
+        entry = {"series": series, "ts": now.isoformat(timespec='seconds'), "hash": digest, "file": file_name,
+                 "file_sha256": file_digest, "size": len(content_bytes), "records": record_count}
+        entries.append(entry)
+        kept = _apply_retention(entries, now)
+        _save_manifest(kept)
+        _remove_unreferenced_objects(entries, kept)
+        return entry
+
+
+def _apply_retention(entries, now):
+    """Behält alles aus der letzten Stunde, sonst den neuesten Snapshot pro Serie und Tag bzw. Woche."""
+    keep_all_since = now - timedelta(hours=KEEP_ALL_HOURS)
+    daily_since = now - timedelta(days=KEEP_DAILY_DAYS)
+    weekly_since = now - timedelta(weeks=KEEP_WEEKLY_WEEKS)
+    kept = []
+    seen_buckets = set()
+    # Neueste zuerst, damit pro Tag/Woche jeweils der letzte Stand übrig bleibt
+    for entry in reversed(entries):
+        try:
+            ts = datetime.fromisoformat(entry['ts'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if ts >= keep_all_since:
+            bucket = None
+        elif ts >= daily_since:
+            bucket = (_series(entry), 'd', ts.date())
+        elif ts >= weekly_since:
+            bucket = (_series(entry), 'w') + tuple(ts.isocalendar()[:2])
+        else:
+            continue
+        if bucket is not None:
+            if bucket in seen_buckets:
+                continue
+            seen_buckets.add(bucket)
+        kept.append(entry)
+    kept.reverse()
+    return kept
+
+
+def _remove_unreferenced_objects(previous_entries, kept_entries):
+    """Löscht die Objekte herausgefallener Snapshots, sofern kein anderer Eintrag sie noch nutzt."""
+    referenced = {e['file'] for e in kept_entries}
+    for file_name in {e['file'] for e in previous_entries} - referenced:
+        try:
+            os.remove(os.path.join(_objects_dir(), file_name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Fehler beim Löschen der alten Backup-Datei {file_name}: {e}")
+
+
+def verify_snapshot(entry):
+    """
+    Prüft einen Snapshot nur über die Prüfsummen (kein JSON-Parsen).
+    Liefert den unkomprimierten Inhalt oder wirft ValueError mit dem Grund.
+    """
+    try:
+        with open(object_path(entry), 'rb') as f:
+            compressed = f.read()
+    except OSError as e:
+        raise ValueError(f"Datei nicht lesbar: {e}")
+    if entry.get('file_sha256') and hashlib.sha256(compressed).hexdigest() != entry['file_sha256']:
+        raise ValueError("Prüfsumme der Datei stimmt nicht")
+    for extension, _, decompress in _COMPRESSORS.values():
+        if entry['file'].endswith(extension):
+            break
+    else:
+        raise ValueError(f"Unbekanntes Backup-Format: {entry['file']}")
+    try:
+        content = decompress(compressed)
+    except Exception as e:
+        raise ValueError(f"Entpacken fehlgeschlagen: {e}")
+    if hashlib.sha256(content).hexdigest() != entry.get('hash'):
+        raise ValueError("Prüfsumme des Inhalts stimmt nicht")
+    if entry.get('size') is not None and len(content) != entry['size']:
+        raise ValueError("Größe stimmt nicht")
+    return content
+
+
+def find_latest_intact_snapshot(series=DEFAULT_SERIES):
+    """
+    Neuester unversehrter Snapshot der Serie laut Manifest, als (Eintrag, Inhalt, übersprungene Einträge).
+    Es werden nur so viele Snapshots gelesen, bis einer die Prüfung besteht.
+    """
+    skipped = []
+    for entry in reversed(load_manifest()):
+        if _series(entry) != series:
+            continue
+        try:
+            return entry, verify_snapshot(entry), skipped
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Backup {entry.get('file')} vom {entry.get('ts')} ist beschädigt: {e}. Überspringe.")
+            skipped.append(entry)
+    return None, None, skipped
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+import logging
+
+from .models import ResourceRegistry
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLOOR_PLAN_FILE = os.path.join(BASE_DIR, 'data', 'floor_plan.json')
+
+# Grundriss (Bereiche, Tische, Zimmer, Kapazitäten, Reihen, Vorschläge zum Verbinden, Standard-
+# Verweildauern nach Bereich und Personenzahl) aus FLOOR_PLAN_FILE.
+# get_registry() liefert die aktuelle, unveränderliche ResourceRegistry. Höchstens alle
+# RELOAD_CHECK_SECONDS prüft ein os.stat, ob die Datei geändert wurde; dann wird sie neu eingelesen,
+# ohne den Server neu zu starten. Eine fehlerhafte Datei beim Neuladen wird geloggt und ignoriert,
+# die bisherige Registry bleibt aktiv. Beim ersten Laden ist ein fehlerhafter Grundriss ein Fehler.
+RELOAD_CHECK_SECONDS = 2.0
+
+_lock = threading.Lock()
+_registry = None
+_stamp = None
+_checked_at = 0.0
+_reload_listeners = []
+
+
+def _file_stamp():
+    try:
+        st = os.stat(FLOOR_PLAN_FILE)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _load_locked(stamp):
+    global _registry, _stamp
+    previous = _registry
+    version = previous.version + 1 if previous is not None else 1
+    try:
+        with open(FLOOR_PLAN_FILE, 'r', encoding='utf-8') as f:
+            registry = ResourceRegistry.from_config(json.load(f), version=version)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if previous is None:
+            raise
+        logger.error(f"Grundriss {FLOOR_PLAN_FILE} konnte nicht neu geladen werden, bisheriger bleibt aktiv: {e}")
+        _stamp = stamp  # Nicht bei jeder Prüfung erneut versuchen, erst nach der nächsten Änderung
+        return None
+    _registry = registry
+    _stamp = stamp
+    logger.info(f"Grundriss geladen (Version {version}): {len(registry.tables)} Tische, {len(registry.rooms)} Zimmer")
+    return registry if previous is not None else None
+
+
+def get_registry():
+    """Aktuelle ResourceRegistry; lädt FLOOR_PLAN_FILE neu, wenn sich die Datei geändert hat."""
+    global _checked_at
+    registry = _registry
+    now = time.monotonic()
+    if registry is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return registry
+    reloaded = None
+    with _lock:
+        if _registry is None or now - _checked_at >= RELOAD_CHECK_SECONDS:
+            _checked_at = now
+            stamp = _file_stamp()
+            if _registry is None or stamp != _stamp:
+                reloaded = _load_locked(stamp)
+        registry = _registry
+    if reloaded is not None:
+        _notify_reload_listeners(reloaded)
+    return registry
+
+
+def current_registry():
+    """
+    Aktuelle Registry ohne Prüfung auf eine geänderte Datei. Für Code, der unter Sperren des Managers
+    läuft (z.B. Snapshot.apply): ein Neuladen dort würde die Reload-Listener unter der Sperre aufrufen.
+    """
+    return _registry if _registry is not None else get_registry()
+
+
+def reload():
+    """Grundriss sofort neu einlesen (z.B. nach dem Bearbeiten), unabhängig von RELOAD_CHECK_SECONDS."""
+    global _checked_at
+    with _lock:
+        _checked_at = time.monotonic()
+        reloaded = _load_locked(_file_stamp())
+        registry = _registry
+    if reloaded is not None:
+        _notify_reload_listeners(reloaded)
+    return registry
+
+
+def add_reload_listener(callback):
+    """callback(registry) wird nach jedem erfolgreichen Neuladen aufgerufen (nicht beim ersten Laden)."""
+    _reload_listeners.append(callback)
+
+
+def _notify_reload_listeners(registry):
+    for callback in list(_reload_listeners):
+        try:
+            callback(registry)
+        except Exception as e:
+            logger.error(f"Fehler in Grundriss-Listener {callback}: {e}")
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """
+    LRU-Cache für gerenderte HTML-Teile, thread-sicher.
+    Einträge gehören zu einer Gruppe (z.B. (table_id, date, shift)) und haben innerhalb der Gruppe
+    eine Variante (z.B. Sprache und Versionen). invalidate() verwirft alle Varianten einer Gruppe
+    auf einmal; über max_entries hinaus fällt der am längsten nicht benutzte Eintrag heraus.
+    """
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (group, variant) -> Wert, älteste zuerst
+        self._groups = {}  # group -> set(variant)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, group, variant):
+        key = (group, variant)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, group, variant, value):
+        key = (group, variant)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._groups.setdefault(group, set()).add(variant)
+            while len(self._entries) > self.max_entries:
+                (old_group, old_variant), _ = self._entries.popitem(last=False)
+                self._forget_variant(old_group, old_variant)
+
+    def _forget_variant(self, group, variant):
+        variants = self._groups.get(group)
+        if variants is not None:
+            variants.discard(variant)
+            if not variants:
+                del self._groups[group]
+
+    def invalidate(self, groups):
+        """Verwirft alle Einträge der angegebenen Gruppen."""
+        with self._lock:
+            for group in groups:
+                for variant in self._groups.pop(group, ()):
+                    self._entries.pop((group, variant), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
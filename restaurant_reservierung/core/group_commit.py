@@ -0,0 +1,84 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    """
+    Hintergrund-Thread für gesammelte Schreibvorgänge.
+    submit() meldet nur "es gibt etwas zu speichern" und liefert eine Ticketnummer. Der Thread
+    wartet nach dem ersten Auftrag window_seconds ab und erledigt dann alle bis dahin
+    eingegangenen Aufträge mit einem einzigen Aufruf von flush_func. wait(ticket) ist die
+    Dauerhaftigkeits-Schranke: kehrt zurück, sobald der Stand des Tickets auf der Platte ist.
+    """
+
+    RETRY_DELAY_SECONDS = 1.0
+
+    def __init__(self, flush_func, window_seconds=0.05, name="group-commit-writer"):
+        self._flush_func = flush_func
+        self._window = window_seconds
+        self._name = name
+        self._cond = threading.Condition()
+        self._requested = 0  # zuletzt vergebenes Ticket
+        self._durable = 0  # höchstes Ticket, dessen Stand geschrieben ist
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        with self._cond:
+            return self._requested > self._durable
+
+    def submit(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._requested += 1
+            self._cond.notify_all()
+            return self._requested
+
+    def wait(self, ticket=None, timeout=None):
+        """Wartet, bis ticket (ohne Angabe: alle bisherigen Aufträge) geschrieben ist. False bei Timeout."""
+        with self._cond:
+            target = self._requested if ticket is None else ticket
+            return self._cond.wait_for(lambda: self._durable >= target, timeout)
+
+    def stop(self, timeout=None):
+        """Schreibt noch ausstehende Aufträge und beendet den Thread."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._requested > self._durable or self._stopping)
+                if self._requested <= self._durable:
+                    return
+                stopping = self._stopping
+            if not stopping:
+                # Fenster abwarten, damit weitere Änderungen im selben Schreibvorgang landen
+                time.sleep(self._window)
+            with self._cond:
+                target = self._requested
+            try:
+                self._flush_func()
+            except Exception as e:
+                logger.error(f"FEHLER im Gruppen-Commit ({target - self._durable} Aufträge): {e}. Neuer Versuch folgt.")
+                if stopping:
+                    return
+                time.sleep(self.RETRY_DELAY_SECONDS)
+                continue
+            with self._cond:
+                self._durable = max(self._durable, target)
+                self._cond.notify_all()
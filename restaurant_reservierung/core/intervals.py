@@ -0,0 +1,167 @@
+import random
+
+# Prioritäten der Treap-Knoten; eigener Generator, damit andere Nutzer von random unberührt bleiben
+_priorities = random.Random()
+
+
+class _Node:
+    """
+    Unveränderlicher Knoten eines Treaps: Suchbaum nach (start, end, key), Heap nach priority.
+    max_end ist das größte Ende im Teilbaum (Augmentierung des Intervallbaums).
+    """
+
+    __slots__ = ("entry", "start", "end", "priority", "left", "right", "max_end")
+
+    def __init__(self, entry, priority, left, right):
+        self.entry = entry
+        self.start = entry[0]
+        self.end = entry[1]
+        self.priority = priority
+        self.left = left
+        self.right = right
+        max_end = entry[1]
+        if left is not None and left.max_end > max_end:
+            max_end = left.max_end
+        if right is not None and right.max_end > max_end:
+            max_end = right.max_end
+        self.max_end = max_end
+
+
+def _insert(node, entry, priority):
+    """Neuer Teilbaum mit entry; nur die Knoten auf dem Suchpfad werden neu angelegt."""
+    if node is None:
+        return _Node(entry, priority, None, None)
+    if entry < node.entry:
+        left = _insert(node.left, entry, priority)
+        if left.priority > node.priority:
+            # Rechtsrotation
+            return _Node(left.entry, left.priority, left.left, _Node(node.entry, node.priority, left.right, node.right))
+        return _Node(node.entry, node.priority, left, node.right)
+    right = _insert(node.right, entry, priority)
+    if right.priority > node.priority:
+        # Linksrotation
+        return _Node(right.entry, right.priority, _Node(node.entry, node.priority, node.left, right.left), right.right)
+    return _Node(node.entry, node.priority, node.left, right)
+
+
+def _merge(left, right):
+    """Verbindet zwei Teilbäume (alle Einträge links < alle rechts)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return _Node(left.entry, left.priority, left.left, _merge(left.right, right))
+    return _Node(right.entry, right.priority, _merge(left, right.left), right.right)
+
+
+def _delete(node, entry):
+    """Neuer Teilbaum ohne entry (muss enthalten sein); kopiert nur den Suchpfad."""
+    if entry == node.entry:
+        return _merge(node.left, node.right)
+    if entry < node.entry:
+        return _Node(node.entry, node.priority, _delete(node.left, entry), node.right)
+    return _Node(node.entry, node.priority, node.left, _delete(node.right, entry))
+
+
+class IntervalIndex:
+    """
+    Halboffene Intervalle [start, end) mit Schlüssel als augmentierter Intervallbaum: ein Treap
+    nach (start, end, key), jeder Knoten kennt das größte Ende seines Teilbaums. Eine Abfrage
+    steigt nur in Teilbäume ab, deren größtes Ende hinter start liegt, und hört beim ersten Eintrag
+    auf, der nicht mehr vor end beginnt. Ein langes Intervall zwingt damit nicht mehr dazu, alle
+    dahinter liegenden Einträge zu prüfen: has_overlap kostet O(log n), overlapping O(log n) je
+    Treffer (erwartet, Treap-Tiefe). add/remove sind O(log n).
+    Die Knoten sind unveränderlich, add/remove legen nur den Suchpfad neu an. copy() teilt daher den
+    ganzen Baum und kopiert nur die Zuordnung key -> Eintrag.
+    """
+
+    __slots__ = ("_root", "_by_key")
+
+    def __init__(self):
+        self._root = None
+        self._by_key = {}  # key -> (start, end, key)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def add(self, start, end, key):
+        if key in self._by_key:
+            self.remove(key)
+        entry = (start, end, key)
+        self._root = _insert(self._root, entry, _priorities.random())
+        self._by_key[key] = entry
+
+    def remove(self, key):
+        entry = self._by_key.pop(key, None)
+        if entry is None:
+            return False
+        self._root = _delete(self._root, entry)
+        return True
+
+    def _scan(self, before=None, ends_after=None, from_start=None):
+        """
+        Einträge in Reihenfolge (start, end, key) mit start < before, end > ends_after und
+        start >= from_start (None = keine Grenze). Teilbäume, die keinen Treffer enthalten können,
+        werden übersprungen.
+        """
+        stack = []
+        node = self._root
+        while True:
+            while node is not None:
+                if ends_after is not None and node.max_end <= ends_after:
+                    break
+                stack.append(node)
+                # Links liegen nur kleinere Starts: überspringen, wenn schon dieser zu klein ist
+                node = node.left if from_start is None or node.start >= from_start else None
+            if not stack:
+                return
+            node = stack.pop()
+            if before is not None and node.start >= before:
+                return
+            if (ends_after is None or node.end > ends_after) and (from_start is None or node.start >= from_start):
+                yield node.entry
+            node = node.right
+
+    def overlapping(self, start, end):
+        """Alle Einträge mit e_start < end und e_end > start, sortiert nach Start."""
+        return self._scan(before=end, ends_after=start)
+
+    def has_overlap(self, start, end, ignore_key=None):
+        for entry in self.overlapping(start, end):
+            if entry[2] != ignore_key:
+                return True
+        return False
+
+    def first_free(self, start, length, ignore_key=None):
+        """
+        Frühester Beginn >= start, ab dem [Beginn, Beginn + length) mit keinem Eintrag überlappt.
+        Springt jeweils an das Ende des spätesten überlappenden Eintrags.
+        """
+        while True:
+            blocking_end = None
+            for entry in self.overlapping(start, start + length):
+                if entry[2] != ignore_key and (blocking_end is None or entry[1] > blocking_end):
+                    blocking_end = entry[1]
+            if blocking_end is None:
+                return start
+            start = blocking_end
+
+    def starting_at(self, start):
+        """Alle Einträge, die genau bei start beginnen."""
+        for entry in self._scan(from_start=start):
+            if entry[0] != start:
+                return
+            yield entry
+
+    def entries(self):
+        return list(self._scan())
+
+    def copy(self):
+        clone = IntervalIndex()
+        clone._root = self._root
+        clone._by_key = dict(self._by_key)
+        return clone
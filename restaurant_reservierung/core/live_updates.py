@@ -0,0 +1,96 @@
+import threading
+
+from . import floor_plan
+
+# Verteilt Änderungsereignisse des Managers (manager.add_change_listener) an offene Live-Verbindungen
+# (Server-Sent Events). Jede Verbindung abonniert ein (Datum, Schicht) und bekommt nur die Tische,
+# die sich dort geändert haben. Ein Zimmeraufenthalt umfasst mehrere Tage, geänderte Zimmer gehen
+# daher an jede Verbindung (die Seite prüft selbst, wer an ihrem Datum im Haus ist).
+# Ereignisse werden je Abonnement zusammengefasst statt eingereiht: ein langsamer Client sammelt
+# höchstens die Menge der geänderten Tische, keine wachsende Warteschlange.
+
+
+class Subscription:
+
+    def __init__(self, date_str, shift):
+        self.date = date_str
+        self.shift = shift
+        self._cond = threading.Condition()
+        self._table_ids = set()
+        self._everything = False
+
+    def _push(self, table_ids):
+        with self._cond:
+            if table_ids is None:
+                self._everything = True
+            else:
+                self._table_ids.update(table_ids)
+            self._cond.notify_all()
+
+    def wait(self, timeout):
+        """
+        Wartet höchstens timeout Sekunden auf Änderungen. Rückgabe: (alles, table_ids); alles=True
+        heißt, dass jeder Tisch neu geladen werden muss. (False, leere Menge) nach Ablauf des Timeouts.
+        """
+        with self._cond:
+            if not self._everything and not self._table_ids:
+                self._cond.wait(timeout)
+            result = (self._everything, self._table_ids)
+            self._everything = False
+            self._table_ids = set()
+            return result
+
+
+class ChangeBus:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # (date, shift) -> set(Subscription)
+        self._count = 0
+
+    def subscribe(self, date_str, shift, limit=None):
+        """Neues Abonnement, oder None, wenn bereits limit Abonnements bestehen."""
+        subscription = Subscription(date_str, shift)
+        with self._lock:
+            if limit is not None and self._count >= limit:
+                return None
+            self._subscriptions.setdefault((date_str, shift), set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get((subscription.date, subscription.shift))
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscriptions[(subscription.date, subscription.shift)]
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+    def publish(self, changed_keys, version=None):
+        """Listener für manager.add_change_listener: changed_keys = {(table_id, date, shift)} oder None."""
+        with self._lock:
+            if changed_keys is None:
+                targets = [(s, None) for subscriptions in self._subscriptions.values() for s in subscriptions]
+            else:
+                registry = floor_plan.current_registry()
+                by_date_shift = {}
+                room_ids = set()
+                for table_id, date_str, shift in changed_keys:
+                    if registry.is_room(table_id):
+                        room_ids.add(table_id)
+                    else:
+                        by_date_shift.setdefault((date_str, shift), set()).add(table_id)
+                targets = [(s, table_ids) for key, table_ids in by_date_shift.items()
+                           for s in self._subscriptions.get(key, ())]
+                if room_ids:
+                    targets += [(s, room_ids) for subscriptions in self._subscriptions.values() for s in subscriptions]
+        for subscription, table_ids in targets:
+            subscription._push(table_ids)
+
+
+bus = ChangeBus()
@@ -1,58 +1,161 @@
+import bisect
 import json
 import os
 import shutil
 import glob
 from datetime import datetime, date, timedelta
-from .models import Reservation, ALL_RESOURCES, ALL_ROOMS
+from .models import Reservation, parse_date_ordinal, parse_time_minutes
 import tempfile
 import logging
-
-from .models import Reservation
+import threading
+import atexit
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext, ExitStack
+
+from . import sqlite_backend
+from . import backups
+from . import partitions
+from . import archive
+from . import process_sync
+from . import floor_plan
+from .snapshot import ReservationSnapshot
+from .merge_groups import MergeGroups
+from .group_commit import GroupCommitWriter
 
 logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_FILE = os.path.join(BASE_DIR, 'data', 'reservations.json')
 MERGE_FILE = os.path.join(BASE_DIR, 'data', 'table_merges.json')
-BACKUP_DIR = os.path.join(BASE_DIR, 'data', 'backups')
-MAX_BACKUPS_TO_KEEP = 10
+JOURNAL_FILE = os.path.join(BASE_DIR, 'data', 'reservations.journal')
 MAX_RESERVATION_AGE_DAYS = 7
 
-_cached_reservations = None
+# Journal-Modus: Jede Änderung wird als eine kompakte Zeile an JOURNAL_FILE angehängt,
+# statt die komplette reservations.json neu zu schreiben. Nach JOURNAL_COMPACT_AFTER
+# Einträgen wird ein neuer Snapshot geschrieben und das Journal geleert.
+USE_JOURNAL = True
+JOURNAL_COMPACT_AFTER = 500
+JOURNAL_FSYNC = True
+
+# Speicher-Engine: "json" (reservations.json + Journal), "sqlite" (sqlite_backend.DB_FILE, WAL-Modus)
+# oder "json_monthly" (eine Datei pro Monat in partitions.PARTITION_DIR, siehe partitions.py).
+# Vor dem Umstellen auf "sqlite" einmalig migrate_json_to_sqlite() ausführen (siehe migrate_to_sqlite.py).
+# "sqlite" lädt wie "json_monthly" nur die abgefragten Monate (Bereichsabfrage über den Datums-Index),
+# eine Reservierung nach ID wird über den Primärschlüssel gefunden und lädt nur ihren Monat.
+# "json_monthly" übernimmt reservations.json beim ersten Start automatisch. Partitionen werden erst
+# geladen, wenn ein Monat abgefragt wird, und nur geänderte Monate werden neu geschrieben
+# (das Journal wird in diesem Modus nicht verwendet).
+STORAGE_BACKEND = "json"
+
+# Gruppen-Commit (nur JSON-Backend, ersetzt dann das Journal): Mutationen werden nur im Speicher
+# übernommen, ein Hintergrund-Thread schreibt alle Änderungen innerhalb von GROUP_COMMIT_WINDOW_MS
+# gesammelt als einen Snapshot (ein os.replace) nach DATA_FILE. Mit GROUP_COMMIT_WAIT_FOR_DURABILITY
+# warten API-Antworten auf mutierende Requests, bis ihr Stand geschrieben ist (wait_for_durability).
+USE_GROUP_COMMIT = False
+GROUP_COMMIT_WINDOW_MS = 50
+GROUP_COMMIT_WAIT_FOR_DURABILITY = True
+DURABILITY_WAIT_TIMEOUT_SECONDS = 5
+
+# Mehrere Server-Prozesse auf denselben Daten (siehe process_sync.py): Geschrieben (Commit) und geladen
+# wird unter einer flock-Sperre, und vor jedem Zugriff prüft ein os.stat auf die Versionsdatei,
+# ob ein anderer Prozess geschrieben hat; dann wird der Cache verworfen und neu geladen. Prüfen und
+# Ändern laufen ohne flock (nur unter den Partitionssperren); hat ein anderer Prozess seit Beginn
+# geschrieben, bricht der Commit mit ConflictError ab (siehe _process_view).
+# Gruppen-Commit ist in diesem Modus abgeschaltet (ein später Snapshot würde fremde Änderungen überschreiben).
+MULTI_PROCESS = False
+
+_cached_reservations = None  # dict: id -> Reservation (Einfügereihenfolge = Dateireihenfolge), nur für Schreiber
 _reservations_loaded_at_least_once = False
-
-def ensure_backup_dir_exists():
-    if not os.path.exists(BACKUP_DIR):
-        try:
-            os.makedirs(BACKUP_DIR)
-            logger.info(f"Backup-Verzeichnis erstellt: {BACKUP_DIR}")
-        except OSError as e:
-            logger.error(f"Fehler beim Erstellen des Backup-Verzeichnisses {BACKUP_DIR}: {e}")
-            return False
-    return True
-
-def cleanup_old_backups():
-    if not ensure_backup_dir_exists():
-        return
-    try:
-        backup_files = glob.glob(os.path.join(BACKUP_DIR, "reservations_backup_*.json"))
-        backup_files.sort(key=os.path.getmtime)
-        if len(backup_files) > MAX_BACKUPS_TO_KEEP:
-            files_to_delete = backup_files[:-MAX_BACKUPS_TO_KEEP]
-            for f_del in files_to_delete:
-                try:
-                    os.remove(f_del)
-                except OSError as e:
-                    logger.error(f"Fehler beim Löschen der alten Backup-Datei {f_del}: {e}")
-    except Exception as e:
-        logger.error(f"Fehler beim Aufräumen alter Backups: {e}")
+_journal_entry_count = 0
+
+# Lesesicht mit allen Indizes (siehe snapshot.py): wird bei jeder Mutation in _commit_changes durch
+# einen neuen, unveränderlichen Snapshot ersetzt. Leser nehmen sich _snapshot einmal und arbeiten
+# darauf ohne Sperre; Lookups kosten O(Ergebnis), eine Änderung kopiert nur die berührten Buckets.
+_snapshot = ReservationSnapshot()
+
+# _state_lock schützt Cache und Snapshot-Wechsel, während der Schreib-Thread einen Snapshot zieht.
+# _snapshot_write_lock sorgt dafür, dass Snapshots in der Reihenfolge ihres Stands auf die Platte kommen.
+_state_lock = threading.RLock()
+_snapshot_write_lock = threading.Lock()
+# MULTI_PROCESS: Datenversion, auf der der aktuelle Thread liest und prüft (siehe _process_view),
+# und die zuletzt von diesem Prozess geschriebenen Versionen
+_view = threading.local()
+_own_versions = set()
+OWN_VERSIONS_KEPT = 10000
+_group_writer = None
+_commit_ticket = threading.local()
+_last_recovery = None  # Bericht der letzten Wiederherstellung aus einem Backup
+# Kennung dieses Prozesses in Datenversionen: Nach einem Neustart oder in einem anderen Prozess
+# beginnt die Snapshot-Version wieder bei 0 und darf nicht mit einer alten verwechselt werden.
+_instance_token = uuid.uuid4().hex[:8]
+_merge_version = 0  # wird bei jedem Speichern der Tisch-Verbindungen erhöht
+# Tisch-Verbindungen (merge_groups.MergeGroups), zuletzt gelesen bei Stand _merge_groups_stamp
+_merge_groups = None
+_merge_groups_stamp = None
+_merge_lock = threading.RLock()
+_seen_stamp = None  # process_sync.read_stamp() beim letzten Laden/Schreiben dieses Prozesses
+
+# Version je Tisch und (Datum, Schicht): Snapshot-Version der letzten Änderung an einer Reservierung
+# auf diesem Tisch. Nicht eingetragene Tische haben _table_versions_base (Stand des letzten vollständigen
+# Ladens). Damit lassen sich pro Tisch gerenderte Teile (z.B. Tischkarten) gezielt verwerfen.
+_table_versions = {}  # (date, shift) -> {table_id: Version}
+_table_versions_base = 0
+_change_listeners = []  # Callbacks (changed_keys, version), siehe add_change_listener
+# Änderungsprotokoll für Clients mit Versions-Cursor (get_changed_tables): je Snapshot-Version die
+# geänderten (table_id, date, shift) oder None (alles). Begrenzt; wer weiter zurückliegt, lädt alles neu.
+CHANGE_LOG_SIZE = 1000
+_change_log = deque(maxlen=CHANGE_LOG_SIZE)
+
+# Backends, die nur die abgefragten Monate laden (siehe _ensure_loaded)
+_MONTHLY_LOADING_BACKENDS = ("json_monthly", "sqlite")
+# Geladene Monate ("json_monthly" und "sqlite") bzw. noch zu schreibende Partitionen (nur "json_monthly")
+_loaded_partitions = set()
+_all_partitions_loaded = False
+_dirty_partitions = set()
 
 def load_latest_valid_backup():
-    if not os.path.exists(BACKUP_DIR):
+    """
+    Neuester unversehrter Snapshot laut Backup-Manifest (backups.py), sonst alte Einzeldateien.
+    Geprüft wird über die Prüfsummen im Manifest, geparst wird nur der gewählte Snapshot.
+    """
+    global _last_recovery
+    entry, content, skipped = backups.find_latest_intact_snapshot()
+    if entry is not None:
+        snapshot_path = backups.object_path(entry)
+        try:
+            reservations_data = json.loads(content.decode('utf-8'))
+        except ValueError as e:
+            logger.error(f"Backup {snapshot_path} hat gültige Prüfsummen, ist aber kein JSON: {e}")
+            reservations_data = None
+        if isinstance(reservations_data, list):
+            _last_recovery = {
+                "source": snapshot_path,
+                "snapshot_ts": entry.get('ts'),
+                "hash": entry.get('hash'),
+                "records": len(reservations_data),
+                "skipped": [e.get('file') for e in skipped],
+            }
+            logger.warning(
+                f"Wiederherstellung aus Backup vom {entry.get('ts')}: {len(reservations_data)} Reservierungen, "
+                f"Hash {entry.get('hash', '')[:12]}, {len(skipped)} beschädigte neuere Snapshots übersprungen.")
+            return reservations_data, snapshot_path
+    return _load_latest_legacy_backup()
+
+
+def get_last_recovery():
+    """Was beim letzten Start aus einem Backup wiederhergestellt wurde (None, wenn nichts)."""
+    return _last_recovery
+
+
+def _load_latest_legacy_backup():
+    """Backups im alten Format (vollständige Kopien reservations_backup_*.json)."""
+    global _last_recovery
+    if not os.path.exists(backups.BACKUP_DIR):
         logger.warning("Backup-Verzeichnis nicht gefunden, kann kein Backup wiederherstellen.")
         return None, None
     try:
-        backup_files = glob.glob(os.path.join(BACKUP_DIR, "reservations_backup_*.json"))
+        backup_files = glob.glob(os.path.join(backups.BACKUP_DIR, "reservations_backup_*.json"))
         if not backup_files:
             logger.info("Keine Backup-Dateien im Backup-Verzeichnis gefunden.")
             return None, None
@@ -74,6 +177,8 @@ def load_latest_valid_backup():
                     elif not reservations_data:
                         pass
                     logger.info(f"Gültiges Backup gefunden und geladen: {backup_file_path}")
+                    _last_recovery = {"source": backup_file_path, "snapshot_ts": None, "hash": None,
+                                      "records": len(reservations_data), "skipped": []}
                     return reservations_data, backup_file_path
                 else:
                     logger.warning(
@@ -92,6 +197,98 @@ def load_latest_valid_backup():
         logger.error(f"Fehler beim Suchen/Sortieren von Backup-Dateien: {e}")
         return None, None
 
+def _read_journal():
+    """
+    Liest alle vollständigen Einträge aus dem Journal.
+    Eine abgeschnittene letzte Zeile (Absturz während des Schreibens) wird abgeschnitten,
+    damit spätere Anhänge nicht mit ihr verschmelzen.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return []
+    entries = []
+    try:
+        with open(JOURNAL_FILE, 'rb') as f:
+            raw = f.read()
+        if raw and not raw.endswith(b"\n"):
+            valid_length = raw.rfind(b"\n") + 1
+            logger.warning(f"Journal {JOURNAL_FILE} endet mit unvollständigem Eintrag. Schneide ab Byte {valid_length} ab.")
+            with open(JOURNAL_FILE, 'r+b') as f:
+                f.truncate(valid_length)
+            raw = raw[:valid_length]
+        for line_no, line in enumerate(raw.decode('utf-8').splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Journal-Zeile {line_no} in {JOURNAL_FILE} ist korrupt. Überspringe.")
+    except Exception as e:
+        logger.error(f"Fehler beim Lesen des Journals {JOURNAL_FILE}: {e}")
+    return entries
+
+
+def _replay_journal(reservations_data):
+    """Wendet die Journal-Einträge auf die Snapshot-Daten an (Reihenfolge bleibt erhalten)."""
+    global _journal_entry_count
+    entries = _read_journal()
+    _journal_entry_count = len(entries)
+    if not entries:
+        return reservations_data
+
+    result = list(reservations_data or [])
+    positions = {r_data.get('id'): i for i, r_data in enumerate(result)}
+    for entry in entries:
+        for op in entry.get('ops', []):
+            if op.get('op') == 'upsert':
+                r_data = op.get('r') or {}
+                rid = r_data.get('id')
+                if rid in positions:
+                    result[positions[rid]] = r_data
+                else:
+                    positions[rid] = len(result)
+                    result.append(r_data)
+            elif op.get('op') == 'delete':
+                pos = positions.pop(op.get('id'), None)
+                if pos is not None:
+                    result[pos] = None
+    logger.info(f"{len(entries)} Journal-Einträge aus {JOURNAL_FILE} nachgespielt.")
+    return [r_data for r_data in result if r_data is not None]
+
+
+def _append_journal(ops):
+    """Hängt eine Änderung (Liste von Operationen) als eine Zeile an das Journal an."""
+    global _journal_entry_count
+    line = json.dumps({"ts": datetime.now().isoformat(timespec='seconds'), "ops": ops},
+                      ensure_ascii=False, separators=(',', ':'))
+    with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write(line + "\n")
+        f.flush()
+        if JOURNAL_FSYNC:
+            os.fsync(f.fileno())
+    _journal_entry_count += 1
+
+
+def _clear_journal():
+    global _journal_entry_count
+    if os.path.exists(JOURNAL_FILE):
+        try:
+            with open(JOURNAL_FILE, 'w', encoding='utf-8'):
+                pass
+        except OSError as e:
+            logger.error(f"Konnte Journal {JOURNAL_FILE} nicht leeren: {e}")
+            return
+    _journal_entry_count = 0
+
+
+def compact_journal():
+    """Schreibt den aktuellen Stand als Snapshot nach DATA_FILE und leert das Journal."""
+    _ensure_loaded()
+    logger.info(f"Kompaktiere Journal ({_journal_entry_count} Einträge) in {DATA_FILE}.")
+    with _process_lock():
+        _write_cache_snapshot()
+        _mark_written()
+
+
 def _load_reservations_from_disk():
     global _reservations_loaded_at_least_once
     reservations_data = None
@@ -108,7 +305,7 @@ def _load_reservations_from_disk():
                 logger.info(f"Leere Reservierungsdatei {DATA_FILE} erstellt.")
             except Exception as e_create:
                 logger.error(f"Konnte leere Reservierungsdatei {DATA_FILE} nicht erstellen: {e_create}")
-            return []
+            reservations_data = []
     else:
         try:
             with open(DATA_FILE, 'r', encoding='utf-8') as f:
@@ -118,7 +315,7 @@ def _load_reservations_from_disk():
                     reservations_data, loaded_from_backup_path = load_latest_valid_backup()
                     if reservations_data is None:
                         logger.warning("Hauptdatei leer und kein Backup gefunden. Verwende leere Liste.")
-                        return []
+                        reservations_data = []
                 else:
                     reservations_data = json.loads(content)
                     logger.info(f"Reservierungen erfolgreich aus Hauptdatei {DATA_FILE} geladen.")
@@ -134,14 +331,14 @@ def _load_reservations_from_disk():
                         json.dump([], f)
                 except Exception:
                     pass
-                return []
+                reservations_data = []
         except Exception as e:
             logger.error(f"Unerwarteter FEHLER beim Laden von {DATA_FILE}: {e}. Versuche Backup.")
             reservations_data, loaded_from_backup_path = load_latest_valid_backup()
             if reservations_data is None:
                 logger.critical(
                     f"KRITISCH: Hauptdatei konnte nicht gelesen werden und KEIN gültiges Backup gefunden! Starte mit leerer Liste.")
-                return []
+                reservations_data = []
 
     if loaded_from_backup_path and reservations_data is not None:
         logger.warning(f"Stelle {DATA_FILE} aus Backup {loaded_from_backup_path} wieder her.")
@@ -150,12 +347,18 @@ def _load_reservations_from_disk():
                 corrupt_backup_name = DATA_FILE + f".corrupted_before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 shutil.move(DATA_FILE, corrupt_backup_name)
                 logger.info(f"Originale (möglicherweise korrupte) Datei gesichert als: {corrupt_backup_name}")
-            shutil.copy2(loaded_from_backup_path, DATA_FILE)
+            temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(DATA_FILE), prefix='res_temp_', suffix='.json')
+            with os.fdopen(temp_fd, 'w', encoding='utf-8') as tmp:
+                json.dump(reservations_data, tmp, indent=4)
+            os.replace(temp_path, DATA_FILE)
             logger.info(f"{DATA_FILE} erfolgreich aus Backup wiederhergestellt.")
         except Exception as e_restore:
             logger.error(
                 f"FEHLER beim Wiederherstellen von {DATA_FILE} aus Backup {loaded_from_backup_path}: {e_restore}")
 
+    # Änderungen seit dem letzten Snapshot nachspielen (auch wenn nur das Journal existiert)
+    reservations_data = _replay_journal(reservations_data)
+
     loaded_objects = []
     if reservations_data:
         for r_data in reservations_data:
@@ -168,34 +371,482 @@ def _load_reservations_from_disk():
     _reservations_loaded_at_least_once = True
     return loaded_objects
 
-def load_reservations(force_reload=False):
+def _parse_day_ordinal(date_str):
+    ordinal = parse_date_ordinal(date_str)
+    if ordinal is None:
+        raise ValueError(f"Ungültiges Datum: {date_str}")
+    return ordinal
+
+
+def _set_cache(reservations_objects_list):
+    """Ersetzt den kompletten Cache und veröffentlicht einen neu aufgebauten Snapshot."""
+    global _cached_reservations, _snapshot
+    with _state_lock:
+        _cached_reservations = {r.id: r for r in reservations_objects_list}
+        # Die Version läuft auch über ein Neuladen hinweg weiter
+        _snapshot = ReservationSnapshot.build(_cached_reservations.values(), _snapshot.version + 1)
+        _reset_table_versions()
+        version = _snapshot.version
+        _change_log.append((version, None))
+    _notify_change_listeners(None, version)
+
+
+def _reset_table_versions():
+    """Nach einem vollständigen Neuladen gelten alle Tische als geändert."""
+    global _table_versions, _table_versions_base
+    _table_versions = {}
+    _table_versions_base = _snapshot.version
+
+
+def _bump_table_versions(previous, changed, deleted_ids, version):
+    """
+    Trägt version für alle (table_id, date, shift) ein, auf denen sich eine Reservierung geändert hat
+    (alter und neuer Platz). Erst nach dem Veröffentlichen des Snapshots aufrufen: wer die neue
+    Tisch-Version sieht, sieht dann auch den neuen Stand. Rückgabe: die geänderten Schlüssel.
+    """
+    keys = set()
+    for r in changed:
+        keys.add((r.table_id, r.date, r.shift))
+    for rid in set(deleted_ids) | {r.id for r in changed}:
+        old = previous.get(rid)
+        if old is not None:
+            keys.add((old.table_id, old.date, old.shift))
+    for table_id, date_str, shift in keys:
+        _table_versions.setdefault((date_str, shift), {})[table_id] = version
+    return keys
+
+
+def get_table_versions(date_str, shift):
+    """
+    {table_id: Version} aller Tische und Zimmer für (Datum, Schicht). Die Version eines Tisches ändert
+    sich, sobald sich eine Reservierung darauf ändert. Vor den Reservierungen abfragen, dann passt
+    der gelesene Stand mindestens zu dieser Version.
+    """
+    _ensure_loaded([partitions.month_of(date_str)])
+    base = _table_versions_base
+    changed = _table_versions.get((date_str, shift), {})
+    return {resource.id: changed.get(resource.id, base) for resource in floor_plan.get_registry().resources}
+
+
+def get_changed_tables(since, date_str, shift):
+    """
+    Tische und Zimmer (Menge von table_id) von (Datum, Schicht), die sich seit der Datenversion since
+    (siehe get_data_version) geändert haben, und die aktuelle Datenversion als neuer Cursor. Zimmer
+    zählen unabhängig von Datum und Schicht (ein Aufenthalt umfasst mehrere Tage).
+    Statt der Menge None, wenn der Client alles neu laden muss: unbekannte oder fremde Version, älter
+    als das Änderungsprotokoll, oder seitdem neu geladen bzw. Tisch-Verbindungen geändert.
+    """
+    _ensure_loaded([partitions.month_of(date_str)])
+    table_ids = set()
+    registry = floor_plan.get_registry()
+    with _state_lock:
+        # Snapshot und Protokoll werden unter derselben Sperre fortgeschrieben
+        current = _snapshot.version
+        current_version = f"{_instance_token}-{current}"
+        since_number = _since_number(since, current)
+        if since_number is None:
+            return None, current_version
+        if since_number == current:
+            return table_ids, current_version
+        # Jede neue Version hat einen Eintrag; fehlt der nach since, ist er schon herausgefallen
+        if not _change_log or _change_log[0][0] > since_number + 1:
+            return None, current_version
+        for version, keys in reversed(_change_log):
+            if version <= since_number:
+                break
+            if keys is None:
+                return None, current_version
+            table_ids.update(table_id for table_id, key_date, key_shift in keys
+                             if (key_date == date_str and key_shift == shift) or registry.is_room(table_id))
+    return table_ids, current_version
+
+
+def _since_number(since, current):
+    """Snapshot-Version aus einem Cursor dieses Prozesses, sonst None."""
+    token, _, number = (since or "").rpartition("-")
+    if token != _instance_token or not number.isdigit() or int(number) > current:
+        return None
+    return int(number)
+
+
+def add_change_listener(callback):
+    """
+    Registriert callback(changed_keys, version), aufgerufen nach jeder übernommenen Änderung mit der
+    Menge der betroffenen (table_id, date, shift) und der neuen Snapshot-Version; nach einem
+    vollständigen Neuladen oder einer Änderung der Tisch-Verbindungen mit changed_keys=None
+    (alles kann sich geändert haben).
+    Callbacks laufen im schreibenden Thread und müssen schnell sein.
+    """
+    _change_listeners.append(callback)
+
+
+def _notify_change_listeners(changed_keys, version):
+    for callback in list(_change_listeners):
+        try:
+            callback(changed_keys, version)
+        except Exception as e:
+            logger.error(f"Fehler in Änderungs-Listener {callback}: {e}")
+
+
+def _on_floor_plan_reload(registry):
+    """
+    Ein neu geladener Grundriss kann Verweildauern und die Art (Tisch/Zimmer) von Ressourcen ändern:
+    Der Snapshot wird mit den neuen Regeln neu aufgebaut (Intervall-Indizes der Tische und Zimmer),
+    Listener bekommen changed_keys=None, weil sich die Karten aller Tage und Schichten ändern können.
+    """
+    global _snapshot
+    with _state_lock:
+        _snapshot = ReservationSnapshot.build(list(_snapshot), _snapshot.version + 1)
+        version = _snapshot.version
+        _change_log.append((version, None))
+    logger.info(f"Grundriss Version {registry.version} aktiv, Indizes neu aufgebaut (Datenversion {version}).")
+    _notify_change_listeners(None, version)
+
+
+floor_plan.add_reload_listener(_on_floor_plan_reload)
+
+
+def get_data_version():
+    """
+    Monoton steigende Version des Reservierungsstands (z.B. für ETags), ändert sich bei jeder
+    gespeicherten Änderung und bei jedem (Nach-)Laden von der Platte.
+    """
+    # Hat ein anderer Prozess geschrieben, wird hier neu geladen und die Version steigt
+    _ensure_loaded([])
+    return f"{_instance_token}-{_snapshot.version}"
+
+
+def get_merge_version():
+    """Version der Tisch-Verbindungen; im JSON-Betrieb zählt auch eine Änderung der Datei von außen."""
+    if STORAGE_BACKEND == "sqlite":
+        return f"{_instance_token}-{_merge_version}"
+    try:
+        st = os.stat(MERGE_FILE)
+        file_stamp = f"{st.st_mtime_ns}-{st.st_size}"
+    except FileNotFoundError:
+        file_stamp = "0"
+    return f"{_instance_token}-{_merge_version}-{file_stamp}"
+
+
+def get_snapshot(date_str=None):
+    """
+    Aktueller, unveränderlicher Stand der Reservierungen (siehe snapshot.py). Für Seiten, die mehrere
+    Abfragen auf einem konsistenten Stand brauchen. date_str begrenzt im "json_monthly"-Modus das Laden.
+    """
+    _ensure_loaded([partitions.month_of(date_str)] if date_str else None)
+    return _snapshot
+
+
+def _process_lock():
+    return process_sync.exclusive_lock() if MULTI_PROCESS else nullcontext()
+
+
+def _reload_if_changed_elsewhere():
+    """Nur MULTI_PROCESS: Cache verwerfen, wenn ein anderer Prozess seit dem letzten Laden geschrieben hat."""
     global _cached_reservations
+    if not MULTI_PROCESS or _cached_reservations is None:
+        return
+    if process_sync.read_stamp() == _seen_stamp:
+        return
+    logger.info("Reservierungen wurden von einem anderen Prozess geändert. Cache wird neu geladen.")
+    with _state_lock:
+        _cached_reservations = None
+        backups.forget_manifest()
+        partitions.forget_manifest()
+
+
+def _mark_written():
+    """Nach eigenem Schreiben: Version erhöhen, damit andere Prozesse neu laden (Aufrufer hält _process_lock)."""
+    global _seen_stamp
+    if MULTI_PROCESS:
+        _own_versions.add(process_sync.bump_version())
+        _seen_stamp = process_sync.read_stamp()
+        # Gebraucht werden nur Versionen seit dem ältesten laufenden Lesebeginn
+        if len(_own_versions) > 2 * OWN_VERSIONS_KEPT:
+            _own_versions.difference_update(sorted(_own_versions)[:-OWN_VERSIONS_KEPT])
+
+
+@contextmanager
+def _process_view():
+    """
+    Nur MULTI_PROCESS: merkt sich für den äußersten Aufruf je Thread (partition_lock, transaction)
+    die Datenversion, auf der gelesen und geprüft wird, und lädt neu, falls ein anderer Prozess
+    geschrieben hat. Die flock-Sperre wird dabei nicht gehalten, siehe _check_no_foreign_writes.
+    """
+    if not MULTI_PROCESS or getattr(_view, 'version', None) is not None:
+        yield
+        return
+    # Erst die Version, dann der Abgleich: was danach geschrieben wird, fällt beim Commit auf
+    _view.version = process_sync.read_version()
+    try:
+        _reload_if_changed_elsewhere()
+        yield
+    finally:
+        _view.version = None
+
+
+def _check_no_foreign_writes():
+    """
+    Beim Commit unter _process_lock: hat ein anderer Prozess seit Beginn von _process_view geschrieben,
+    passen Prüfungen und Versionsvergleiche nicht mehr zum Plattenstand -> Cache verwerfen, ConflictError.
+    """
+    begin = getattr(_view, 'version', None)
+    if not MULTI_PROCESS or begin is None:
+        return
+    current = process_sync.read_version()
+    if any(version not in _own_versions for version in range(begin + 1, current + 1)):
+        _reload_if_changed_elsewhere()
+        raise ConflictError("Die Daten wurden inzwischen von einem anderen Prozess geändert. Bitte erneut versuchen.")
+
+
+def _ensure_loaded(months=None):
+    """
+    Stellt sicher, dass der Cache geladen ist. months (Monatsschlüssel, siehe partitions.month_of)
+    begrenzt das Laden bei "json_monthly" und "sqlite" auf diese Monate, "json" lädt immer alles.
+    """
+    _reload_if_changed_elsewhere()
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        if months is None:
+            if not _all_partitions_loaded or _cached_reservations is None:
+                load_reservations()
+        else:
+            _load_partitions(months)
+        return
+    if not _reservations_loaded_at_least_once or _cached_reservations is None:
+        load_reservations()
+
+
+def load_reservations(force_reload=False):
+    """
+    Alle Reservierungen als unveränderlicher Snapshot (iterierbar, len()); es wird nichts kopiert.
+    Wer eine Liste zum Verändern braucht, muss selbst list(...) aufrufen.
+    """
+    global _seen_stamp
+    _reload_if_changed_elsewhere()
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        if force_reload:
+            _wait_for_pending_writes()
+            _reset_partitions()
+        _load_partitions(None)
+        return _snapshot
     if force_reload or not _reservations_loaded_at_least_once or _cached_reservations is None:
+        _wait_for_pending_writes()
         logger.info("Lade Reservierungen von Festplatte (force_reload oder Erstladung)...")
-        _cached_reservations = _load_reservations_from_disk()
-    return list(_cached_reservations)
+        # Unter der Sperre lesen, damit kein anderer Prozess gerade Journal oder Datei schreibt
+        with _process_lock(), _state_lock:
+            # Ein anderer Thread kann inzwischen geladen (und schon Änderungen eingetragen) haben
+            if force_reload or not _reservations_loaded_at_least_once or _cached_reservations is None:
+                _seen_stamp = process_sync.read_stamp() if MULTI_PROCESS else None
+                _set_cache(_load_reservations_from_disk())
+    return _snapshot
+
+
+def _wait_for_pending_writes():
+    if _group_writer is not None and _group_writer.pending:
+        # Noch nicht geschriebene Änderungen würden sonst durch den Plattenstand ersetzt
+        _group_writer.wait()
+
+
+def _reset_partitions():
+    global _all_partitions_loaded
+    with _state_lock:
+        _set_cache([])
+        _loaded_partitions.clear()
+        _dirty_partitions.clear()
+        _all_partitions_loaded = False
+
+
+def _migrate_json_to_partitions():
+    """Erster Start im "json_monthly"-Modus: reservations.json (inkl. Journal) auf Monate verteilen."""
+    global STORAGE_BACKEND
+    STORAGE_BACKEND = "json"
+    try:
+        reservations = _load_reservations_from_disk()
+    finally:
+        STORAGE_BACKEND = "json_monthly"
+    partition_data = {}
+    for r in reservations:
+        partition_data.setdefault(partitions.month_of(r.date), []).append(r.to_dict())
+    partitions.write_partitions(partition_data)
+    logger.info(f"{len(reservations)} Reservierungen aus {DATA_FILE} auf {len(partition_data)} Monats-Partitionen "
+                f"in {partitions.PARTITION_DIR} verteilt. {DATA_FILE} wird in diesem Modus nicht mehr verwendet.")
+
+
+def _read_stored_month(month):
+    """Datensätze eines Monats (None = alle) aus dem Speicher des aktuellen Backends."""
+    if STORAGE_BACKEND != "sqlite":
+        return partitions.read_partition(month)
+    if month is None:
+        return sqlite_backend.load_all()
+    if month == partitions.UNDATED:
+        return sqlite_backend.load_undated()
+    # Enthält auch Zimmeraufenthalte früherer Monate, die in diesen hineinreichen
+    return sqlite_backend.load_range(*partitions.month_range(month))
+
+
+def _stored_months():
+    """Alle Monate, zu denen Reservierungen gespeichert sind."""
+    if STORAGE_BACKEND == "sqlite":
+        return {partitions.month_of(date_str) for date_str in sqlite_backend.stored_dates()}
+    return partitions.all_months()
+
+
+def _load_partitions(months):
+    """
+    Lädt die Monate (None = alle) in den Cache, sofern noch nicht geschehen: bei "json_monthly" die
+    Partitionsdateien, bei "sqlite" je Monat eine Bereichsabfrage (alle: eine Abfrage ohne Bedingung).
+    """
+    global _reservations_loaded_at_least_once, _all_partitions_loaded, _seen_stamp, _snapshot
+    with _process_lock(), _state_lock:
+        stamp = process_sync.read_stamp() if MULTI_PROCESS else None
+        if _cached_reservations is None or stamp != _seen_stamp:
+            # Bereits geladene Monate passen nicht mehr zu dem, was jetzt auf der Platte steht
+            if stamp != _seen_stamp:
+                partitions.forget_manifest()
+                backups.forget_manifest()
+            _reset_partitions()
+            _seen_stamp = stamp
+        if _all_partitions_loaded:
+            return
+        if STORAGE_BACKEND == "sqlite":
+            wanted = [None] if months is None else sorted(set(months) - _loaded_partitions)
+        else:
+            if not _reservations_loaded_at_least_once and not partitions.exists():
+                _migrate_json_to_partitions()
+            wanted = partitions.all_months() if months is None else partitions.months_to_load(months)
+            wanted = sorted(wanted - _loaded_partitions)
+        loaded = []
+        for month in wanted:
+            logger.info(f"Lade {'alle Monate' if month is None else f'Monat {month}'} von Festplatte...")
+            for r_data in _read_stored_month(month):
+                try:
+                    r = Reservation.from_dict(r_data)
+                except Exception as e_obj:
+                    logger.error(f"Fehler bei Erstellung eines Reservation-Objekts: {e_obj} - Daten: {r_data}")
+                    continue
+                if r.id in _cached_reservations:
+                    if STORAGE_BACKEND == "sqlite":
+                        # Zimmeraufenthalt über das Monatsende, mit einem anderen Monat schon geladen
+                        continue
+                    logger.warning(f"Reservierung {r.id} steht in mehreren Partitionen, verwende die aus {month}.")
+                _cached_reservations[r.id] = r
+                loaded.append(r)
+            if month is not None:
+                _loaded_partitions.add(month)
+        if loaded:
+            # Nachladen von der Platte ändert den Datenstand nicht -> gleiche Version
+            _snapshot = _snapshot.apply(upserts=loaded, version=_snapshot.version)
+        if months is None:
+            _all_partitions_loaded = True
+        else:
+            # Monate ohne Partitionsdatei sind leer und gelten damit ebenfalls als geladen
+            _loaded_partitions.update(months)
+        _reservations_loaded_at_least_once = True
 
-def save_reservations(reservations_objects_list):
-    global _cached_reservations
-    if not ensure_backup_dir_exists():
-        logger.warning("Backup-Verzeichnis nicht verfügbar. Speichere ohne Backup der Originaldatei.")
+
+def _collect_partitions(months):
+    """{Monat: [r_data, ...]} aus dem Cache, Aufrufer hält _state_lock."""
+    return {month: [r.to_dict() for r in _snapshot.for_month(month)] for month in months}
+
+
+def _write_dirty_partitions():
+    """Schreibt alle als geändert markierten Monats-Partitionen."""
+    with _snapshot_write_lock:
+        with _state_lock:
+            dirty = set(_dirty_partitions)
+            _dirty_partitions.clear()
+            partition_data = _collect_partitions(dirty)
+        try:
+            partitions.write_partitions(partition_data, fsync=USE_GROUP_COMMIT)
+        except Exception:
+            with _state_lock:
+                _dirty_partitions.update(dirty)
+            raise
+
+
+def get_reservations_for_date_and_shift(date_str, shift):
+    """Tupel aus dem aktuellen Snapshot (unveränderlich, keine Kopie)."""
+    _ensure_loaded([partitions.month_of(date_str)])
+    return _snapshot.for_date_shift(date_str, shift)
+
+
+def get_reservations_from_date(date_str):
+    """
+    Alle Reservierungen ab date_str (alle Schichten) und die Zimmeraufenthalte, die vorher angereist
+    sind und frühestens an date_str abreisen. Bei "json_monthly" und "sqlite" werden nur die Monate
+    ab date_str geladen (samt Aufenthalten, die aus früheren Monaten hineinreichen).
+    """
+    day = _parse_day_ordinal(date_str)
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        month = partitions.month_of(date_str)
+        _ensure_loaded([m for m in _stored_months() | {month} if m >= month])
     else:
-        if os.path.exists(DATA_FILE):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            backup_file_name = f"reservations_backup_{timestamp}.json"
-            backup_file_path = os.path.join(BACKUP_DIR, backup_file_name)
-            try:
-                shutil.copy2(DATA_FILE, backup_file_path)
-                cleanup_old_backups()
-            except Exception as e:
-                logger.error(f"Fehler beim Erstellen des Backups von {DATA_FILE}: {e}")
+        _ensure_loaded()
+    # Ein Snapshot für die ganze Abfrage
+    snapshot = _snapshot
+    found = list(snapshot.from_date(date_str))
+    found.extend(snapshot.get(rid) for rid in snapshot.room_stays_reaching(day))
+    return found
+
+
+def get_reservations_for_table(table_id):
+    _ensure_loaded()
+    return _snapshot.for_table(table_id)
+
+
+def get_child_reservations(parent_id):
+    """Alle Schattenbuchungen einer Hauptbuchung (über den parent_id-Index, O(Kinder))."""
+    # Schattenbuchungen liegen am selben Tag wie die Hauptbuchung, deren Monat ist damit schon geladen
+    parent = _snapshot.get(parent_id)
+    _ensure_loaded([partitions.month_of(parent.date)] if parent is not None else None)
+    return _snapshot.children_of(parent_id)
+
+def save_reservations(reservations_objects_list):
+    with _process_lock():
+        _save_reservations(reservations_objects_list)
+        _mark_written()
+
+
+def _save_reservations(reservations_objects_list):
+    global _all_partitions_loaded
+    if STORAGE_BACKEND == "sqlite":
+        try:
+            sqlite_backend.replace_all([r.to_dict() for r in reservations_objects_list])
+            with _state_lock:
+                _set_cache(reservations_objects_list)
+                _all_partitions_loaded = True
+        except Exception as e:
+            logger.error(f"FEHLER beim Speichern von Reservierungen in SQLite: {e}")
+        return
+    if STORAGE_BACKEND == "json_monthly":
+        _save_all_partitions(reservations_objects_list)
+        return
+    with _snapshot_write_lock:
+        if _write_snapshot([r.to_dict() for r in reservations_objects_list]):
+            _set_cache(reservations_objects_list)
+
+
+def _write_snapshot(reservations_as_dicts):
+    """Atomarer Austausch von DATA_FILE, danach Snapshot ins Backup. Aufrufer hält _snapshot_write_lock."""
+    if not backups.has_snapshot() and os.path.exists(DATA_FILE):
+        # Erster Snapshot: den bisherigen Stand sichern, bevor er überschrieben wird
+        try:
+            with open(DATA_FILE, 'rb') as f:
+                backups.store_snapshot(f.read())
+        except Exception as e:
+            logger.error(f"Fehler beim Erstellen des Backups von {DATA_FILE}: {e}")
     try:
+        content = json.dumps(reservations_as_dicts, indent=4)
         temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(DATA_FILE), prefix='res_temp_', suffix='.json')
-        reservations_as_dicts = [r.to_dict() for r in reservations_objects_list]
         with os.fdopen(temp_fd, 'w', encoding='utf-8') as tmp:
-            json.dump(reservations_as_dicts, tmp, indent=4)
+            tmp.write(content)
+            if USE_GROUP_COMMIT:
+                # Die Schranke meldet "geschrieben" erst, wenn der Inhalt wirklich auf der Platte ist
+                tmp.flush()
+                os.fsync(tmp.fileno())
         os.replace(temp_path, DATA_FILE)
-        _cached_reservations = list(reservations_objects_list)
+        # Der Snapshot enthält jetzt alle Änderungen -> Journal wird nicht mehr gebraucht
+        _clear_journal()
     except Exception as e:
         logger.error(f"FEHLER beim Speichern von Reservierungen: {e}")
         if 'temp_path' in locals() and os.path.exists(temp_path):
@@ -203,63 +854,507 @@ def save_reservations(reservations_objects_list):
                 os.remove(temp_path)
             except OSError as e_rem:
                 logger.warning(f"Konnte temporäre Datei {temp_path} nicht löschen: {e_rem}")
+        return False
+    try:
+        # Gleicher Inhalt wie der letzte Snapshot wird nicht erneut abgelegt
+        backups.store_snapshot(content.encode('utf-8'), record_count=len(reservations_as_dicts))
+    except Exception as e:
+        logger.error(f"Fehler beim Erstellen des Backups von {DATA_FILE}: {e}")
+    return True
+
+
+def _save_all_partitions(reservations_objects_list):
+    """Vollständige Liste speichern: nur Monate mit geändertem Inhalt werden neu geschrieben."""
+    global _all_partitions_loaded
+    partition_data = {month: [] for month in partitions.all_months()}
+    for r in reservations_objects_list:
+        partition_data.setdefault(partitions.month_of(r.date), []).append(r.to_dict())
+    with _snapshot_write_lock:
+        try:
+            written = partitions.write_partitions(partition_data, fsync=USE_GROUP_COMMIT)
+        except Exception as e:
+            logger.error(f"FEHLER beim Speichern der Monats-Partitionen: {e}")
+            return
+        with _state_lock:
+            _set_cache(reservations_objects_list)
+            _loaded_partitions.clear()
+            _loaded_partitions.update(partitions.all_months())
+            _dirty_partitions.clear()
+            _all_partitions_loaded = True
+    logger.info(f"{len(written)} Monats-Partitionen geschrieben: {', '.join(sorted(written)) or '-'}")
+
+
+def _flush_group_commit():
+    """Wird vom Schreib-Thread aufgerufen: aktueller Speicherstand -> ein Snapshot."""
+    if STORAGE_BACKEND == "json_monthly":
+        _write_dirty_partitions()
+        return
+    if not _write_cache_snapshot():
+        raise OSError(f"Snapshot nach {DATA_FILE} konnte nicht geschrieben werden")
+
+
+def _write_cache_snapshot():
+    """
+    Schreibt den Cache als Snapshot nach DATA_FILE. Der Stand wird erst unter _snapshot_write_lock
+    abgegriffen, damit ein später fertig werdender Schreiber keinen neueren Snapshot überschreibt.
+    """
+    with _snapshot_write_lock:
+        with _state_lock:
+            reservations_as_dicts = [r.to_dict() for r in _cached_reservations.values()]
+        return _write_snapshot(reservations_as_dicts)
+
+
+def _get_group_writer():
+    global _group_writer
+    if _group_writer is None:
+        _group_writer = GroupCommitWriter(_flush_group_commit, window_seconds=GROUP_COMMIT_WINDOW_MS / 1000.0)
+    return _group_writer
+
+
+def wait_for_durability(timeout=None):
+    """
+    Dauerhaftigkeits-Schranke: wartet, bis die letzte Änderung des aufrufenden Threads geschrieben ist.
+    Ohne Gruppen-Commit wird direkt geschrieben -> sofort True. False bei Timeout.
+    """
+    ticket = getattr(_commit_ticket, 'ticket', None)
+    if _group_writer is None or ticket is None:
+        return True
+    return _group_writer.wait(ticket, timeout)
+
+
+def flush_pending_writes():
+    """Schreibt ausstehende Gruppen-Commits und beendet den Schreib-Thread (z. B. beim Herunterfahren)."""
+    if _group_writer is not None:
+        _group_writer.stop()
+
+
+atexit.register(flush_pending_writes)
 
 
 def cleanup_old_reservations():
-    res = load_reservations()
-    limit = date.today() - timedelta(days=7)
-    new_res = []
-    for r in res:
+    """
+    Verschiebt Reservierungen, die seit mehr als MAX_RESERVATION_AGE_DAYS vorbei sind (bei Zimmern
+    zählt die Abreise), in die Jahresarchive (archive.py). Die Löschung läuft über _commit_changes,
+    im Journal-Modus also als eine Journal-Zeile statt eines Neuschreibens der ganzen Datei.
+    """
+    with _process_lock():
+        return _cleanup_old_reservations()
+
+
+def _cleanup_old_reservations():
+    limit = (date.today() - timedelta(days=MAX_RESERVATION_AGE_DAYS)).toordinal()
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        # Nur Monate bis zum Monat der Grenze laden, neuere Monate bleiben unberührt
+        limit_month = partitions.month_of(date.fromordinal(limit).isoformat())
+        old_months = [m for m in _stored_months() if m != partitions.UNDATED and m <= limit_month]
+        _ensure_loaded(old_months)
+        snapshot = _snapshot
+        candidates = [r for m in old_months for r in snapshot.for_month(m)]
+    else:
+        candidates = load_reservations()
+    # Falls Datum korrupt (date_ordinal None), behalten wir die Reservierung
+    aged_out = [r for r in candidates
+                if r.date_ordinal is not None and (r.end_date_ordinal or r.date_ordinal) < limit]
+    if not aged_out:
+        return 0
+    with partition_lock(*{(r.date, r.shift) for r in aged_out}):
+        # Zwischenzeitlich geänderte Reservierungen beim nächsten Lauf archivieren
+        aged_out = [r for r in aged_out if _snapshot.get(r.id) is r]
+        # Erst archivieren, dann löschen: bei einem Abbruch dazwischen geht nichts verloren
+        archive.append_reservations([r.to_dict() for r in aged_out])
+        _commit_changes(deleted_ids=[r.id for r in aged_out])
+    with _state_lock:
+        # Tisch-Versionen vergangener Tage werden nicht mehr gebraucht
+        for key in [k for k in _table_versions if (parse_date_ordinal(k[0]) or limit) < limit]:
+            del _table_versions[key]
+    return len(aged_out)
+
+
+# Wartung (Archivierung abgelaufener Reservierungen) läuft nicht beim Import, sondern über
+# start_maintenance() (run_server.py): ein Hintergrund-Thread archiviert beim Start und danach alle
+# MAINTENANCE_INTERVAL_SECONDS. Jeder Lauf nimmt die Prozess-Sperre (cleanup_old_reservations),
+# mehrere Server-Prozesse archivieren also nie gleichzeitig.
+MAINTENANCE_INTERVAL_SECONDS = 6 * 60 * 60
+_maintenance_thread = None
+_maintenance_stop = threading.Event()
+
+
+def run_maintenance():
+    """Ein Wartungslauf; Fehler werden geloggt, damit der Wartungs-Thread weiterläuft."""
+    try:
+        archived = cleanup_old_reservations()
+    except Exception as e:
+        logger.error(f"Wartung fehlgeschlagen: {e}", exc_info=True)
+        return 0
+    if archived:
+        logger.info(f"Wartung: {archived} abgelaufene Reservierungen archiviert.")
+    else:
+        logger.debug("Wartung: keine abgelaufenen Reservierungen.")
+    return archived
+
+
+def _maintenance_loop():
+    while True:
+        run_maintenance()
+        if _maintenance_stop.wait(MAINTENANCE_INTERVAL_SECONDS):
+            return
+
+
+def start_maintenance():
+    """Startet den Wartungs-Thread (einmal pro Prozess)."""
+    global _maintenance_thread
+    if _maintenance_thread is not None and _maintenance_thread.is_alive():
+        return
+    _maintenance_stop.clear()
+    _maintenance_thread = threading.Thread(target=_maintenance_loop, name="wartung", daemon=True)
+    _maintenance_thread.start()
+    logger.info("Wartungs-Thread gestartet (Archivierung abgelaufener Reservierungen).")
+
+
+def stop_maintenance():
+    _maintenance_stop.set()
+
+
+atexit.register(stop_maintenance)
+
+
+def get_archived_reservations(date_from=None, date_to=None, name=None, table_id=None):
+    """Nur lesender Zugriff auf archivierte Reservierungen (Generator, siehe archive.iter_archived_reservations)."""
+    return archive.iter_archived_reservations(date_from, date_to, name, table_id)
+
+
+def _commit_changes(created=(), updated=(), deleted_ids=()):
+    """
+    Zentrale Schreibstelle für alle Mutationen.
+    Aktualisiert den Cache und schreibt im Journal-Modus nur die Änderung (konstante Kosten),
+    sonst wird die komplette Liste über save_reservations geschrieben.
+    Im "json_monthly"-Modus werden nur die betroffenen Monats-Partitionen neu geschrieben.
+    """
+    with _process_lock():
+        _check_no_foreign_writes()
+        _apply_and_write_changes(created, updated, deleted_ids)
+        _mark_written()
+
+
+def _apply_and_write_changes(created, updated, deleted_ids):
+    global _snapshot
+    deleted_ids = set(deleted_ids)
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        # Alte und neue Monate müssen vollständig im Cache sein, bevor ihre Partition neu geschrieben
+        # wird bzw. ihre Indizes im Snapshot (Überschneidungen) vollständig sind
+        affected = {partitions.month_of(r.date) for r in list(created) + list(updated)}
+        affected.update(partitions.month_of(_snapshot.get(rid).date)
+                        for rid in deleted_ids | {r.id for r in updated} if rid in _snapshot)
+        _ensure_loaded(affected)
+        if STORAGE_BACKEND == "json_monthly":
+            with _state_lock:
+                _dirty_partitions.update(affected)
+    else:
+        _ensure_loaded()
+
+    with _state_lock:
+        for rid in deleted_ids:
+            _cached_reservations.pop(rid, None)
+        for r in list(created) + list(updated):
+            _cached_reservations[r.id] = r
+        # Copy-on-write: nur die berührten Buckets werden kopiert, Leser des alten Snapshots merken nichts
+        previous = _snapshot
+        _snapshot = _snapshot.apply(upserts=list(created) + list(updated), deleted_ids=deleted_ids)
+        changed_keys = _bump_table_versions(previous, list(created) + list(updated), deleted_ids, _snapshot.version)
+        version = _snapshot.version
+        _change_log.append((version, frozenset(changed_keys)))
+    _notify_change_listeners(changed_keys, version)
+
+    if STORAGE_BACKEND == "sqlite":
+        # Zeilenweise Änderungen in einer Transaktion, kein Vollschreiben nötig
+        sqlite_backend.apply_changes([r.to_dict() for r in list(created) + list(updated)], deleted_ids)
+        return
+
+    if USE_GROUP_COMMIT and not MULTI_PROCESS:
+        # Schreiben übernimmt der Hintergrund-Thread, der Request wartet nicht auf die Platte
+        _commit_ticket.ticket = _get_group_writer().submit()
+        return
+
+    if STORAGE_BACKEND == "json_monthly":
         try:
-            if datetime.strptime(r.date, "%Y-%m-%d").date() >= limit:
-                new_res.append(r)
-        except (ValueError, TypeError):
-            # Falls Datum korrupt, behalten oder löschen?
-            # Besser behalten und loggen, hier löschen wir es sicherheitshalber nicht
-            # außer es ist extrem alt. Wir behalten es hier mal.
-            new_res.append(r)
+            _write_dirty_partitions()
+        except Exception as e:
+            logger.error(f"FEHLER beim Schreiben der Monats-Partitionen: {e}")
+        return
 
-    if len(new_res) < len(res): save_reservations(new_res)
+    if not USE_JOURNAL:
+        _write_cache_snapshot()
+        return
 
-import uuid
+    ops = [{"op": "upsert", "r": r.to_dict()} for r in list(created) + list(updated)]
+    ops += [{"op": "delete", "id": rid} for rid in deleted_ids]
+    if not ops:
+        return
+    try:
+        # Commits verschiedener (Datum, Schicht) laufen parallel -> Zeilen nicht verschränken
+        with _snapshot_write_lock:
+            _append_journal(ops)
+    except Exception as e:
+        logger.error(f"FEHLER beim Schreiben ins Journal: {e}. Schreibe vollständigen Snapshot.")
+        _write_cache_snapshot()
+        return
+    if _journal_entry_count >= JOURNAL_COMPACT_AFTER:
+        compact_journal()
 
 
-def create_reservation(name, date, time, persons, table_id, info, shift, end_date=None, parent_id=None):
-    res = load_reservations()
-    my_id = str(uuid.uuid4())
-    if not end_date: end_date = date
+class TransactionError(Exception):
+    """Die Transaktion ist ungültig, es wurde nichts geschrieben."""
+
+
+class ConflictError(TransactionError):
+    """Eine gelesene Reservierung wurde inzwischen von jemand anderem geändert, es wurde nichts geschrieben."""
+
+
+# Feingranulare Sperren je (Datum, Schicht): Commits auf verschiedenen Tagen/Schichten laufen parallel,
+# nur Änderungen am selben (Datum, Schicht) werden nacheinander geprüft und übernommen.
+# Kann eine Sperre nicht innerhalb des Timeouts genommen werden (z.B. gegenläufige Sperrreihenfolge),
+# gibt es einen ConflictError statt eines Deadlocks.
+PARTITION_LOCK_TIMEOUT_SECONDS = 10
+_partition_locks = {}  # (date, shift) -> RLock
+_partition_locks_guard = threading.Lock()
 
-    # NEU: Wenn es eine Hauptbuchung ist, schauen wir nach Partnern
-    # und schreiben deren Namen in die Info, damit man es in der Liste sieht.
-    partners_display = ""
-    merges = load_merges()
 
-    if parent_id is None and table_id in merges:
-        # Wir holen uns die Namen der Partner-Tische für die Anzeige (optional, aber schick)
-        # (Da wir hier keinen Zugriff auf ALL_TABLES DisplayNames haben, lassen wir es im Info-Text
-        #  oder lösen es später in app.py. Wir markieren es nur.)
-        pass
+def _get_partition_lock(key):
+    with _partition_locks_guard:
+        lock = _partition_locks.get(key)
+        if lock is None:
+            lock = _partition_locks[key] = threading.RLock()
+        return lock
 
-    new_r = Reservation(my_id, name, date, time, persons, table_id, info, False, False, shift, end_date)
 
-    if parent_id:
-        new_r.info = f"[LINKED:{parent_id}] {info}"  # Markierung für Schattenbuchung
+@contextmanager
+def partition_lock(*keys):
+    """
+    with manager.partition_lock((date, shift), ...): ...
+    Sperrt die angegebenen (Datum, Schicht), z.B. damit Verfügbarkeitsprüfung und Anlegen nicht von
+    einem anderen Thread unterbrochen werden. Wiedereintrittsfähig, die Sperren werden sortiert genommen.
+    Andere Prozesse werden nicht gesperrt: deren Schreiben dazwischen erkennt der Commit (ConflictError).
+    """
+    with _process_view(), ExitStack() as stack:
+        for key in sorted({(str(date_str), str(shift)) for date_str, shift in keys}):
+            lock = _get_partition_lock(key)
+            if not lock.acquire(timeout=PARTITION_LOCK_TIMEOUT_SECONDS):
+                raise ConflictError(f"{key[0]} ({key[1]}) ist gerade gesperrt. Bitte erneut versuchen.")
+            stack.callback(lock.release)
+        yield
+
+
+def room_lock_keys(checkin_str, checkout_str):
+    """Sperrschlüssel für einen Zimmeraufenthalt: jeder belegte Tag, damit sich überlappende Buchungen treffen."""
+    try:
+        checkin = _parse_day_ordinal(checkin_str)
+        checkout = _parse_day_ordinal(checkout_str)
+    except (ValueError, TypeError):
+        return [(checkin_str, Reservation.SHIFT_DINNER)]
+    return [(date.fromordinal(day).isoformat(), Reservation.SHIFT_DINNER)
+            for day in range(checkin, max(checkout, checkin + 1))]
 
-    res.append(new_r)
-    save_reservations(res)
 
-    # Schattenbuchungen erstellen
-    if parent_id is None:
-        if table_id in merges:
-            partners = merges[table_id]
-            for partner_id in partners:
+class ReservationTransaction:
+    """
+    Unit of Work: Sammelt Anlegen, Ändern und Löschen mehrerer Reservierungen im Speicher,
+    prüft sie beim Commit und schreibt sie mit einem einzigen _commit_changes-Aufruf
+    (eine Journal-Zeile bzw. ein Schreibvorgang mit einem Backup).
+    Geänderte Reservierungen werden als Kopie bearbeitet, der Cache bleibt bis zum Commit unverändert.
+    Beim Commit wird unter den (Datum, Schicht)-Sperren geprüft, ob jede geänderte oder gelöschte
+    Reservierung noch die beim Lesen gesehene Version hat (Compare-and-Swap), sonst ConflictError.
+    """
+
+    UPDATABLE_FIELDS = ("name", "date", "end_date", "time", "persons", "table_id", "info", "shift", "arrived", "departed",
+                        "duration")
+
+    def __init__(self):
+        self._created = {}
+        self._updated = {}
+        self._changed_fields = {}
+        self._deleted = set()
+        self._base = {}  # id -> (version, date, shift) beim ersten Lesen in dieser Transaktion
+        self.closed = False
+
+    def get(self, reservation_id):
+        """Liest eine Reservierung inklusive der in dieser Transaktion vorgemerkten Änderungen."""
+        if reservation_id in self._deleted:
+            return None
+        if reservation_id in self._created:
+            return self._created[reservation_id]
+        if reservation_id in self._updated:
+            return self._updated[reservation_id]
+        return get_reservation_by_id(reservation_id)
+
+    def create(self, reservation):
+        self._created[reservation.id] = reservation
+        return reservation
+
+    def _remember_base(self, current):
+        self._base.setdefault(current.id, (current.version, current.date, current.shift))
+
+    def expect_version(self, reservation_id, version):
+        """Der Aufrufer hat die Reservierung in dieser Version gesehen (z.B. im Formular); sonst ConflictError."""
+        if version is None or reservation_id in self._created:
+            return
+        if reservation_id not in self._base:
+            current = get_reservation_by_id(reservation_id)
+            if current is None:
+                raise ConflictError(f"Reservierung {reservation_id} wurde inzwischen gelöscht.")
+            self._remember_base(current)
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            raise TransactionError(f"Ungültige Version '{version}' für Reservierung {reservation_id}.")
+        seen_version = self._base[reservation_id][0]
+        if seen_version != version:
+            raise ConflictError(f"Reservierung {reservation_id} wurde inzwischen geändert "
+                                f"(Version {seen_version}, erwartet {version}).")
+
+    def update(self, reservation_id, **changes):
+        unknown = set(changes) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise TransactionError(f"Unbekannte Felder für Update: {', '.join(sorted(unknown))}")
+        staged = self._created.get(reservation_id) or self._updated.get(reservation_id)
+        if staged is None:
+            current = self.get(reservation_id)
+            if current is None:
+                return None
+            self._remember_base(current)
+            staged = current.copy()
+            self._updated[reservation_id] = staged
+        self._changed_fields.setdefault(reservation_id, set()).update(changes)
+        for field, value in changes.items():
+            setattr(staged, field, value)
+        return staged
+
+    def delete(self, reservation_id):
+        current = self.get(reservation_id)
+        if current is None:
+            return False
+        if reservation_id not in self._created:
+            self._remember_base(current)
+        self._deleted.add(reservation_id)
+        return True
+
+    def _validate(self, created, updated):
+        # Bei Änderungen werden nur Datensätze geprüft, deren Tisch/Datum/Schicht geändert wurde,
+        # damit alte, unvollständige Daten z.B. trotzdem als angekommen markiert werden können.
+        key_fields = {"table_id", "date", "end_date", "shift"}
+        updated = [r for r in updated if self._changed_fields.get(r.id, set()) & key_fields]
+        for r in created + updated:
+            if not r.id or not r.table_id or not r.date:
+                raise TransactionError(f"Reservierung {r.id} ist unvollständig (ID, Tisch und Datum sind Pflicht).")
+            if r.shift not in Reservation.VALID_SHIFTS:
+                raise TransactionError(f"Ungültige Schicht '{r.shift}' für Reservierung {r.id}.")
+            try:
+                _parse_day_ordinal(r.date)
+                if r.end_date:
+                    _parse_day_ordinal(r.end_date)
+            except (ValueError, TypeError):
+                raise TransactionError(f"Ungültiges Datum für Reservierung {r.id}: {r.date} / {r.end_date}")
+        for r in created:
+            if get_reservation_by_id(r.id, date_hint=r.date) is not None:
+                raise TransactionError(f"Reservierung {r.id} existiert bereits.")
+            if r.parent_id and self.get(r.parent_id) is None:
+                raise TransactionError(f"Hauptbuchung {r.parent_id} für Schattenbuchung {r.id} existiert nicht.")
+
+    def _check_versions(self, updated, deleted_ids):
+        for rid in [r.id for r in updated] + deleted_ids:
+            version, date_str, shift = self._base[rid]
+            current = get_reservation_by_id(rid, date_hint=date_str)
+            if current is None:
+                raise ConflictError(f"Reservierung {rid} wurde inzwischen gelöscht.")
+            if current.version != version:
+                raise ConflictError(f"Reservierung {rid} wurde inzwischen geändert "
+                                    f"(Version {current.version}, gelesen {version}).")
+
+    def commit(self):
+        if self.closed:
+            return
+        created = [r for rid, r in self._created.items() if rid not in self._deleted]
+        updated = [r for rid, r in self._updated.items() if rid not in self._deleted]
+        deleted_ids = [rid for rid in self._deleted if rid not in self._created]
+        # Alte und neue (Datum, Schicht) aller betroffenen Reservierungen sperren
+        lock_keys = [(r.date, r.shift) for r in created + updated]
+        lock_keys += [self._base[rid][1:] for rid in [r.id for r in updated] + deleted_ids]
+        with partition_lock(*lock_keys):
+            self._validate(created, updated)
+            self._check_versions(updated, deleted_ids)
+            self.closed = True
+            if created or updated or deleted_ids:
+                for r in updated:
+                    r.version = self._base[r.id][0] + 1
+                _commit_changes(created=created, updated=updated, deleted_ids=deleted_ids)
+            else:
+                # Nichts zu schreiben, aber vielleicht nur, weil auf einem überholten Stand gelesen wurde
+                _check_no_foreign_writes()
+
+    def rollback(self):
+        self._created.clear()
+        self._updated.clear()
+        self._changed_fields.clear()
+        self._deleted.clear()
+        self._base.clear()
+        self.closed = True
+
+
+_active_transaction = threading.local()
+
+
+@contextmanager
+def transaction():
+    """
+    with manager.transaction() as tx: ...
+    Alle Mutationen im Block (auch create_reservation, move_reservation usw.) werden gesammelt
+    und am Ende gemeinsam geschrieben. Bei einer Exception wird nichts geschrieben.
+    Verschachtelte Aufrufe schließen sich der äußeren Transaktion an.
+    """
+    current = getattr(_active_transaction, 'tx', None)
+    if current is not None:
+        yield current
+        return
+    # Mehrprozessbetrieb: beginnt auf dem aktuellen Plattenstand, nur der Commit läuft unter der flock-Sperre
+    with _process_view():
+        tx = ReservationTransaction()
+        _active_transaction.tx = tx
+        try:
+            yield tx
+            tx.commit()
+        except Exception:
+            tx.rollback()
+            raise
+        finally:
+            _active_transaction.tx = None
+
+
+def create_reservation(name, date, time, persons, table_id, info, shift, end_date=None, parent_id=None, duration=None):
+    """duration: Verweildauer in Minuten (Tische), None = Standard des Grundrisses, sonst > 0 (ValueError)."""
+    if duration is not None:
+        _booking_length(table_id, persons, duration)
+    my_id = str(uuid.uuid4())
+    if not end_date: end_date = date
+
+    # parent_id gesetzt = Schattenbuchung auf einem verbundenen Tisch
+    new_r = Reservation(my_id, name, date, time, persons, table_id, info, False, False, shift, end_date, parent_id,
+                        duration=duration)
+
+    # Hauptbuchung und alle Schattenbuchungen werden zusammen geschrieben (oder gar nicht)
+    with transaction() as tx:
+        tx.create(new_r)
+
+        # Schattenbuchungen erstellen
+        if parent_id is None:
+            for partner_id in get_merge_groups().partners(table_id):
                 create_reservation(
                     name=f"{name}",  # Gleicher Name
                     date=date, time=time, persons=0,
                     table_id=partner_id,
                     info="Automatisch verbunden",
                     shift=shift, end_date=end_date,
-                    parent_id=my_id
+                    parent_id=my_id,
+                    # Schattenbuchungen (0 Personen) belegen den Partner so lange wie die Hauptbuchung
+                    duration=reservation_duration(new_r)
                 )
     return new_r
 
@@ -272,181 +1367,327 @@ def is_room_available(room_id, checkin_str, checkout_str, ignore_id=None):
     except ValueError:
         return False
 
-    for r in load_reservations():
-        if r.table_id == room_id and r.id != ignore_id:
-            try:
-                r_start = datetime.strptime(r.date, "%Y-%m-%d").date()
-                end_str = getattr(r, 'end_date', None)
-                if end_str:
-                    r_end = datetime.strptime(end_str, "%Y-%m-%d").date()
-                else:
-                    r_end = r_start
-
-                # Überschneidungslogik
-                if checkin < r_end and checkout > r_start:
-                    return False
-            except ValueError:
-                continue
-    return True
-
-def get_reservation_by_id(reservation_id_to_find):
-    all_reservations = load_reservations()
-    for res in all_reservations:
-        if res.id == reservation_id_to_find:
-            return res
-    return None
+    if STORAGE_BACKEND == "sqlite" and _cached_reservations is None:
+        # Kalter Start: direkt über den SQLite-Index statt alles zu laden
+        return not sqlite_backend.has_room_overlap(room_id, checkin.isoformat(), checkout.isoformat(), ignore_id)
 
-def update_reservation(reservation_id_to_update, name=None, date_str=None, time_str=None, persons=None, table_id=None,
-                       info=None, shift=None):
-    all_reservations = load_reservations()
-    target_reservation = None
-    updated = False
-    for i, res in enumerate(all_reservations):
-        if res.id == reservation_id_to_update:
-            target_reservation = res
-            if name is not None and res.name != name: res.name = name; updated = True
-            if date_str is not None and res.date != date_str: res.date = date_str; updated = True
-            if time_str is not None and res.time != time_str: res.time = time_str; updated = True
-            if persons is not None:
-                try:
-                    persons_int = int(persons)
-                    if res.persons != persons_int: res.persons = persons_int; updated = True
-                except ValueError:
-                    logger.warning(f"Ungültige Personenzahl '{persons}' für Update ignoriert.")
-            if table_id is not None and res.table_id != table_id: res.table_id = table_id; updated = True
-            if info is not None and res.info != info: res.info = info; updated = True
-            if shift is not None and shift in Reservation.VALID_SHIFTS and res.shift != shift:
-                res.shift = shift;
-                updated = True
-            elif shift is not None:
-                logger.warning(f"Ungültiger Shift '{shift}' für Update ignoriert.")
-
-            if updated:
-                all_reservations[
-                    i] = res
-                save_reservations(all_reservations)
-            return res
-    return None
+    _ensure_loaded(partitions.months_between(checkin.toordinal(), checkout.toordinal()))
+    # Überschneidungslogik: checkin < r_end and checkout > r_start
+    return not _snapshot.room_has_overlap(room_id, checkin.toordinal(), checkout.toordinal(), ignore_id)
 
 
-def delete_reservation(rid):
-    all_res = load_reservations()
+def get_free_rooms(checkin_str, checkout_str, ignore_id=None):
+    """Alle Zimmer des Grundrisses, die im Zeitraum [checkin, checkout) frei sind (ein Durchlauf)."""
+    try:
+        checkin = _parse_day_ordinal(checkin_str)
+        checkout = _parse_day_ordinal(checkout_str)
+    except (ValueError, TypeError):
+        return []
+    _ensure_loaded(partitions.months_between(checkin, checkout))
+    snapshot = _snapshot
+    free_rooms = []
+    for room in floor_plan.get_registry().rooms:
+        if not snapshot.room_has_overlap(room.id, checkin, checkout, ignore_id):
+            free_rooms.append(room)
+    return free_rooms
+
+
+def get_room_reservations_on_date(date_str):
+    """
+    Alle Zimmer-Reservierungen, bei denen der Gast an date_str im Haus ist:
+    Anreise <= Datum < Abreise, bzw. Tageszimmer (Anreise = Abreise = Datum).
+    """
+    day = _parse_day_ordinal(date_str)
+    _ensure_loaded([partitions.month_of(date_str)])
+    # Ein Snapshot für die ganze Abfrage: Aufenthalte und Reservierungen passen immer zusammen
+    snapshot = _snapshot
+    return [snapshot.get(rid) for rid in snapshot.room_stays_on(day)]
+
+def _stored_month_of_id(reservation_id):
+    """Monat einer gespeicherten Reservierung ohne zu laden, None wenn es sie nicht gibt."""
+    if STORAGE_BACKEND == "sqlite":
+        # Primärschlüssel-Abfrage liefert das Datum
+        r_data = sqlite_backend.get_by_id(reservation_id)
+        return partitions.month_of(r_data.get('date')) if r_data is not None else None
+    return partitions.month_of_id(reservation_id)
+
+
+def get_reservation_by_id(reservation_id_to_find, date_hint=None):
+    """
+    date_hint: Datum der Reservierung, falls bekannt. Bei "json_monthly" und "sqlite" wird nur ein
+    Monat geladen: der von date_hint, sonst der laut Manifest bzw. Primärschlüssel.
+    """
+    if STORAGE_BACKEND in _MONTHLY_LOADING_BACKENDS:
+        _reload_if_changed_elsewhere()
+        if _cached_reservations is not None and reservation_id_to_find in _snapshot:
+            return _snapshot.get(reservation_id_to_find)
+        # Beim ersten Zugriff legt "json_monthly" die Partitionen samt Manifest erst an
+        _ensure_loaded([])
+        month = partitions.month_of(date_hint) if date_hint else _stored_month_of_id(reservation_id_to_find)
+        if month is None:
+            return None
+        _ensure_loaded([month])
+    else:
+        _ensure_loaded()
+    return _snapshot.get(reservation_id_to_find)
 
+def update_reservation(reservation_id_to_update, name=None, date_str=None, time_str=None, persons=None, table_id=None,
+                       info=None, shift=None, end_date_str=None, expected_version=None, duration=None):
+    """
+    expected_version: zuletzt gesehene Version (z.B. aus dem Formular), bei Abweichung ConflictError.
+    duration: neue Verweildauer in Minuten (0 = zurück auf den Standard des Grundrisses).
+    """
+    with transaction() as tx:
+        res = tx.get(reservation_id_to_update)
+        if res is None:
+            return None
+        tx.expect_version(reservation_id_to_update, expected_version)
+        changes = {}
+        if name is not None and res.name != name: changes['name'] = name
+        if date_str is not None and res.date != date_str: changes['date'] = date_str
+        if end_date_str is not None and res.end_date != end_date_str: changes['end_date'] = end_date_str
+        if time_str is not None and res.time != time_str: changes['time'] = time_str
+        if persons is not None:
+            try:
+                persons_int = int(persons)
+                if res.persons != persons_int: changes['persons'] = persons_int
+            except ValueError:
+                logger.warning(f"Ungültige Personenzahl '{persons}' für Update ignoriert.")
+        if table_id is not None and res.table_id != table_id: changes['table_id'] = table_id
+        if info is not None and res.info != info: changes['info'] = info
+        if duration is not None:
+            # 0 = zurück auf den Standard, negative Werte sind ein Fehler (ValueError, nichts wird geschrieben)
+            duration_int = None if duration == 0 else _booking_length(res.table_id, res.persons, duration)
+            if res.duration != duration_int: changes['duration'] = duration_int
+        if shift is not None and shift in Reservation.VALID_SHIFTS and res.shift != shift:
+            changes['shift'] = shift
+        elif shift is not None:
+            logger.warning(f"Ungültiger Shift '{shift}' für Update ignoriert.")
+
+        if changes:
+            res = tx.update(reservation_id_to_update, **changes)
+    return res
+
+
+def delete_reservation(rid, expected_version=None):
     # Finde die zu löschende Reservierung
-    target = None
-    for r in all_res:
-        if r.id == rid: target = r; break
+    target = get_reservation_by_id(rid)
 
     if not target: return False
 
-    # Logik: Wir müssen die ID finden UND alle, die [LINKED:ID] in der Info haben
-    new_res_list = []
-    for r in all_res:
-        # 1. Es ist die Reservierung selbst
-        if r.id == rid: continue
+    # Logik: Wir löschen die Reservierung selbst UND alle Schattenbuchungen (parent_id == rid).
+    # Falls wir eine Schatten-Reservierung löschen, löschen wir nur das angeklickte Element
+    # (idealerweise löscht man immer den Parent).
+    with transaction() as tx:
+        tx.expect_version(rid, expected_version)
+        tx.delete(rid)
+        for child in get_child_reservations(rid):
+            tx.delete(child.id)
+    return True
+
+def get_reservations_on_table_at_datetime_and_shift(table_id_to_check, date_str_to_check, time_str_to_check,
+                                                    shift_to_check):
+    _ensure_loaded([partitions.month_of(date_str_to_check)])
+    slot_key = (table_id_to_check, date_str_to_check, shift_to_check, time_str_to_check)
+    return list(_snapshot.at_slot(*slot_key))
 
-        # 2. Es ist eine Schatten-Reservierung dieser ID (via Info Tag check)
-        if f"[LINKED:{rid}]" in r.info: continue
 
-        # 3. Falls wir eine Schatten-Reservierung löschen, sollten wir das Original löschen?
-        # (Optional, hier löschen wir nur das angeklickte Element um Fehler zu vermeiden,
-        # aber idealerweise löscht man immer den Parent)
+def reservation_duration(res, table_id=None):
+    """Verweildauer in Minuten: res.duration oder der Standard des Grundrisses für Tisch und Personenzahl."""
+    return res.duration or floor_plan.get_registry().dwell_minutes(table_id or res.table_id, res.persons)
 
-        new_res_list.append(r)
 
-    if len(new_res_list) < len(all_res):
-        save_reservations(new_res_list)
-        return True
-    return False
+def _booking_length(table_id, persons=None, duration=None):
+    """
+    Verweildauer in Minuten für eine Prüfung: duration oder (None) der Standard des Grundrisses.
+    Eine nicht positive Dauer ergäbe ein leeres Intervall, das nie mit etwas überlappt -> ValueError.
+    """
+    length = floor_plan.get_registry().dwell_minutes(table_id, persons) if duration is None else duration
+    if isinstance(length, bool) or not isinstance(length, int) or length <= 0:
+        raise ValueError(f"Ungültige Verweildauer: {length!r}")
+    return length
 
-def get_reservations_on_table_at_datetime_and_shift(table_id_to_check, date_str_to_check, time_str_to_check,
-                                                    shift_to_check):
-    all_reservations = load_reservations()
-    conflicting_reservations = []
-    for res in all_reservations:
-        if (res.table_id == table_id_to_check and
-                res.date == date_str_to_check and
-                res.shift == shift_to_check and
-                res.time == time_str_to_check):
-            conflicting_reservations.append(res)
-    return conflicting_reservations
-
-
-def is_table_available_for_specific_reservation_time(table_id, date, time, shift, reservation_id_to_ignore=None):
+
+def is_table_available_for_specific_reservation_time(table_id, date, time, shift, reservation_id_to_ignore=None,
+                                                     persons=None, duration=None):
+    """
+    Frei, wenn sich [time, time + Verweildauer) mit keiner anderen Buchung des Tisches an diesem Tag
+    überschneidet (Intervall-Index pro Tisch und Tag). Verweildauer: duration oder der Standard des
+    Grundrisses für persons.
+    """
     # Wenn es ein Zimmer ist, nutzen wir die neue Logik NICHT HIER, sondern rufen is_room_available auf
-    if "zimmer" in table_id:
+    if floor_plan.get_registry().is_room(table_id):
         return True  # Hier dummy true, weil wir das im API Endpunkt anders regeln müssen
 
-    for r in load_reservations():
-        if r.table_id == table_id and r.date == date and r.time == time and r.shift == shift:
+    _ensure_loaded([partitions.month_of(date)])
+    start = parse_time_minutes(time)
+    if start is None:
+        # Ungültige Uhrzeit: wie früher nur derselbe Slot
+        for r in _snapshot.at_slot(table_id, date, shift, time):
             if r.id != reservation_id_to_ignore: return False
-    return True
+        return True
+    length = _booking_length(table_id, persons, duration)
+    bookings = _snapshot.table_bookings(table_id, date)
+    return bookings is None or not bookings.has_overlap(start, start + length, reservation_id_to_ignore)
+
+
+def get_next_free_time(table_id, date_str, time_str, persons=None, duration=None, ignore_id=None):
+    """
+    Frühester Beginn ab time_str ('HH:MM'), zu dem der Tisch für die Verweildauer frei ist,
+    None bei ungültiger Uhrzeit oder wenn das erst nach Mitternacht wäre.
+    """
+    start = parse_time_minutes(time_str)
+    if start is None:
+        return None
+    if floor_plan.get_registry().is_room(table_id):
+        return time_str
+    _ensure_loaded([partitions.month_of(date_str)])
+    bookings = _snapshot.table_bookings(table_id, date_str)
+    if bookings is not None:
+        length = _booking_length(table_id, persons, duration)
+        start = bookings.first_free(start, length, ignore_id)
+    if start >= 24 * 60:
+        return None
+    return f"{start // 60:02d}:{start % 60:02d}"
 
-from .models import ALL_TABLES, ALL_RESOURCES
-from datetime import timedelta
 
+def get_reservations_by_table(date_str, shift):
+    """Die Reservierungen eines (Datum, Schicht) einmalig nach Tisch gruppiert, je Tisch nach Uhrzeit sortiert."""
+    grouped = {}
+    for r in get_reservations_for_date_and_shift(date_str, shift):
+        grouped.setdefault(r.table_id, []).append(r)
+    for table_reservations in grouped.values():
+        table_reservations.sort(key=lambda r: r.time_minutes if r.time_minutes is not None else -1)
+    return grouped
 
-def get_available_tables_for_moving(original_res):
+
+def get_slot_matrix(date_str, shift, time_slots, table_ids=None, ignore_id=None):
     """
-    Gibt verfügbare Ziele zurück.
+    Belegungsmatrix Tisch × Zeit-Slot für ein (Datum, Schicht), aufgebaut in einem einzigen Durchlauf
+    über den (date, shift)-Index statt einer Verfügbarkeitsprüfung pro Slot. Eine Reservierung belegt
+    jeden Slot in [Beginn, Beginn + Verweildauer).
+    Rückgabe: {table_id: {slot: [Reservation, ...]}}, eine leere Liste bedeutet frei.
+    """
+    if table_ids is None:
+        table_ids = floor_plan.get_registry().table_ids
+    matrix = {table_id: {slot: [] for slot in time_slots} for table_id in table_ids}
+    # Slots nach Minuten sortiert: die belegten Slots einer Reservierung findet bisect
+    slot_minutes = []
+    for slot in time_slots:
+        minutes = parse_time_minutes(slot)
+        if minutes is not None:
+            slot_minutes.append((minutes, slot))
+    slot_minutes.sort()
+    starts = [minutes for minutes, _ in slot_minutes]
+    for r in get_reservations_for_date_and_shift(date_str, shift):
+        if r.id == ignore_id:
+            continue
+        row = matrix.get(r.table_id)
+        if row is None:
+            continue
+        if r.time_minutes is None:
+            if r.time in row:
+                row[r.time].append(r)
+            continue
+        end = r.time_minutes + reservation_duration(r)
+        for pos in range(bisect.bisect_left(starts, r.time_minutes), bisect.bisect_left(starts, end)):
+            row[slot_minutes[pos][1]].append(r)
+    return matrix
+
+
+def get_free_time_slots(table_id, date_str, shift, time_slots, ignore_id=None, persons=None, duration=None):
+    """
+    Alle Slots, zu denen eine Buchung mit der Verweildauer beginnen kann (entspricht
+    is_table_available_... für jeden Slot), in einem Aufruf über den Intervall-Index des Tisches.
+    """
+    if floor_plan.get_registry().is_room(table_id):
+        return list(time_slots)
+    _ensure_loaded([partitions.month_of(date_str)])
+    bookings = _snapshot.table_bookings(table_id, date_str)
+    if bookings is None:
+        return list(time_slots)
+    length = _booking_length(table_id, persons, duration)
+    free_slots = []
+    for slot in time_slots:
+        start = parse_time_minutes(slot)
+        if start is None:
+            if is_table_available_for_specific_reservation_time(table_id, date_str, slot, shift, ignore_id):
+                free_slots.append(slot)
+        elif not bookings.has_overlap(start, start + length, ignore_id):
+            free_slots.append(slot)
+    return free_slots
+
+
+def get_move_targets(original_res):
+    """
+    Gibt verfügbare Ziele zusammen mit deren übrigen Reservierungen im selben Datum/Schicht zurück:
+    [(Tisch, [Reservation, ...]), ...]
     Logik:
     1. Wenn Zimmer -> Nur Zimmer anzeigen.
     2. Wenn Tisch -> Nur Tische anzeigen (keine Zimmer).
     3. Wenn Tisch-Gruppe -> Nur Gruppen gleicher Größe anzeigen.
+    Die Reservierungen des Tages/der Schicht werden einmal nach Tisch gruppiert,
+    statt pro Ziel-Tisch erneut alle Reservierungen zu durchsuchen.
     """
     if not original_res: return []
 
-    available_tables = []
-    merges = load_merges()
+    move_targets = []
+    merge_groups = get_merge_groups()
 
     # Prüfen: Ist der Ursprung ein Zimmer?
-    source_is_room = "zimmer" in original_res.table_id.lower()
+    registry = floor_plan.get_registry()
+    source_is_room = registry.is_room(original_res.table_id)
 
-    # Prüfen: Wie groß ist die Ursprungsgruppe?
-    source_partners = merges.get(original_res.table_id, [])
-    source_group_size = 1 + len(source_partners)  # 1 (selbst) + Partner
+    # Gruppengrößen sind in merge_groups vorberechnet (1 für einen nicht verbundenen Tisch)
+    source_group_size = merge_groups.group_size(original_res.table_id)
 
     # Welche Liste durchsuchen wir?
-    # Wenn Zimmer -> ALL_ROOMS, Wenn Tisch -> ALL_TABLES
-    target_list = ALL_ROOMS if source_is_room else ALL_TABLES
+    # Wenn Zimmer -> alle Zimmer, Wenn Tisch -> alle Tische
+    target_list = registry.rooms if source_is_room else registry.tables
+    if source_is_room:
+        free_room_ids = {room.id for room in get_free_rooms(original_res.date, original_res.end_date, original_res.id)}
+
+    reservations_by_table = get_reservations_by_table(original_res.date, original_res.shift)
 
     for target in target_list:
         # Sich selbst überspringen
         if target.id == original_res.table_id:
             continue
 
+        existing = [r for r in reservations_by_table.get(target.id, []) if r.id != original_res.id]
+
         # --- VERFÜGBARKEITS-CHECK ---
-        is_free = False
         if source_is_room:
             # Zimmer-Check (Zeitraum)
-            is_free = is_room_available(target.id, original_res.date, original_res.end_date, original_res.id)
+            is_free = target.id in free_room_ids
         else:
-            # Tisch-Check (Slot)
+            # Tisch-Check: überschneidet sich die Verweildauer mit einer Buchung am Ziel-Tisch?
             is_free = is_table_available_for_specific_reservation_time(
-                target.id, original_res.date, original_res.time, original_res.shift, original_res.id
-            )
+                target.id, original_res.date, original_res.time, original_res.shift, original_res.id,
+                persons=original_res.persons, duration=original_res.duration)
 
         if not is_free:
             continue
 
         # --- GRUPPEN-GRÖSSEN-CHECK (Nur für Tische relevant) ---
-        if not source_is_room:
-            target_partners = merges.get(target.id, [])
-            target_group_size = 1 + len(target_partners)
+        # Wenn Größen ungleich sind -> Überspringen
+        # (z.B. Einzelner Tisch darf nicht auf 2er-Gruppe, 2er-Gruppe nicht auf Einzelnen)
+        if not source_is_room and merge_groups.group_size(target.id) != source_group_size:
+            continue
 
-            # Wenn Größen ungleich sind -> Überspringen
-            # (z.B. Einzelner Tisch darf nicht auf 2er-Gruppe, 2er-Gruppe nicht auf Einzelnen)
-            if source_group_size != target_group_size:
-                continue
+        move_targets.append((target, existing))
+
+    return move_targets
 
-        available_tables.append(target)
 
-    return available_tables
+def get_available_tables_for_moving(original_res):
+    """Gibt verfügbare Ziele zurück (siehe get_move_targets)."""
+    return [target for target, existing in get_move_targets(original_res)]
 
 
 # core/manager.py
 
-def move_reservation(rid, new_tid):
+def move_reservation(rid, new_tid, expected_version=None):
     """
     Verschiebt eine Reservierung.
     WICHTIG: Behandelt verbundene Tische (Schatten-Reservierungen).
@@ -459,42 +1700,40 @@ def move_reservation(rid, new_tid):
     if not r:
         return None
 
+    # Prüfen und Verschieben unter der Sperre des Tages, damit niemand den Ziel-Tisch dazwischen bucht
+    is_room = floor_plan.get_registry().is_room(new_tid)
+    lock_keys = room_lock_keys(r.date, r.end_date) if is_room else [(r.date, r.shift)]
+    with partition_lock(*lock_keys):
+        return _move_reservation_locked(r, new_tid, is_room, expected_version)
+
+
+def _move_reservation_locked(r, new_tid, is_room, expected_version):
+    rid = r.id
     # Prüfen ob Ziel frei ist (Basis-Check)
     # Bei Zimmern nutzen wir is_room_available, bei Tischen den Slot-Check
     is_free = False
-    if "zimmer" in new_tid.lower():
+    if is_room:
         is_free = is_room_available(new_tid, r.date, r.end_date, rid)
     else:
-        is_free = is_table_available_for_specific_reservation_time(new_tid, r.date, r.time, r.shift, rid)
+        is_free = is_table_available_for_specific_reservation_time(new_tid, r.date, r.time, r.shift, rid,
+                                                                   persons=r.persons, duration=r.duration)
 
     if not is_free:
         return None
 
-    # 2. Alte Schatten-Reservierungen löschen
-    # Wir suchen alle Reservierungen, die diese ID als 'parent_id' im Info-Tag haben [LINKED:rid]
-    all_res = load_reservations()
-    res_to_keep = []
-    linked_tag = f"[LINKED:{rid}]"
-
-    for item in all_res:
-        if linked_tag in item.info:
-            # Das ist eine Schatten-Reservierung -> wir übernehmen sie NICHT in die neue Liste (löschen)
-            continue
-        res_to_keep.append(item)
+    # Schritte 2-4 laufen in einer Transaktion: ein Schreibvorgang, keine halben Schattenbuchungen
+    with transaction() as tx:
+        # Die unten übernommenen Felder stammen aus r -> r muss noch aktuell sein
+        tx.expect_version(rid, r.version if expected_version is None else expected_version)
+        # 2. Alte Schatten-Reservierungen löschen (alle mit parent_id == rid)
+        for child in get_child_reservations(rid):
+            tx.delete(child.id)
 
-    # Speichern, damit die alten Schatten weg sind
-    save_reservations(res_to_keep)
+        # 3. Haupt-Reservierung aktualisieren
+        updated_r = update_reservation(rid, r.name, r.date, r.time, r.persons, new_tid, r.info, r.shift)
 
-    # 3. Haupt-Reservierung aktualisieren
-    # Wir laden neu, da save_reservations oben den Cache geändert hat
-    # Aber wir nutzen unser 'r' Objekt weiter und updaten es dann
-    updated_r = update_reservation(rid, r.name, r.date, r.time, r.persons, new_tid, r.info, r.shift)
-
-    # 4. Neue Schatten-Reservierungen erstellen (nur für Tische relevant, Zimmer werden selten gemerged)
-    merges = load_merges()
-    if new_tid in merges:
-        partners = merges[new_tid]
-        for partner_id in partners:
+        # 4. Neue Schatten-Reservierungen erstellen (nur für Tische relevant, Zimmer werden selten gemerged)
+        for partner_id in get_merge_groups().partners(new_tid):
             # Prüfen ob Partner frei ist, wäre hier gut, aber wir erzwingen den Merge meistens.
             create_reservation(
                 name=f"{r.name} (via {new_tid})",
@@ -505,46 +1744,50 @@ def move_reservation(rid, new_tid):
                 info="Automatisch verbunden",
                 shift=r.shift,
                 end_date=r.end_date,
-                parent_id=rid  # WICHTIG: Neue Verlinkung zur Haupt-ID
+                parent_id=rid,  # WICHTIG: Neue Verlinkung zur Haupt-ID
+                duration=reservation_duration(r, new_tid)
             )
 
     return updated_r
 
-def toggle_arrival_status(reservation_id):
-    all_reservations = load_reservations()
-    reservation_updated = None
-    for i, res in enumerate(all_reservations):
-        if res.id == reservation_id:
-            res.arrived = not res.arrived
-            all_reservations[i] = res
-            save_reservations(all_reservations)
+def toggle_arrival_status(reservation_id, expected_version=None):
+    with transaction() as tx:
+        res = tx.get(reservation_id)
+        if res is None:
+            return None
+        tx.expect_version(reservation_id, expected_version)
+        res = tx.update(reservation_id, arrived=not res.arrived)
+    return res
+
+def mark_as_departed(reservation_id, expected_version=None):
+    with transaction() as tx:
+        res = tx.get(reservation_id)
+        if res is None:
+            logger.error(f"Reservierung {reservation_id} nicht gefunden, um als gegangen zu markieren.")
+            return None
+        tx.expect_version(reservation_id, expected_version)
+
+        if res.departed:
+            logger.info(f"Gast {res.name} (ID: {reservation_id}) ist bereits als gegangen markiert.")
             return res
-    return None
 
-def mark_as_departed(reservation_id):
-    all_reservations = load_reservations()
-    for i, res in enumerate(all_reservations):
-        if res.id == reservation_id:
-            if not res.arrived and not res.departed:
-                logger.warning(
-                    f"Gast {res.name} (ID: {reservation_id}) war nicht als angekommen markiert, wird aber als gegangen gesetzt.")
-                res.arrived = True
+        if not res.arrived:
+            logger.warning(
+                f"Gast {res.name} (ID: {reservation_id}) war nicht als angekommen markiert, wird aber als gegangen gesetzt.")
 
-            if res.departed:
-                logger.info(f"Gast {res.name} (ID: {reservation_id}) ist bereits als gegangen markiert.")
-                return res
+        res = tx.update(reservation_id, arrived=True, departed=True)
+    logger.info(f"Gast {res.name} (ID: {reservation_id}) als gegangen markiert.")
+    return res
 
-            res.departed = True
-            all_reservations[i] = res
-            save_reservations(all_reservations)
-            logger.info(f"Gast {res.name} (ID: {reservation_id}) als gegangen markiert.")
-            return res
-    logger.error(f"Reservierung {reservation_id} nicht gefunden, um als gegangen zu markieren.")
-    return None
 
-
-def load_merges():
-    """Lädt die Tisch-Verbindungen. Format: {'tisch_id': ['partner_tisch_id', ...]}"""
+def _read_merges():
+    """Liest die Tisch-Verbindungen vom Speicher. Format: {'tisch_id': ['partner_tisch_id', ...]}"""
+    if STORAGE_BACKEND == "sqlite":
+        try:
+            return sqlite_backend.load_merges()
+        except Exception as e:
+            logger.error(f"Fehler beim Laden der Tischverbindungen aus SQLite: {e}")
+            return {}
     if not os.path.exists(MERGE_FILE): return {}
     try:
         with open(MERGE_FILE, 'r', encoding='utf-8') as f:
@@ -553,40 +1796,93 @@ def load_merges():
         return {}
 
 
-def save_merges(merges):
-    dir_n = os.path.dirname(MERGE_FILE)
-    if not os.path.exists(dir_n): os.makedirs(dir_n)
-    with open(MERGE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(merges, f, indent=4)
-
+def _merge_stamp():
+    """
+    Kennung des gespeicherten Stands der Verbindungen: im JSON-Betrieb die Datei (auch Änderungen von
+    außen zählen), bei MULTI_PROCESS zusätzlich die Versionsdatei (andere Prozesse).
+    """
+    file_stamp = None
+    if STORAGE_BACKEND != "sqlite":
+        try:
+            st = os.stat(MERGE_FILE)
+            file_stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+    return STORAGE_BACKEND, file_stamp, process_sync.read_stamp() if MULTI_PROCESS else None
 
-# core/manager.py
 
-def merge_tables(table_ids_list):
+def get_merge_groups():
     """
-    Verbindet eine LISTE von Tischen (z.B. ['tisch1', 'tisch2', 'tisch3']).
+    Tisch-Verbindungen als unveränderliche MergeGroups (siehe merge_groups.py). Gelesen und geparst
+    wird nur, wenn sich der gespeicherte Stand geändert hat (os.stat statt Datei lesen).
     """
-    if len(table_ids_list) < 2: return False
+    global _merge_groups, _merge_groups_stamp
+    stamp = _merge_stamp()
+    groups = _merge_groups
+    if groups is not None and stamp == _merge_groups_stamp:
+        return groups
+    with _merge_lock:
+        if _merge_groups is None or stamp != _merge_groups_stamp:
+            _merge_groups = MergeGroups.from_dict(_read_merges())
+            _merge_groups_stamp = stamp
+        return _merge_groups
 
-    merges = load_merges()
 
-    # 1. Wir bilden eine große Gruppe aus allen neuen Tischen
-    # UND allen Tischen, die mit diesen bereits verbunden waren.
-    new_group = set(table_ids_list)
+def load_merges():
+    """Tisch-Verbindungen als dict. Format: {'tisch_id': ['partner_tisch_id', ...]}"""
+    return get_merge_groups().to_dict()
 
-    for tid in table_ids_list:
-        if tid in merges:
-            new_group.update(merges[tid])
 
-    # 2. Speichern: Jeder Tisch in der Gruppe kennt alle anderen
-    for member in new_group:
-        partners = list(new_group)
-        if member in partners:
-            partners.remove(member)
-        merges[member] = partners
+def save_merges(merges):
+    """Speichert Verbindungen im dict-Format (siehe load_merges)."""
+    with _process_lock(), _merge_lock:
+        _store_merge_groups(MergeGroups.from_dict(merges))
 
-    save_merges(merges)
-    return True
+
+def _store_merge_groups(groups):
+    """
+    Schreibt groups (JSON: atomar per os.replace) und setzt sie als aktuellen Stand.
+    Aufrufer hält _process_lock und _merge_lock.
+    """
+    global _merge_version, _snapshot, _merge_groups, _merge_groups_stamp
+    merges = groups.to_dict()
+    if STORAGE_BACKEND == "sqlite":
+        sqlite_backend.save_merges(merges)
+    else:
+        dir_n = os.path.dirname(MERGE_FILE)
+        if not os.path.exists(dir_n): os.makedirs(dir_n)
+        temp_fd, temp_path = tempfile.mkstemp(dir=dir_n, prefix='merges_temp_', suffix='.json')
+        try:
+            with os.fdopen(temp_fd, 'w', encoding='utf-8') as tmp:
+                json.dump(merges, tmp, indent=4)
+            os.replace(temp_path, MERGE_FILE)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    _mark_written()
+    _merge_groups = groups
+    _merge_groups_stamp = _merge_stamp()
+    # Erst nach dem Schreiben erhöhen: wer die neue Version sieht, liest auch die neuen Verbindungen
+    _merge_version += 1
+    # Verbindungen ändern die Karten aller Tage und Schichten: neue Datenversion ohne geänderte
+    # Reservierungen, im Änderungsprotokoll als "alles"
+    with _state_lock:
+        _snapshot = _snapshot.apply()
+        version = _snapshot.version
+        _change_log.append((version, None))
+    _notify_change_listeners(None, version)
+
+
+def merge_tables(table_ids_list):
+    """
+    Verbindet eine LISTE von Tischen (z.B. ['tisch1', 'tisch2', 'tisch3']).
+    Bereits mit ihnen verbundene Tische kommen mit in die Gruppe.
+    """
+    if len(table_ids_list) < 2: return False
+    with _process_lock(), _merge_lock:
+        _store_merge_groups(get_merge_groups().merged(table_ids_list))
+        return True
 
 
 def unmerge_tables(table_ids_list):
@@ -594,22 +1890,25 @@ def unmerge_tables(table_ids_list):
     Löst eine LISTE von Tischen aus ihren Verbindungen.
     """
     if not table_ids_list: return False
-
-    merges = load_merges()
-    changed = False
-
-    for table_id in table_ids_list:
-        if table_id in merges:
-            partners = merges[table_id]
-            # Bei den Partnern diesen Tisch entfernen
-            for p in partners:
-                if p in merges and table_id in merges[p]:
-                    merges[p].remove(table_id)
-            # Eintrag löschen
-            del merges[table_id]
-            changed = True
-
-    if changed:
-        save_merges(merges)
+    with _process_lock(), _merge_lock:
+        groups = get_merge_groups()
+        if not any(table_id in groups for table_id in table_ids_list):
+            return False
+        _store_merge_groups(groups.unmerged(table_ids_list))
         return True
-    return False
\ No newline at end of file
+
+
+def migrate_json_to_sqlite():
+    """
+    Einmalige Migration: Importiert reservations.json (inkl. Journal) und table_merges.json
+    in die SQLite-Datenbank. Danach kann STORAGE_BACKEND auf "sqlite" gestellt werden.
+    """
+    global STORAGE_BACKEND
+    previous_backend = STORAGE_BACKEND
+    STORAGE_BACKEND = "json"
+    try:
+        reservations = _load_reservations_from_disk()
+        merges = _read_merges()
+    finally:
+        STORAGE_BACKEND = previous_backend
+    return sqlite_backend.migrate_from_json([r.to_dict() for r in reservations], merges)
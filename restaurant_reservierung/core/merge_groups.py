@@ -0,0 +1,103 @@
+class MergeGroup:
+    """Eine Gruppe verbundener Tische. id = sortierte Tisch-IDs mit "-" verbunden (wie bisher group_id)."""
+
+    __slots__ = ("id", "members")
+
+    def __init__(self, members):
+        self.members = tuple(sorted(members))
+        self.id = "-".join(self.members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def __repr__(self):
+        return f"MergeGroup({self.id})"
+
+
+def _union_find(member_lists):
+    """Union-Find: alle Listen, die sich (auch über Umwege) einen Tisch teilen, ergeben eine Gruppe."""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for members in member_lists:
+        members = list(members)
+        for member in members:
+            root, other = find(members[0]), find(member)
+            if root != other:
+                parent[other] = root
+    groups = {}
+    for member in parent:
+        groups.setdefault(find(member), []).append(member)
+    return groups.values()
+
+
+class MergeGroups:
+    """
+    Unveränderliche Sicht auf alle Tisch-Verbindungen. Gruppe, Gruppengröße, Partner und group_id
+    eines Tisches sind vorberechnet (O(1)). Änderungen (merged/unmerged) liefern ein neues Objekt.
+    Gespeichert wird weiter das bisherige Format {'tisch_id': ['partner_tisch_id', ...]} (to_dict).
+    """
+
+    __slots__ = ("_groups", "_group_by_table", "_partners")
+
+    def __init__(self, member_lists=()):
+        self._groups = []
+        self._group_by_table = {}
+        self._partners = {}
+        for members in member_lists:
+            if len(set(members)) < 2:
+                continue
+            group = MergeGroup(set(members))
+            self._groups.append(group)
+            for member in group.members:
+                self._group_by_table[member] = group
+                self._partners[member] = tuple(p for p in group.members if p != member)
+        self._groups.sort(key=lambda g: g.id)
+
+    @classmethod
+    def from_dict(cls, merges):
+        return cls(_union_find([table_id] + list(partners) for table_id, partners in merges.items()))
+
+    def to_dict(self):
+        return {table_id: list(partners) for table_id, partners in self._partners.items()}
+
+    def __contains__(self, table_id):
+        return table_id in self._group_by_table
+
+    def __len__(self):
+        return len(self._groups)
+
+    def groups(self):
+        return tuple(self._groups)
+
+    def group_of(self, table_id):
+        return self._group_by_table.get(table_id)
+
+    def group_id(self, table_id):
+        """group_id der Gruppe des Tisches, "" wenn er nicht verbunden ist."""
+        group = self._group_by_table.get(table_id)
+        return group.id if group is not None else ""
+
+    def group_size(self, table_id):
+        """Anzahl Tische der Gruppe (1 für einen nicht verbundenen Tisch)."""
+        group = self._group_by_table.get(table_id)
+        return len(group) if group is not None else 1
+
+    def partners(self, table_id):
+        """Die anderen Tische der Gruppe (sortiert), () wenn der Tisch nicht verbunden ist."""
+        return self._partners.get(table_id, ())
+
+    def merged(self, table_ids):
+        """Neue Sicht, in der table_ids samt ihren bisherigen Gruppen eine Gruppe bilden."""
+        return MergeGroups(_union_find([g.members for g in self._groups] + [list(table_ids)]))
+
+    def unmerged(self, table_ids):
+        """Neue Sicht ohne Verbindungen der table_ids; die übrigen Tische ihrer Gruppen bleiben verbunden."""
+        removed = set(table_ids)
+        return MergeGroups([m for m in g.members if m not in removed] for g in self._groups)
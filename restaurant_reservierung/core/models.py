@@ -1,12 +1,73 @@
+import bisect
+import re
+import sys
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def parse_date_ordinal(date_str):
+    """'YYYY-MM-DD' -> Tages-Ordinalzahl (date.toordinal), None bei ungültigem Datum."""
+    if not isinstance(date_str, str):
+        return None
+    return _parse_date_ordinal_cached(date_str)
+
+
+# Es gibt nur wenige verschiedene Tage/Uhrzeiten; über den Cache teilen sich alle
+# Reservierungen desselben Tages auch dasselbe int-Objekt.
+@lru_cache(maxsize=4096)
+def _parse_date_ordinal_cached(date_str):
+    try:
+        if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+            return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+        return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+def parse_time_minutes(time_str):
+    """'HH:MM' -> Minuten seit Mitternacht, None bei ungültiger Uhrzeit."""
+    if not isinstance(time_str, str):
+        return None
+    return _parse_time_minutes_cached(time_str)
+
+
+@lru_cache(maxsize=2048)
+def _parse_time_minutes_cached(time_str):
+    hours, sep, minutes = time_str.partition(':')
+    try:
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if not sep or not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+# Art einer Ressource (Table.kind): Restauranttisch, Bartisch/Theke oder Hotelzimmer
+KIND_TABLE = "table"
+KIND_BAR = "bar"
+KIND_ROOM = "room"
+
+
 class Table:
-    def __init__(self, table_id, area, capacity, display_name, row=None, number_in_row=None, type=None):
-        self.id = table_id
-        self.area = area
+    __slots__ = ("id", "area", "capacity", "display_name", "row", "number_in_row", "type", "kind",
+                 "status", "reservation_details")
+
+    def __init__(self, table_id, area, capacity, display_name, row=None, number_in_row=None, type=None,
+                 kind=KIND_TABLE):
+        self.id = _intern(table_id)
+        self.kind = kind
+        self.area = _intern(area)
         self.capacity = capacity
         self.display_name = display_name
         self.row = row
         self.number_in_row = number_in_row
-        self.type = type
+        self.type = _intern(type)
         self.status = "frei"
         self.reservation_details = None
 
@@ -14,68 +75,229 @@ class Table:
         type_str = f", Type: {self.type}" if self.type else ""
         return f"<Table '{self.display_name}' (ID: {self.id}, Area: {self.area}{type_str})>"
 
-ALL_TABLES = []
-
-for i in range(1, 10):
-    table_id = f"saal-{i}"
-    display_name = f"Saal {i}"
-    ALL_TABLES.append(Table(table_id=table_id, area="Saal", capacity=4, display_name=display_name))
-
-for i in range(1, 8):
-    table_id = f"stube-{i}"
-    display_name = f"Stube {i}"
-    ALL_TABLES.append(Table(table_id=table_id, area="Stube", capacity=6, display_name=display_name))
-
-for r_num in range(1, 4):
-    for t_num_in_row in range(1, 8):
-        table_id = f"garten-r{r_num}-t{t_num_in_row}"
-        display_name = f"Garten {r_num}-{t_num_in_row}"
-        ALL_TABLES.append(Table(
-            table_id=table_id,
-            area="Garten",
-            capacity=2,
-            display_name=display_name,
-            row=r_num,
-            number_in_row=t_num_in_row
-        ))
-
-for i in range(1, 4):
-    table_id = f"bar-theke-{i}"
-    display_name = f"Bar {i}"
-    ALL_TABLES.append(Table(
-        table_id=table_id,
-        area="Bar",
-        capacity=1,
-        display_name=display_name,
-        type="Theke"
-    ))
-
-for i in range(1, 6):
-    table_id = f"bar-rtisch-{i}"
-    display_name = f"R {i}"
-    ALL_TABLES.append(Table(
-        table_id=table_id,
-        area="Bar",
-        capacity=2,
-        display_name=display_name,
-        type="Regulär"
-    ))
-
-# --- ZIMMER UPDATED ---
-ALL_ROOMS = []
-
-# 1. Stock: 8, 9, 10, 17, 18, 19, 20
-floor1_numbers = [8, 9, 10, 17, 18, 19, 20]
-for num in floor1_numbers:
-    ALL_ROOMS.append(Table(f"zimmer-{num}", "1. Stock", 2, f"Zimmer {num}", type="Doppelzimmer"))
-
-# 2. Stock: 23, 24, 25, 26, 27
-floor2_numbers = [23, 24, 25, 26, 27]
-for num in floor2_numbers:
-    ALL_ROOMS.append(Table(f"zimmer-{num}", "2. Stock", 2, f"Zimmer {num}", type="Doppelzimmer"))
-
-# Hilfsliste für alle Ressourcen (Tische + Zimmer) für die Suche
-ALL_RESOURCES = ALL_TABLES + ALL_ROOMS
+class AreaLayout:
+    """
+    Ein Bereich des Grundrisses (z.B. "Garten" oder "1. Stock") in Konfigurationsreihenfolge.
+    IDs, Kapazitäten und Reihen liegen zusätzlich als kompakte, schreibgeschützte Arrays vor
+    (gleiche Position = gleicher Tisch), damit Verfügbarkeitsprüfungen ohne Attributzugriffe
+    über einen Bereich laufen können.
+    """
+
+    __slots__ = ("name", "kind", "resources", "ids", "capacities", "rows", "_positions", "_by_row", "_by_type")
+
+    def __init__(self, name, kind, resources):
+        self.name = name
+        self.kind = kind
+        self.resources = tuple(resources)
+        self.ids = tuple(resource.id for resource in self.resources)
+        self.capacities = memoryview(array('H', (resource.capacity for resource in self.resources))).toreadonly()
+        # 0 = Tisch ohne Reihe
+        self.rows = memoryview(array('H', (resource.row or 0 for resource in self.resources))).toreadonly()
+        self._positions = {resource_id: pos for pos, resource_id in enumerate(self.ids)}
+        by_row = {}
+        for resource in self.resources:
+            if resource.row:
+                by_row.setdefault(resource.row, []).append(resource)
+        self._by_row = {row: tuple(sorted(resources, key=lambda r: r.number_in_row or 0))
+                        for row, resources in sorted(by_row.items())}
+        # Untergruppen nach type (z.B. Theke / Regulär) in der Reihenfolge des ersten Auftretens
+        by_type = {}
+        for resource in self.resources:
+            by_type.setdefault(resource.type, []).append(resource)
+        self._by_type = tuple((resource_type, tuple(resources)) for resource_type, resources in by_type.items())
+
+    def __len__(self):
+        return len(self.resources)
+
+    def __repr__(self):
+        return f"<AreaLayout '{self.name}' ({len(self.resources)} Ressourcen)>"
+
+    def position(self, resource_id):
+        """Index in ids/capacities/rows, -1 wenn die Ressource nicht in diesem Bereich liegt."""
+        return self._positions.get(resource_id, -1)
+
+    @property
+    def has_rows(self):
+        return bool(self._by_row)
+
+    def row_numbers(self):
+        return tuple(self._by_row)
+
+    def in_row(self, row):
+        """Tische einer Reihe, nach number_in_row sortiert."""
+        return self._by_row.get(row, ())
+
+    def type_groups(self):
+        """((type, Ressourcen), ...) in Konfigurationsreihenfolge; ein Eintrag, wenn alle denselben type haben."""
+        return self._by_type
+
+    def ids_for_persons(self, persons):
+        """IDs aller Ressourcen mit Kapazität >= persons (Reihenfolge wie ids)."""
+        ids = self.ids
+        return tuple(ids[pos] for pos, capacity in enumerate(self.capacities) if capacity >= persons)
+
+
+# Verweildauer einer Tischbuchung, wenn weder Reservierung noch Grundriss etwas anderes sagen
+DEFAULT_DWELL_MINUTES = 120
+
+
+class DwellRule:
+    """
+    Standard-Verweildauer nach Personenzahl: by_persons = [(bis_personen, minuten), ...].
+    Größere Gruppen und unbekannte Personenzahl (z.B. 0 bei Schattenbuchungen) bekommen default.
+    """
+
+    __slots__ = ("default", "_max_persons", "_minutes")
+
+    def __init__(self, default=DEFAULT_DWELL_MINUTES, by_persons=()):
+        self.default = _positive_minutes(default)
+        steps = sorted((int(max_persons), _positive_minutes(minutes)) for max_persons, minutes in by_persons)
+        self._max_persons = tuple(max_persons for max_persons, _ in steps)
+        self._minutes = tuple(minutes for _, minutes in steps)
+
+    @classmethod
+    def from_config(cls, config, fallback=None):
+        default = config.get("default", fallback.default if fallback is not None else DEFAULT_DWELL_MINUTES)
+        return cls(default, config.get("by_persons", ()))
+
+    def minutes(self, persons=None):
+        if not persons or persons <= 0:
+            return self.default
+        pos = bisect.bisect_left(self._max_persons, persons)
+        return self._minutes[pos] if pos < len(self._minutes) else self.default
+
+
+def _positive_minutes(value):
+    minutes = int(value)
+    if minutes <= 0:
+        raise ValueError(f"Verweildauer muss positiv sein: {value}")
+    return minutes
+
+
+class ResourceRegistry:
+    """
+    Alle Tische und Zimmer, einmal indexiert: Lookup per ID, Art (kind), Bereich und Kapazität in O(1).
+    Bereiche (AreaLayout) und Vorschläge zum Verbinden (merge_candidates) sind vorberechnet.
+    Wird nach dem Aufbau nicht mehr verändert; ein geänderter Grundriss ergibt eine neue Registry
+    mit höherer version (siehe floor_plan.py).
+    """
+
+    def __init__(self, tables, rooms, merge_candidates=(), version=0, dwell=None, area_dwell=None):
+        self.version = version
+        self._dwell = dwell or DwellRule()
+        self._area_dwell = dict(area_dwell or {})  # Bereich -> DwellRule
+        self.tables = tuple(tables)
+        self.rooms = tuple(rooms)
+        self.resources = self.tables + self.rooms
+        self.table_ids = tuple(table.id for table in self.tables)
+        self.room_ids = tuple(room.id for room in self.rooms)
+        self._by_id = {}
+        for resource in self.resources:
+            if resource.id in self._by_id:
+                raise ValueError(f"Ressource '{resource.id}' ist mehrfach definiert")
+            self._by_id[resource.id] = resource
+        by_area = {}
+        by_capacity = {}
+        for resource in self.resources:
+            by_area.setdefault(resource.area, []).append(resource)
+            by_capacity.setdefault(resource.capacity, []).append(resource)
+        self._areas = {area: AreaLayout(area, resources[0].kind, resources) for area, resources in by_area.items()}
+        self._by_capacity = {capacity: tuple(resources) for capacity, resources in by_capacity.items()}
+        candidates = {}
+        for group in merge_candidates:
+            for resource_id in group:
+                if resource_id not in self._by_id:
+                    raise ValueError(f"Unbekannte Ressource '{resource_id}' in merge_candidates")
+                candidates.setdefault(resource_id, set()).update(other for other in group if other != resource_id)
+        self._merge_candidates = {resource_id: tuple(sorted(others)) for resource_id, others in candidates.items()}
+
+    @classmethod
+    def from_config(cls, config, version=0):
+        """
+        Registry aus einem Grundriss im Format von data/floor_plan.json:
+        {"areas": [{"name", "kind", "dwell_minutes", "resources": [{"id", "display_name", "capacity", ...}]}],
+         "merge_candidates": [[id, id, ...], ...],
+         "dwell_minutes": {"default": minuten, "by_persons": [[bis_personen, minuten], ...]}}.
+        Wirft ValueError/KeyError/TypeError bei Fehlern.
+        """
+        tables, rooms = [], []
+        dwell = DwellRule.from_config(config.get("dwell_minutes", {}))
+        area_dwell = {}
+        for area in config["areas"]:
+            area_name = area["name"]
+            if "dwell_minutes" in area:
+                area_dwell[area_name] = DwellRule.from_config(area["dwell_minutes"], fallback=dwell)
+            kind = area.get("kind", KIND_TABLE)
+            if kind not in (KIND_TABLE, KIND_BAR, KIND_ROOM):
+                raise ValueError(f"Unbekannte Art '{kind}' im Bereich '{area_name}'")
+            for entry in area["resources"]:
+                resource = Table(
+                    table_id=entry["id"],
+                    area=area_name,
+                    capacity=int(entry["capacity"]),
+                    display_name=entry.get("display_name", entry["id"]),
+                    row=entry.get("row"),
+                    number_in_row=entry.get("number_in_row"),
+                    type=entry.get("type"),
+                    kind=kind
+                )
+                (rooms if kind == KIND_ROOM else tables).append(resource)
+        if not tables:
+            raise ValueError("Grundriss enthält keine Tische")
+        return cls(tables, rooms, config.get("merge_candidates", ()), version=version,
+                   dwell=dwell, area_dwell=area_dwell)
+
+    def __contains__(self, resource_id):
+        return resource_id in self._by_id
+
+    def get(self, resource_id):
+        return self._by_id.get(resource_id)
+
+    def display_name(self, resource_id):
+        """Anzeigename, für unbekannte IDs die ID selbst."""
+        resource = self._by_id.get(resource_id)
+        return resource.display_name if resource is not None else resource_id
+
+    def kind(self, resource_id):
+        resource = self._by_id.get(resource_id)
+        if resource is not None:
+            return resource.kind
+        # Unbekannte IDs (z.B. alte Daten): wie bisher am Namen erkennen
+        return KIND_ROOM if resource_id and "zimmer" in resource_id.lower() else KIND_TABLE
+
+    def is_room(self, resource_id):
+        return self.kind(resource_id) == KIND_ROOM
+
+    def areas(self):
+        return tuple(self._areas)
+
+    def table_areas(self):
+        """Namen der Bereiche mit Tischen (ohne Zimmer) in Konfigurationsreihenfolge."""
+        return tuple(name for name, layout in self._areas.items() if layout.kind != KIND_ROOM)
+
+    def room_areas(self):
+        """Namen der Bereiche mit Zimmern in Konfigurationsreihenfolge."""
+        return tuple(name for name, layout in self._areas.items() if layout.kind == KIND_ROOM)
+
+    def area(self, area):
+        return self._areas.get(area)
+
+    def in_area(self, area):
+        layout = self._areas.get(area)
+        return layout.resources if layout is not None else ()
+
+    def with_capacity(self, capacity):
+        return self._by_capacity.get(capacity, ())
+
+    def dwell_minutes(self, resource_id, persons=None):
+        """Standard-Verweildauer (Minuten) einer Buchung von persons Personen an resource_id."""
+        resource = self._by_id.get(resource_id)
+        rule = self._area_dwell.get(resource.area) if resource is not None else None
+        return (rule or self._dwell).minutes(persons)
+
+    def merge_candidates(self, resource_id):
+        """Tische, mit denen resource_id laut Grundriss üblicherweise verbunden wird (sortiert)."""
+        return self._merge_candidates.get(resource_id, ())
 
 
 # core/models.py
@@ -85,8 +307,17 @@ class Reservation:
     SHIFT_LUNCH = "mittag"
     SHIFT_DINNER = "abend"
     VALID_SHIFTS = [SHIFT_LUNCH, SHIFT_DINNER]
+    # Alte Schattenbuchungen hatten die Haupt-ID als "[LINKED:<id>] " vor der Info stehen
+    LEGACY_LINK_PATTERN = re.compile(r"^\[LINKED:([^\]]+)\]\s?")
 
-    def __init__(self, reservation_id, name, date_str, time_str, persons, table_id, info="", arrived=False, departed=False, shift=SHIFT_DINNER, end_date_str=None):
+    # Kompakte Darstellung ohne __dict__. Datum und Uhrzeit werden beim Setzen einmal geparst
+    # (date_ordinal, end_date_ordinal, time_minutes), damit Sortierungen und Überlappungsprüfungen
+    # nicht in jeder Schleife strptime aufrufen müssen.
+    __slots__ = ("id", "name", "_date", "_end_date", "_time", "persons", "_table_id", "info",
+                 "arrived", "departed", "_shift", "parent_id", "version", "duration",
+                 "date_ordinal", "end_date_ordinal", "time_minutes")
+
+    def __init__(self, reservation_id, name, date_str, time_str, persons, table_id, info="", arrived=False, departed=False, shift=SHIFT_DINNER, end_date_str=None, parent_id=None, version=1, duration=None):
         self.id = reservation_id
         self.name = name
         self.date = date_str # Bei Zimmern: Anreise
@@ -99,9 +330,23 @@ class Reservation:
         self.arrived = arrived
         self.departed = departed
         self.shift = shift
+        self.parent_id = parent_id # Schattenbuchung auf verbundenem Tisch: ID der Hauptbuchung
+        self.version = version # Wird bei jeder gespeicherten Änderung erhöht (Konflikterkennung)
+        # Verweildauer in Minuten (nur Tische), None = Standard aus dem Grundriss (dwell_minutes)
+        try: self.duration = int(duration) if duration else None
+        except (TypeError, ValueError): self.duration = None
+        if self.duration is not None and self.duration <= 0: self.duration = None
 
     @classmethod
     def from_dict(cls, data):
+        info = data.get('info', "")
+        parent_id = data.get('parent_id')
+        if not parent_id and info:
+            # Migration: "[LINKED:<id>]"-Markierung in ein echtes parent_id-Feld umwandeln
+            legacy_link = cls.LEGACY_LINK_PATTERN.match(info)
+            if legacy_link:
+                parent_id = legacy_link.group(1)
+                info = info[legacy_link.end():]
         return cls(
             reservation_id=data.get('id'),
             name=data.get('name'),
@@ -110,17 +355,70 @@ class Reservation:
             time_str=data.get('time'),
             persons=data.get('persons'),
             table_id=data.get('table_id'),
-            info=data.get('info', ""),
+            info=info,
             arrived=data.get('arrived', False),
             departed=data.get('departed', False),
-            shift=data.get('shift', cls.SHIFT_DINNER)
+            shift=data.get('shift', cls.SHIFT_DINNER),
+            parent_id=parent_id,
+            version=data.get('version') or 1,
+            duration=data.get('duration')
         )
 
+    @property
+    def date(self):
+        return self._date
+
+    @date.setter
+    def date(self, value):
+        self._date = _intern(value)
+        self.date_ordinal = parse_date_ordinal(value)
+
+    @property
+    def end_date(self):
+        return self._end_date
+
+    @end_date.setter
+    def end_date(self, value):
+        self._end_date = _intern(value)
+        self.end_date_ordinal = parse_date_ordinal(value)
+
+    @property
+    def time(self):
+        return self._time
+
+    @time.setter
+    def time(self, value):
+        self._time = _intern(value)
+        self.time_minutes = parse_time_minutes(value)
+
+    @property
+    def table_id(self):
+        return self._table_id
+
+    @table_id.setter
+    def table_id(self, value):
+        self._table_id = _intern(value)
+
+    @property
+    def shift(self):
+        return self._shift
+
+    @shift.setter
+    def shift(self, value):
+        self._shift = _intern(value)
+
+    def copy(self):
+        clone = Reservation.__new__(Reservation)
+        for slot in Reservation.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        return clone
+
     def to_dict(self):
         return {
             "id": self.id, "name": self.name,
             "date": self.date, "end_date": self.end_date, # NEU
             "time": self.time,
             "persons": self.persons, "table_id": self.table_id, "info": self.info,
-            "arrived": self.arrived, "departed": self.departed, "shift": self.shift
+            "arrived": self.arrived, "departed": self.departed, "shift": self.shift,
+            "parent_id": self.parent_id, "version": self.version, "duration": self.duration
         }
\ No newline at end of file
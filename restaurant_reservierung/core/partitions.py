@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import logging
+from datetime import date
+
+from . import backups
+from .models import parse_date_ordinal
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARTITION_DIR = os.path.join(BASE_DIR, 'data', 'partitions')
+MANIFEST_NAME = 'manifest.json'
+
+# Reservierungen ohne gültiges Datum landen in einer eigenen Partition, die nur beim
+# vollständigen Laden gelesen wird.
+UNDATED = "ohne-datum"
+
+# Jede Reservierung liegt in der Partition des Monats ihres Datums (reservations_YYYY-MM.json).
+# Zimmeraufenthalte über das Monatsende stehen nur in ihrer Anreise-Partition; das Manifest
+# vermerkt dafür je Partition unter "reaches", in welche späteren Monate sie hineinreicht,
+# damit eine Abfrage für einen dieser Monate die Anreise-Partition mitlädt.
+# Unter "ids" stehen die IDs der Partition: eine Suche nach ID (month_of_id) lädt dann nur den
+# einen Monat statt aller Partitionen.
+# Manifest: {"months": {"YYYY-MM": {"records": n, "hash": sha256, "reaches": [...], "ids": [...]}}}
+
+_lock = threading.Lock()
+_manifest_cache = None  # (Pfad, dict)
+_id_months_cache = None  # (Manifest, {id: Monat})
+
+
+def month_of(date_str):
+    if parse_date_ordinal(date_str) is None:
+        return UNDATED
+    return date_str[:7]
+
+
+def _month_key(day):
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_range(month):
+    """Erster Tag des Monats und erster Tag des Folgemonats als ISO-Datum, z.B. ("2024-12-01", "2025-01-01")."""
+    year, mon = int(month[:4]), int(month[5:7])
+    return date(year, mon, 1).isoformat(), date(year + (mon == 12), mon % 12 + 1, 1).isoformat()
+
+
+def months_between(start_ordinal, end_ordinal):
+    """Alle Monate, die der Zeitraum [start, end) berührt (mindestens der Monat von start)."""
+    day = date.fromordinal(start_ordinal)
+    last = date.fromordinal(max(start_ordinal, end_ordinal - 1))
+    months = []
+    while (day.year, day.month) <= (last.year, last.month):
+        months.append(_month_key(day))
+        day = date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+    return months
+
+
+def reached_months(r_data_list, month):
+    """Spätere Monate, in die Zimmeraufenthalte dieser Partition hineinreichen."""
+    reaches = set()
+    for r_data in r_data_list:
+        start = parse_date_ordinal(r_data.get('date'))
+        end = parse_date_ordinal(r_data.get('end_date'))
+        if start is None or end is None or end - 1 <= start:
+            continue
+        reaches.update(m for m in months_between(start, end) if m != month)
+    return sorted(reaches)
+
+
+def partition_path(month):
+    return os.path.join(PARTITION_DIR, f"reservations_{month}.json")
+
+
+def _manifest_path():
+    return os.path.join(PARTITION_DIR, MANIFEST_NAME)
+
+
+def _atomic_write(path, data_bytes):
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='part_temp_', suffix='.json')
+    try:
+        with os.fdopen(temp_fd, 'wb') as tmp:
+            tmp.write(data_bytes)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def exists():
+    return os.path.exists(_manifest_path())
+
+
+def load_manifest():
+    global _manifest_cache
+    path = _manifest_path()
+    if _manifest_cache is not None and _manifest_cache[0] == path:
+        return _manifest_cache[1]
+    manifest = {"months": {}}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Partitions-Manifest {path} nicht lesbar: {e}. Baue es aus den Partitionsdateien neu auf.")
+            manifest = _rebuild_manifest()
+    missing_ids = [month for month, info in manifest["months"].items() if "ids" not in info]
+    if missing_ids:
+        # Manifest aus einer Version ohne ID-Listen: einmalig aus den Partitionen ergänzen
+        logger.info(f"Ergänze ID-Listen im Partitions-Manifest für {len(missing_ids)} Monate.")
+        for month in missing_ids:
+            manifest["months"][month]["ids"] = [r_data.get('id') for r_data in read_partition(month)]
+        _save_manifest(manifest)
+    _manifest_cache = (path, manifest)
+    return manifest
+
+
+def forget_manifest():
+    """Verwirft das Manifest im Speicher (ein anderer Prozess hat Partitionen geschrieben)."""
+    global _manifest_cache
+    _manifest_cache = None
+
+
+def _rebuild_manifest():
+    months = {}
+    for file_name in os.listdir(PARTITION_DIR):
+        if file_name.startswith('reservations_') and file_name.endswith('.json'):
+            month = file_name[len('reservations_'):-len('.json')]
+            data = read_partition(month)
+            months[month] = {"records": len(data), "hash": None, "reaches": reached_months(data, month),
+                             "ids": [r_data.get('id') for r_data in data]}
+    return {"months": months}
+
+
+def _save_manifest(manifest):
+    global _manifest_cache
+    _atomic_write(_manifest_path(), json.dumps(manifest, indent=1).encode('utf-8'))
+    _manifest_cache = (_manifest_path(), manifest)
+
+
+def all_months():
+    return set(load_manifest()["months"])
+
+
+def months_to_load(months):
+    """Die Partitionen, die für die Monate gelesen werden müssen (inkl. hineinreichender Aufenthalte)."""
+    known = load_manifest()["months"]
+    wanted = set(months)
+    for month, info in known.items():
+        if wanted.intersection(info.get("reaches", ())):
+            wanted.add(month)
+    return {month for month in wanted if month in known}
+
+
+def month_of_id(reservation_id):
+    """Monat der Partition, in der die Reservierung gespeichert ist, oder None, wenn in keiner."""
+    global _id_months_cache
+    manifest = load_manifest()
+    cached = _id_months_cache
+    if cached is None or cached[0] is not manifest:
+        # Nur nach einem Schreiben neu aufbauen (jedes Schreiben ersetzt das Manifest-dict)
+        id_months = {rid: month for month, info in manifest["months"].items() for rid in info.get("ids", ())}
+        cached = _id_months_cache = (manifest, id_months)
+    return cached[1].get(reservation_id)
+
+
+def read_partition(month):
+    """Datensätze einer Partition. Bei defekter Datei wird der neueste intakte Backup-Snapshot verwendet."""
+    path = partition_path(month)
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Partition {path} ist nicht lesbar: {e}.")
+    entry, content, skipped = backups.find_latest_intact_snapshot(series=f"partition-{month}")
+    if entry is None:
+        logger.critical(f"KRITISCH: Kein gültiges Backup für Partition {month}! Partition wird als leer behandelt.")
+        return []
+    logger.warning(f"Stelle Partition {month} aus Backup vom {entry.get('ts')} wieder her "
+                   f"({entry.get('records')} Reservierungen, {len(skipped)} beschädigte Snapshots übersprungen).")
+    os.replace(path, path + ".corrupt")
+    _atomic_write(path, content)
+    return json.loads(content.decode('utf-8'))
+
+
+def write_partitions(partition_data, fsync=False):
+    """
+    Schreibt die übergebenen Partitionen {Monat: [r_data, ...]} (jede atomar per os.replace)
+    und danach das Manifest. Leere Partitionen werden entfernt, unveränderte nicht neu geschrieben.
+    """
+    with _lock:
+        if not os.path.exists(PARTITION_DIR):
+            os.makedirs(PARTITION_DIR)
+        manifest = load_manifest()
+        months_info = dict(manifest["months"])
+        written = []
+        # Partitionen mit Datensätzen zuerst: bei einem Absturz mitten im Verschieben ist ein
+        # Datensatz eher doppelt als gar nicht vorhanden
+        for month in sorted(partition_data, key=lambda m: not partition_data[m]):
+            records = partition_data[month]
+            path = partition_path(month)
+            if not records:
+                if month in months_info:
+                    del months_info[month]
+                    if os.path.exists(path):
+                        os.remove(path)
+                    written.append(month)
+                continue
+            content = json.dumps(records, indent=4).encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()
+            if months_info.get(month, {}).get("hash") == digest and os.path.exists(path):
+                continue
+            temp_fd, temp_path = tempfile.mkstemp(dir=PARTITION_DIR, prefix='part_temp_', suffix='.json')
+            try:
+                with os.fdopen(temp_fd, 'wb') as tmp:
+                    tmp.write(content)
+                    if fsync:
+                        tmp.flush()
+                        os.fsync(tmp.fileno())
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            months_info[month] = {"records": len(records), "hash": digest, "reaches": reached_months(records, month),
+                                  "ids": [r_data.get('id') for r_data in records]}
+            written.append(month)
+            try:
+                backups.store_snapshot(content, record_count=len(records), series=f"partition-{month}")
+            except Exception as e:
+                logger.error(f"Fehler beim Erstellen des Backups von Partition {month}: {e}")
+        if written or not exists():
+            _save_manifest({"months": months_info})
+        return written
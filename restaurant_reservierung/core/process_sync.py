@@ -0,0 +1,81 @@
+import os
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine flock-Sperren, nur die Sperre innerhalb des Prozesses
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCK_FILE = os.path.join(BASE_DIR, 'data', 'reservations.lock')
+VERSION_FILE = os.path.join(BASE_DIR, 'data', 'reservations.version')
+
+# Koordination mehrerer Server-Prozesse auf denselben Datendateien:
+# - exclusive_lock(): flock auf LOCK_FILE um jeden Commit (und um das Laden, damit niemand ein halb
+#   geschriebenes Journal liest). Im selben Prozess wiedereintrittsfähig; Threads des Prozesses teilen
+#   sich die Sperre nacheinander, sie soll daher nur kurz gehalten werden.
+# - VERSION_FILE enthält einen Zähler, den jeder schreibende Prozess erhöht. Die Datei wird per
+#   os.replace ersetzt, daher genügt ein os.stat (read_stamp), um fremde Schreibvorgänge zu erkennen.
+
+_thread_lock = threading.RLock()
+_depth = 0
+_lock_handle = None
+_warned_no_fcntl = False
+
+
+@contextmanager
+def exclusive_lock():
+    global _depth, _lock_handle, _warned_no_fcntl
+    with _thread_lock:
+        if _depth == 0:
+            lock_dir = os.path.dirname(LOCK_FILE)
+            if not os.path.exists(lock_dir):
+                os.makedirs(lock_dir)
+            _lock_handle = open(LOCK_FILE, 'a+')
+            if fcntl is not None:
+                fcntl.flock(_lock_handle.fileno(), fcntl.LOCK_EX)
+            elif not _warned_no_fcntl:
+                logger.warning("fcntl nicht verfügbar: Sperren gelten nur innerhalb dieses Prozesses.")
+                _warned_no_fcntl = True
+        _depth += 1
+        try:
+            yield
+        finally:
+            _depth -= 1
+            if _depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(_lock_handle.fileno(), fcntl.LOCK_UN)
+                _lock_handle.close()
+                _lock_handle = None
+
+
+def read_stamp():
+    """Billige Kennung des aktuellen Datenstands (ein os.stat), None wenn noch nie geschrieben wurde."""
+    try:
+        st = os.stat(VERSION_FILE)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def read_version():
+    try:
+        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_version():
+    """Erhöht den Zähler nach einem Schreibvorgang. Aufrufer hält exclusive_lock()."""
+    version = read_version() + 1
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(VERSION_FILE), prefix='version_temp_')
+    with os.fdopen(temp_fd, 'w', encoding='utf-8') as tmp:
+        tmp.write(str(version))
+    os.replace(temp_path, VERSION_FILE)
+    return version
@@ -0,0 +1,293 @@
+from .intervals import IntervalIndex
+from . import floor_plan
+from .partitions import month_of, months_between
+
+# Reservierungen und alle Indizes werden über den Schlüssel (bei Reservierungen die ID) auf so viele
+# Teil-dicts verteilt. Eine Änderung kopiert nur die Teil-dicts der berührten Schlüssel und deren
+# Buckets, nicht die ganze Tabelle.
+SHARD_COUNT = 64
+
+
+def _empty_shards():
+    return tuple({} for _ in range(SHARD_COUNT))
+
+
+def _lookup(shards, key, default=None):
+    return shards[hash(key) % SHARD_COUNT].get(key, default)
+
+
+def _stay_bounds(r):
+    """Aufenthalt als (Anreise, Abreise) in Tages-Ordinalzahlen oder None bei ungültigem Datum."""
+    start = r.date_ordinal
+    end = r.end_date_ordinal if r.end_date else start
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def _table_booking_bounds(r, registry):
+    """Tischbuchung als [Beginn, Ende) in Minuten des Tages oder None bei ungültiger Uhrzeit."""
+    start = r.time_minutes
+    if start is None or r.date_ordinal is None:
+        return None
+    return start, start + (r.duration or registry.dwell_minutes(r.table_id, r.persons))
+
+
+class _CowShards:
+    """Copy-on-write über SHARD_COUNT Teil-dicts: jedes Teil-dict wird erst beim ersten Schreiben kopiert."""
+
+    def __init__(self, shards):
+        self._shards = list(shards)
+        self._copied = set()
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) % SHARD_COUNT].get(key, default)
+
+    def writable(self, key):
+        pos = hash(key) % SHARD_COUNT
+        if pos not in self._copied:
+            self._shards[pos] = dict(self._shards[pos])
+            self._copied.add(pos)
+        return self._shards[pos]
+
+    def result(self):
+        return tuple(self._shards)
+
+
+class _CowIndex:
+    """
+    Copy-on-write eines Index {Schlüssel: Tupel von Reservierungen}: nur die berührten Buckets
+    werden (einmal, als dict) kopiert, alle anderen Tupel und Teil-dicts teilt sich der neue Index
+    mit dem alten.
+    """
+
+    def __init__(self, shards):
+        self._shards = _CowShards(shards)
+        self._touched = {}
+
+    def _bucket(self, key):
+        bucket = self._touched.get(key)
+        if bucket is None:
+            bucket = self._touched[key] = {r.id: r for r in self._shards.get(key, ())}
+        return bucket
+
+    def add(self, key, r):
+        self._bucket(key)[r.id] = r
+
+    def remove(self, key, rid):
+        self._bucket(key).pop(rid, None)
+
+    def result(self):
+        for key, bucket in self._touched.items():
+            shard = self._shards.writable(key)
+            if bucket:
+                shard[key] = tuple(bucket.values())
+            else:
+                shard.pop(key, None)
+        return self._shards.result()
+
+
+class _CowIntervals:
+    """Wie _CowIndex, aber mit einem IntervalIndex je Schlüssel; leere Indizes werden entfernt."""
+
+    def __init__(self, shards):
+        self._shards = _CowShards(shards)
+        self._touched = {}
+
+    def _index(self, key):
+        index = self._touched.get(key)
+        if index is None:
+            old = self._shards.get(key)
+            index = self._touched[key] = old.copy() if old is not None else IntervalIndex()
+        return index
+
+    def add(self, key, start, end, rid):
+        self._index(key).add(start, end, rid)
+
+    def remove(self, key, rid):
+        if key in self._touched or self._shards.get(key) is not None:
+            self._index(key).remove(rid)
+
+    def result(self):
+        for key, index in self._touched.items():
+            shard = self._shards.writable(key)
+            if len(index):
+                shard[key] = index
+            else:
+                shard.pop(key, None)
+        return self._shards.result()
+
+
+class ReservationSnapshot:
+    """
+    Unveränderlicher Stand aller geladenen Reservierungen (MVCC).
+    Leser holen sich den aktuellen Snapshot ohne Sperre und ohne Kopie; alles, was sie daraus lesen,
+    ändert sich nie mehr. Schreiber erzeugen mit apply() einen neuen Snapshot mit höherer Version, der
+    alle unveränderten Datensätze, Teil-dicts und Index-Buckets mit dem alten teilt, und
+    veröffentlichen ihn durch eine einzige Zuweisung. Die Buckets sind klein (eine Schicht, ein Tisch
+    an einem Tag, ein Zimmer in einem Monat), eine Änderung kostet daher nicht mehr, je länger die
+    Historie wird. Die Reservation-Objekte selbst werden nach der Veröffentlichung nicht mehr
+    verändert (Transaktionen arbeiten auf Kopien).
+    """
+
+    __slots__ = ("version", "_shards", "_count", "_by_date_shift", "_by_table", "_by_slot",
+                 "_children", "_room_stays", "_longest_stay", "_table_bookings")
+
+    def __init__(self, version=0):
+        self.version = version
+        self._shards = _empty_shards()
+        self._count = 0
+        # Alle Indizes sind wie _shards in SHARD_COUNT Teil-dicts aufgeteilt
+        self._by_date_shift = _empty_shards()  # (date, shift) -> (Reservation, ...)
+        self._by_table = _empty_shards()  # (table_id, date) -> (Reservation, ...)
+        self._by_slot = _empty_shards()  # (table_id, date, shift, time) -> (Reservation, ...)
+        self._children = _empty_shards()  # parent_id -> (Reservation, ...) (Schattenbuchungen auf verbundenen Tischen)
+        # (room_id, Anreisemonat) -> IntervalIndex über [Anreise, Abreise) als Tages-Ordinalzahlen
+        self._room_stays = _empty_shards()
+        self._longest_stay = 0  # Längster je eingetragener Aufenthalt in Tagen (sinkt nie)
+        # (table_id, date) -> IntervalIndex über [Beginn, Beginn + Verweildauer) in Minuten
+        self._table_bookings = _empty_shards()
+
+    @classmethod
+    def build(cls, reservations, version):
+        """Snapshot aus einer vollständigen Liste (bei gleicher ID gewinnt die spätere)."""
+        return cls(version - 1).apply(upserts=reservations)
+
+    def apply(self, upserts=(), deleted_ids=(), version=None):
+        """Neuer Snapshot mit den Änderungen (Version + 1, sofern nicht angegeben), dieser bleibt unverändert."""
+        records = _CowShards(self._shards)
+        count = self._count
+        by_date_shift = _CowIndex(self._by_date_shift)
+        by_table = _CowIndex(self._by_table)
+        by_slot = _CowIndex(self._by_slot)
+        children = _CowIndex(self._children)
+        room_stays = _CowIntervals(self._room_stays)
+        longest_stay = self._longest_stay
+        table_bookings = _CowIntervals(self._table_bookings)
+        registry = floor_plan.current_registry()
+
+        def unindex(old):
+            by_date_shift.remove((old.date, old.shift), old.id)
+            by_table.remove((old.table_id, old.date), old.id)
+            by_slot.remove((old.table_id, old.date, old.shift, old.time), old.id)
+            if old.parent_id:
+                children.remove(old.parent_id, old.id)
+            room_stays.remove((old.table_id, month_of(old.date)), old.id)
+            table_bookings.remove((old.table_id, old.date), old.id)
+
+        for rid in deleted_ids:
+            old = records.writable(rid).pop(rid, None)
+            if old is not None:
+                count -= 1
+                unindex(old)
+        for r in upserts:
+            shard = records.writable(r.id)
+            old = shard.get(r.id)
+            if old is not None:
+                unindex(old)
+            else:
+                count += 1
+            shard[r.id] = r
+            by_date_shift.add((r.date, r.shift), r)
+            by_table.add((r.table_id, r.date), r)
+            by_slot.add((r.table_id, r.date, r.shift, r.time), r)
+            if r.parent_id:
+                children.add(r.parent_id, r)
+            if registry.is_room(r.table_id):
+                # Datum wurde beim Laden einmal geparst (date_ordinal), nicht bei jeder Verfügbarkeitsprüfung
+                bounds = _stay_bounds(r)
+                if bounds is not None:
+                    room_stays.add((r.table_id, month_of(r.date)), bounds[0], bounds[1], r.id)
+                    longest_stay = max(longest_stay, bounds[1] - bounds[0])
+            else:
+                bounds = _table_booking_bounds(r, registry)
+                if bounds is not None:
+                    table_bookings.add((r.table_id, r.date), bounds[0], bounds[1], r.id)
+
+        new = ReservationSnapshot.__new__(ReservationSnapshot)
+        new.version = self.version + 1 if version is None else version
+        new._shards = records.result()
+        new._count = count
+        new._by_date_shift = by_date_shift.result()
+        new._by_table = by_table.result()
+        new._by_slot = by_slot.result()
+        new._children = children.result()
+        new._room_stays = room_stays.result()
+        new._longest_stay = longest_stay
+        new._table_bookings = table_bookings.result()
+        return new
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from shard.values()
+
+    def __contains__(self, rid):
+        return rid in self._shards[hash(rid) % SHARD_COUNT]
+
+    def get(self, rid):
+        return _lookup(self._shards, rid)
+
+    def for_date_shift(self, date_str, shift):
+        return _lookup(self._by_date_shift, (date_str, shift), ())
+
+    def for_month(self, month):
+        """Alle Reservierungen eines Monats; geht die Schlüssel (Datum, Schicht) durch, O(Tage + Treffer)."""
+        return tuple(r for shard in self._by_date_shift for (date_str, shift), bucket in shard.items()
+                     if month_of(date_str) == month for r in bucket)
+
+    def from_date(self, date_str):
+        """Alle Reservierungen mit Datum >= date_str; geht die Schlüssel (Datum, Schicht) durch, O(Tage + Treffer)."""
+        return tuple(r for shard in self._by_date_shift for (key_date, shift), bucket in shard.items()
+                     if key_date >= date_str for r in bucket)
+
+    def for_table(self, table_id):
+        """Alle Reservierungen eines Tisches; geht die Schlüssel (Tisch, Datum) durch, O(Schlüssel + Treffer)."""
+        return tuple(r for shard in self._by_table for (key_table, date_str), bucket in shard.items()
+                     if key_table == table_id for r in bucket)
+
+    def at_slot(self, table_id, date_str, shift, time_str):
+        return _lookup(self._by_slot, (table_id, date_str, shift, time_str), ())
+
+    def children_of(self, parent_id):
+        return _lookup(self._children, parent_id, ())
+
+    def _stay_months(self, start, end):
+        """Anreisemonate, in denen ein Aufenthalt liegen kann, der [start, end) berührt."""
+        return months_between(max(start - self._longest_stay, 1), end)
+
+    def room_has_overlap(self, room_id, start, end, ignore_key=None):
+        """Überschneidet ein Aufenthalt des Zimmers [start, end) (Tages-Ordinalzahlen)?"""
+        for month in self._stay_months(start, end):
+            stays = _lookup(self._room_stays, (room_id, month))
+            if stays is not None and stays.has_overlap(start, end, ignore_key):
+                return True
+        return False
+
+    def room_stays_on(self, day):
+        """IDs aller Aufenthalte mit Anreise <= day < Abreise und der Tageszimmer mit Anreise = Abreise = day."""
+        months = set(self._stay_months(day, day + 1))
+        for shard in self._room_stays:
+            for (room_id, month), stays in shard.items():
+                if month not in months:
+                    continue
+                for start, end, rid in stays.overlapping(day, day + 1):
+                    yield rid
+                for start, end, rid in stays.starting_at(day):
+                    if end == start:
+                        yield rid
+
+    def room_stays_reaching(self, day):
+        """IDs aller Aufenthalte mit Anreise < day <= Abreise (vorher angereist, frühestens an day abgereist)."""
+        months = set(self._stay_months(day - 1, day))
+        for shard in self._room_stays:
+            for (room_id, month), stays in shard.items():
+                if month in months:
+                    for start, end, rid in stays.overlapping(day - 1, day):
+                        yield rid
+
+    def table_bookings(self, table_id, date_str):
+        """IntervalIndex der Buchungen eines Tisches an einem Tag (nur lesen!) oder None."""
+        return _lookup(self._table_bookings, (table_id, date_str))
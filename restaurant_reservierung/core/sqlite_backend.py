@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'data', 'reservations.sqlite3')
+
+# Die indizierten Felder liegen als eigene Spalten vor, der vollständige Datensatz
+# (Reservation.to_dict) steht zusätzlich als JSON in 'data'. So müssen neue Felder
+# am Modell kein Schema-Update nach sich ziehen.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    time TEXT,
+    shift TEXT,
+    table_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservations_date_shift ON reservations(date, shift);
+CREATE INDEX IF NOT EXISTS idx_reservations_table ON reservations(table_id);
+CREATE INDEX IF NOT EXISTS idx_reservations_room_range ON reservations(table_id, date, end_date);
+CREATE INDEX IF NOT EXISTS idx_reservations_end_date ON reservations(end_date);
+
+CREATE TABLE IF NOT EXISTS table_merges (
+    table_id TEXT PRIMARY KEY,
+    partners TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+def get_connection():
+    """Eine Verbindung pro Thread (waitress arbeitet mit mehreren Threads)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and getattr(_local, 'path', None) == DB_FILE:
+        return conn
+    db_dir = os.path.dirname(DB_FILE)
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+    conn = sqlite3.connect(DB_FILE, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _local.conn = conn
+    _local.path = DB_FILE
+    return conn
+
+
+def _row_values(r_data):
+    date_str = r_data.get('date') or ""
+    return (
+        r_data.get('id'),
+        date_str,
+        r_data.get('end_date') or date_str,
+        r_data.get('time'),
+        r_data.get('shift'),
+        r_data.get('table_id'),
+        json.dumps(r_data, ensure_ascii=False, separators=(',', ':')),
+    )
+
+
+def load_all():
+    conn = get_connection()
+    rows = conn.execute("SELECT data FROM reservations ORDER BY rowid").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def load_range(start_str, end_str):
+    """
+    Alle Reservierungen mit Datum in [start_str, end_str) und alle früher beginnenden, die über
+    start_str hinausreichen (Zimmeraufenthalte). Beide Teile laufen über einen Index (date bzw. end_date).
+    """
+    rows = get_connection().execute(
+        "SELECT data FROM reservations WHERE date >= ? AND date < ? "
+        "UNION ALL SELECT data FROM reservations WHERE end_date > ? AND date < ?",
+        (start_str, end_str, start_str, start_str)
+    ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def load_undated():
+    """Reservierungen ohne Datum im Format YYYY-MM-DD (landen in keinem Monat)."""
+    rows = get_connection().execute(
+        "SELECT data FROM reservations WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+    ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def stored_dates():
+    """Alle vorkommenden Datumswerte (nur aus dem Index gelesen)."""
+    return [row[0] for row in get_connection().execute("SELECT DISTINCT date FROM reservations")]
+
+
+def get_by_id(reservation_id):
+    row = get_connection().execute("SELECT data FROM reservations WHERE id = ?", (reservation_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def apply_changes(upserts=(), deleted_ids=()):
+    """Schreibt alle Änderungen in einer einzigen Transaktion."""
+    conn = get_connection()
+    with conn:
+        if upserts:
+            conn.executemany(
+                "INSERT INTO reservations (id, date, end_date, time, shift, table_id, data) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET date=excluded.date, end_date=excluded.end_date, time=excluded.time, "
+                "shift=excluded.shift, table_id=excluded.table_id, data=excluded.data",
+                [_row_values(r_data) for r_data in upserts]
+            )
+        if deleted_ids:
+            conn.executemany("DELETE FROM reservations WHERE id = ?", [(rid,) for rid in deleted_ids])
+
+
+def replace_all(reservations_data):
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM reservations")
+        conn.executemany(
+            "INSERT INTO reservations (id, date, end_date, time, shift, table_id, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_row_values(r_data) for r_data in reservations_data]
+        )
+
+
+def has_room_overlap(room_id, checkin_str, checkout_str, ignore_id=None):
+    # ISO-Datumsstrings (YYYY-MM-DD) lassen sich direkt lexikographisch vergleichen
+    row = get_connection().execute(
+        "SELECT 1 FROM reservations WHERE table_id = ? AND date < ? AND end_date > ? AND id IS NOT ? LIMIT 1",
+        (room_id, checkout_str, checkin_str, ignore_id)
+    ).fetchone()
+    return row is not None
+
+
+def load_merges():
+    rows = get_connection().execute("SELECT table_id, partners FROM table_merges").fetchall()
+    return {table_id: json.loads(partners) for table_id, partners in rows}
+
+
+def save_merges(merges):
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM table_merges")
+        conn.executemany(
+            "INSERT INTO table_merges (table_id, partners) VALUES (?, ?)",
+            [(table_id, json.dumps(partners)) for table_id, partners in merges.items()]
+        )
+
+
+def migrate_from_json(reservations_data, merges):
+    """Einmaliger Import der bisherigen JSON-Daten. Bestehende Einträge werden ersetzt."""
+    replace_all(reservations_data)
+    save_merges(merges)
+    logger.info(f"{len(reservations_data)} Reservierungen und {len(merges)} Tischverbindungen nach {DB_FILE} importiert.")
+    return len(reservations_data), len(merges)
@@ -0,0 +1,10 @@
+import logging
+from core import manager
+from core import sqlite_backend
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(f"INFO: Importiere {manager.DATA_FILE} und {manager.MERGE_FILE} nach {sqlite_backend.DB_FILE} ...")
+    reservation_count, merge_count = manager.migrate_json_to_sqlite()
+    print(f"INFO: {reservation_count} Reservierungen und {merge_count} Tischverbindungen importiert.")
+    print(f"INFO: Zum Aktivieren in core/manager.py STORAGE_BACKEND = \"sqlite\" setzen.")
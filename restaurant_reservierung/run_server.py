@@ -1,10 +1,23 @@
 from waitress import serve
-from app import app
+from app import app, LIVE_MAX_STREAMS
+from core import manager
+
+# Threads für normale Anfragen. Live-Verbindungen (Server-Sent Events, /api/live) belegen je einen
+# Thread für ihre ganze Dauer; dafür kommen LIVE_MAX_STREAMS Threads hinzu. Mehr Live-Verbindungen
+# nimmt die App nicht an (siehe LIVE_MAX_STREAMS in app.py), normale Anfragen bleiben also immer bedienbar.
+REQUEST_THREADS = 4
 
 if __name__ == '__main__':
     host = '127.0.0.1'
     port = 5001
+    recovery = manager.get_last_recovery()
+    if recovery:
+        print(f"WARNUNG: Reservierungen aus Backup wiederhergestellt: {recovery['source']} "
+              f"(Stand {recovery['snapshot_ts']}, {recovery['records']} Reservierungen, "
+              f"{len(recovery['skipped'])} beschädigte Snapshots übersprungen)")
+    # Abgelaufene Reservierungen archivieren: beim Start und danach regelmäßig im Hintergrund
+    manager.start_maintenance()
     print(f"INFO: Starte Restaurant-Reservierungsserver mit Waitress...")
     print(f"INFO: Programm läuft auf http://{host}:{port}")
     print(f"INFO: Programmgenerierung abgeschlossen")
-    serve(app, host=host, port=port, threads=4)
\ No newline at end of file
+    serve(app, host=host, port=port, threads=REQUEST_THREADS + LIVE_MAX_STREAMS)
\ No newline at end of file
@@ -31,6 +31,7 @@ let currentReservationToMoveId = null;
 let pendingMoveDetails = null;
 let currentReservationIdToMarkDeparted = null;
 let currentDepartedButtonElement = null;
+let liveUpdateSource = null;
 
 function handleTableClick(tableElement) {
     if (!tableElement) {
@@ -168,6 +169,8 @@ function closeStatusModal() {
 
 function closeStatusModalAndReload() {
     closeStatusModal();
+    // Mit Live-Updates kommen die Änderungen von selbst, die Seite muss nicht neu geladen werden
+    if (liveUpdateSource) return;
     let targetUrl = '/reservierungen';
     const currentPath = window.location.pathname;
     if (currentPath === '/' && activeFilterDateBeforeDelete && document.getElementById('shiftPicker')) {
@@ -366,6 +369,106 @@ function markReservationAsDeparted(reservationId, buttonElement) {
     });
 }
 
+function elementFromHtml(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+}
+
+function setReservationStatus(reservationId, action) {
+    // action: 'angekommen' (Ankunft umschalten) oder 'gegangen'
+    fetch(`/api/reservierung_${action}/${encodeURIComponent(reservationId)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' }
+    })
+    .then(response => response.json().catch(() => ({})).then(data => {
+        if (!response.ok || !data.success) {
+            throw new Error(data.message || `Serverfehler: ${response.status}`);
+        }
+        return refreshReservationRow(reservationId);
+    }))
+    .catch(error => {
+        alert(`Fehler: ${error.message}`);
+    });
+}
+
+function refreshReservationRow(reservationId) {
+    const row = document.querySelector(`tr[data-row-id="${CSS.escape(reservationId)}"]`);
+    if (!row) return Promise.resolve();
+    return fetch(`/reservierungen/zeile/${encodeURIComponent(reservationId)}`)
+        .then(response => {
+            if (response.status === 404) {
+                row.remove();
+                return null;
+            }
+            if (!response.ok) throw new Error(`Serverfehler: ${response.status}`);
+            return response.text();
+        })
+        .then(html => {
+            if (html) row.replaceWith(elementFromHtml(html));
+        });
+}
+
+function removeReservationRow(reservationId) {
+    const row = document.querySelector(`tr[data-row-id="${CSS.escape(reservationId)}"]`);
+    if (row) row.remove();
+}
+
+function patchTableCard(table) {
+    const card = document.querySelector(`.table-item[data-table-id="${CSS.escape(table.id)}"]`);
+    if (!card) return;
+    const newCard = elementFromHtml(table.card_html);
+    if (card.classList.contains('selected-in-editor')) newCard.classList.add('selected-in-editor');
+    card.replaceWith(newCard);
+}
+
+function patchReservationRows(tables) {
+    // Zeilen der geänderten Tische neu holen; unbekannte Reservierungen nur melden
+    const changedTableIds = new Set(tables.map(table => table.id));
+    const reservationIds = new Set();
+    let hasNewReservations = false;
+    tables.forEach(table => {
+        table.reservations_on_table.forEach(res => {
+            if (res.parent_id) return; // Schattenbuchungen stehen nicht in der Liste
+            reservationIds.add(res.id);
+            if (!document.querySelector(`tr[data-row-id="${CSS.escape(res.id)}"]`)) hasNewReservations = true;
+        });
+    });
+    document.querySelectorAll('tr[data-row-id]').forEach(row => {
+        const rowId = row.getAttribute('data-row-id');
+        if (reservationIds.has(rowId) || changedTableIds.has(row.getAttribute('data-table-id'))) {
+            refreshReservationRow(rowId).catch(error => console.error('Live-Update der Zeile fehlgeschlagen:', error));
+        }
+    });
+    const hint = document.getElementById('liveUpdateHint');
+    if (hint && hasNewReservations) hint.style.display = 'block';
+}
+
+function startLiveUpdates() {
+    // Server-Sent Events (/api/live): geänderte Tische und Zimmer werden an Ort und Stelle aktualisiert
+    const liveElement = document.querySelector('[data-live-url]');
+    if (!liveElement || !window.EventSource) return;
+    liveUpdateSource = new EventSource(liveElement.getAttribute('data-live-url'));
+    liveUpdateSource.addEventListener('tables', function(event) {
+        const data = JSON.parse(event.data);
+        const rooms = data.rooms || [];
+        // Grundriss wurde geändert (Tische/Zimmer hinzugefügt/entfernt): ganze Seite neu laden
+        const layoutVersion = liveElement.getAttribute('data-layout-version');
+        if (layoutVersion !== null && String(data.layout) !== layoutVersion) {
+            window.location.reload();
+            return;
+        }
+        if (liveElement.id === 'floorPlan') {
+            data.tables.forEach(patchTableCard);
+            if (typeof onTableCardsPatched === 'function') onTableCardsPatched();
+        } else if (liveElement.id === 'roomPlan') {
+            rooms.forEach(patchTableCard);
+        } else {
+            patchReservationRows(data.tables.concat(rooms));
+        }
+    });
+}
+
 function showModalStatusMessage(message, isSuccess, redirectUrl = null) {
 
     if (!statusModal || !statusModalContent) {
@@ -428,6 +531,8 @@ document.addEventListener('DOMContentLoaded', function() {
         shiftPickerForIndex.addEventListener('change', reloadIndexPageWithFilters);
     }
 
+    startLiveUpdates();
+
     const dateTimeDisplayElement = document.getElementById('current-datetime-display');
     function updateLiveDateTime() {
         if (dateTimeDisplayElement) {
@@ -0,0 +1,77 @@
+import os
+import shutil
+import sys
+import threading
+from collections import deque
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from core import archive, backups, floor_plan, manager, partitions, process_sync, sqlite_backend  # noqa: E402
+from core.snapshot import ReservationSnapshot  # noqa: E402
+
+DATA_DIR = os.path.join(APP_DIR, 'data')
+
+# Module mit eigenen Pfaden unterhalb von data/
+_PATH_MODULES = (archive, backups, floor_plan, manager, partitions, process_sync, sqlite_backend)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """
+    Jeder Test arbeitet auf einem eigenen, leeren data/-Verzeichnis (nur der Grundriss wird kopiert)
+    und mit frisch zurückgesetztem Zustand des Managers. Die echten Daten werden nie angefasst.
+    """
+    target = tmp_path / 'data'
+    target.mkdir()
+    shutil.copy(os.path.join(DATA_DIR, 'floor_plan.json'), target / 'floor_plan.json')
+    for module in _PATH_MODULES:
+        for name, value in list(vars(module).items()):
+            if name == 'BASE_DIR':
+                monkeypatch.setattr(module, name, str(tmp_path))
+            elif isinstance(value, str) and value.startswith(DATA_DIR):
+                monkeypatch.setattr(module, name, str(target) + value[len(DATA_DIR):])
+
+    monkeypatch.setattr(floor_plan, '_registry', None)
+    monkeypatch.setattr(floor_plan, '_stamp', None)
+    monkeypatch.setattr(floor_plan, '_checked_at', 0.0)
+    monkeypatch.setattr(partitions, '_manifest_cache', None)
+    monkeypatch.setattr(partitions, '_id_months_cache', None)
+    monkeypatch.setattr(backups, '_manifest_cache', None)
+    monkeypatch.setattr(sqlite_backend, '_local', threading.local())
+
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', "json")
+    monkeypatch.setattr(manager, 'USE_JOURNAL', True)
+    monkeypatch.setattr(manager, 'USE_GROUP_COMMIT', False)
+    monkeypatch.setattr(manager, 'MULTI_PROCESS', False)
+    monkeypatch.setattr(manager, '_cached_reservations', None)
+    monkeypatch.setattr(manager, '_reservations_loaded_at_least_once', False)
+    monkeypatch.setattr(manager, '_journal_entry_count', 0)
+    monkeypatch.setattr(manager, '_snapshot', ReservationSnapshot())
+    monkeypatch.setattr(manager, '_group_writer', None)
+    monkeypatch.setattr(manager, '_last_recovery', None)
+    monkeypatch.setattr(manager, '_merge_groups', None)
+    monkeypatch.setattr(manager, '_merge_groups_stamp', None)
+    monkeypatch.setattr(manager, '_seen_stamp', None)
+    monkeypatch.setattr(manager, '_table_versions', {})
+    monkeypatch.setattr(manager, '_table_versions_base', 0)
+    monkeypatch.setattr(manager, '_change_log', deque(maxlen=manager.CHANGE_LOG_SIZE))
+    monkeypatch.setattr(manager, '_loaded_partitions', set())
+    monkeypatch.setattr(manager, '_all_partitions_loaded', False)
+    monkeypatch.setattr(manager, '_dirty_partitions', set())
+    monkeypatch.setattr(manager, '_own_versions', set())
+    return target
+
+
+@pytest.fixture
+def client():
+    """Angemeldeter Test-Client der Flask-App."""
+    import app as app_module
+    # Gerenderte Tischkarten hängen an Versionen, die in jedem Test wieder bei 0 beginnen
+    app_module.TABLE_CARD_CACHE.clear()
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as session:
+        session['logged_in'] = True
+    return test_client
@@ -0,0 +1,61 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from core import archive, manager
+
+
+def _days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+@pytest.fixture(params=["json", "json_monthly"])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', request.param)
+    manager.load_reservations()
+    return request.param
+
+
+def test_cleanup_moves_aged_out_reservations_to_archive(backend):
+    old = manager.create_reservation("Alt", _days_ago(30), "19:00", 2, "saal-1", "", "abend")
+    recent = manager.create_reservation("Neu", _days_ago(2), "19:00", 2, "saal-1", "", "abend")
+    # Zimmer zählen ab der Abreise: Anreise lange her, Abreise noch nicht alt genug
+    stay = manager.create_reservation("Gast", _days_ago(20), "14:00", 2, "zimmer-8", "", "abend",
+                                      end_date=_days_ago(2))
+
+    assert manager.cleanup_old_reservations() == 1
+    assert manager.get_reservation_by_id(old.id) is None
+    assert manager.get_reservation_by_id(recent.id) is not None
+    assert manager.get_reservation_by_id(stay.id) is not None
+
+    archived = list(manager.get_archived_reservations(name="alt"))
+    assert [r.id for r in archived] == [old.id]
+    assert archive.load_index()[_days_ago(30)[:4]]["records"] == 1
+    # Ein zweiter Lauf findet nichts mehr
+    assert manager.cleanup_old_reservations() == 0
+
+
+def test_archive_query_filters(backend):
+    first = manager.create_reservation("Müller", _days_ago(40), "19:00", 2, "saal-1", "", "abend")
+    second = manager.create_reservation("Schmidt", _days_ago(30), "19:00", 2, "saal-2", "", "abend")
+    assert manager.cleanup_old_reservations() == 2
+
+    assert [r.id for r in manager.get_archived_reservations(date_from=_days_ago(35))] == [second.id]
+    assert [r.id for r in manager.get_archived_reservations(date_to=_days_ago(35))] == [first.id]
+    assert [r.id for r in manager.get_archived_reservations(table_id="saal-1")] == [first.id]
+    assert [r.id for r in manager.get_archived_reservations(name="MÜLL")] == [first.id]
+
+
+def test_maintenance_thread_archives_in_background():
+    old = manager.create_reservation("Alt", _days_ago(30), "19:00", 2, "saal-1", "", "abend")
+    manager.start_maintenance()
+    try:
+        deadline = time.monotonic() + 5
+        while manager.get_reservation_by_id(old.id) is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        manager.stop_maintenance()
+        manager._maintenance_thread.join(5)
+    assert manager.get_reservation_by_id(old.id) is None
+    assert [r.id for r in manager.get_archived_reservations()] == [old.id]
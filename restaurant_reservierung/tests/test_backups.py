@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import backups, manager
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+def _content(*names):
+    return json.dumps([{"id": name, "name": name} for name in names]).encode('utf-8')
+
+
+def _objects():
+    return sorted(os.listdir(os.path.join(backups.BACKUP_DIR, backups.OBJECTS_SUBDIR)))
+
+
+def test_identical_content_is_stored_once():
+    first = backups.store_snapshot(_content("A"), record_count=1, now=NOW)
+    again = backups.store_snapshot(_content("A"), record_count=1, now=NOW + timedelta(minutes=1))
+    assert again == first
+    assert len(backups.load_manifest()) == 1
+
+    # Zurück auf einen früheren Stand: neuer Manifest-Eintrag, aber dasselbe Objekt
+    backups.store_snapshot(_content("A", "B"), record_count=2, now=NOW + timedelta(minutes=2))
+    back = backups.store_snapshot(_content("A"), record_count=1, now=NOW + timedelta(minutes=3))
+    assert back['file'] == first['file']
+    assert len(backups.load_manifest()) == 3
+    assert len(_objects()) == 2
+
+
+def test_snapshots_are_compressed(monkeypatch):
+    content = _content(*[f"Gast {i}" for i in range(500)])
+    entry = backups.store_snapshot(content, now=NOW)
+    with open(backups.object_path(entry), 'rb') as f:
+        compressed = f.read()
+    assert entry['file'].endswith(".json.gz") and len(compressed) < len(content) / 3
+    assert gzip.decompress(compressed) == content
+
+    monkeypatch.setattr(backups, 'BACKUP_COMPRESSION', "lzma")
+    entry = backups.store_snapshot(_content("B"), now=NOW + timedelta(minutes=1))
+    assert entry['file'].endswith(".json.xz")
+    assert backups.verify_snapshot(entry) == _content("B")
+
+
+def test_retention_thins_out_old_snapshots_and_their_objects():
+    start = NOW - timedelta(days=30)
+    # Alle sechs Stunden ein anderer Stand über 30 Tage
+    for step in range(30 * 4):
+        backups.store_snapshot(_content(f"S{step}"), now=start + timedelta(hours=6 * step))
+    backups.store_snapshot(_content("jetzt"), now=NOW)
+
+    stamps = [datetime.fromisoformat(e['ts']) for e in backups.load_manifest()]
+    # Die letzte Stunde bleibt vollständig, davor höchstens ein Stand pro Tag bzw. Woche
+    keep_all = timedelta(hours=backups.KEEP_ALL_HOURS)
+    daily = [ts for ts in stamps if keep_all < NOW - ts <= timedelta(days=backups.KEEP_DAILY_DAYS)]
+    assert len({ts.date() for ts in daily}) == len(daily)
+    weekly = [ts for ts in stamps if NOW - ts > timedelta(days=backups.KEEP_DAILY_DAYS)]
+    assert len({tuple(ts.isocalendar()[:2]) for ts in weekly}) == len(weekly)
+    # Objekte herausgefallener Snapshots sind gelöscht
+    assert _objects() == sorted(e['file'] for e in backups.load_manifest())
+
+
+def test_series_are_deduplicated_separately():
+    backups.store_snapshot(_content("A"), now=NOW, series="2026-10")
+    backups.store_snapshot(_content("A"), now=NOW, series="2026-11")
+    assert [e['series'] for e in backups.load_manifest()] == ["2026-10", "2026-11"]
+    assert len(_objects()) == 1
+
+
+def _damage(entry):
+    """Kippt ein Byte in der gespeicherten (komprimierten) Datei."""
+    path = backups.object_path(entry)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    data[len(data) // 2] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(bytes(data))
+
+
+def test_verify_snapshot_checks_file_and_content_hashes():
+    entry = backups.store_snapshot(_content("A"), now=NOW)
+    assert backups.verify_snapshot(entry) == _content("A")
+
+    _damage(entry)
+    with pytest.raises(ValueError, match="Datei"):
+        backups.verify_snapshot(entry)
+    # Ohne Datei-Prüfsumme fällt der Schaden spätestens beim Inhalt auf
+    with pytest.raises(ValueError):
+        backups.verify_snapshot(dict(entry, file_sha256=None))
+
+
+def test_restore_skips_damaged_snapshots(monkeypatch):
+    monkeypatch.setattr(manager, 'USE_JOURNAL', False)
+    manager.load_reservations()
+    first = manager.create_reservation("A", "2026-10-20", "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("B", "2026-10-20", "19:00", 2, "saal-2", "", "abend")
+    newest = backups.load_manifest()[-1]
+    assert newest['records'] == 2
+
+    # Hauptdatei weg und der neueste Snapshot beschädigt -> der Stand davor wird geladen
+    os.remove(manager.DATA_FILE)
+    _damage(newest)
+    restored = manager.load_reservations(force_reload=True)
+    assert [r.id for r in restored] == [first.id]
+    recovery = manager.get_last_recovery()
+    assert recovery['records'] == 1 and recovery['skipped'] == [newest['file']]
@@ -0,0 +1,52 @@
+import pytest
+
+from core import manager
+
+
+@pytest.fixture
+def rendered(client, monkeypatch):
+    """Zählt die gerenderten Templates."""
+    import app as app_module
+    names = []
+    original = app_module.render_template
+
+    def counting(template_name, **context):
+        names.append(template_name)
+        return original(template_name, **context)
+
+    monkeypatch.setattr(app_module, 'render_template', counting)
+    return names
+
+
+@pytest.mark.parametrize("url", ['/?date=2026-10-22&shift=abend', '/zimmer', '/reservierungen'])
+def test_matching_if_none_match_answers_304_without_rendering(client, rendered, url):
+    manager.load_reservations()
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert rendered
+    rendered.clear()
+
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.get_data() == b""
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert rendered == []
+
+
+def test_change_yields_new_etag(client):
+    manager.load_reservations()
+    url = '/?date=2026-10-22&shift=abend'
+    etag = client.get(url).headers['ETag']
+
+    manager.create_reservation("Neu", "2026-10-22", "19:00", 2, "saal-1", "", "abend")
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    assert "Neu" in response.get_data(as_text=True)
+
+
+def test_etag_depends_on_parameters_and_language(client):
+    manager.load_reservations()
+    abend = client.get('/?date=2026-10-22&shift=abend').headers['ETag']
+    assert client.get('/?date=2026-10-22&shift=mittag').headers['ETag'] != abend
+    client.get('/set_language/it')
+    assert client.get('/?date=2026-10-22&shift=abend').headers['ETag'] != abend
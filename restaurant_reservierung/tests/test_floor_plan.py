@@ -0,0 +1,44 @@
+import json
+
+from core import floor_plan
+
+
+def _rename(data_dir, areas=None, types=None):
+    """Benennt Bereiche und Tischtypen im Grundriss des Tests um."""
+    path = data_dir / 'floor_plan.json'
+    config = json.loads(path.read_text(encoding='utf-8'))
+    for area in config['areas']:
+        area['name'] = (areas or {}).get(area['name'], area['name'])
+        for resource in area['resources']:
+            if 'type' in resource:
+                resource['type'] = (types or {}).get(resource['type'], resource['type'])
+    path.write_text(json.dumps(config), encoding='utf-8')
+
+
+def test_type_groups_follow_configuration(data_dir):
+    _rename(data_dir, types={"Theke": "Tresen"})
+    groups = floor_plan.get_registry().area("Bar").type_groups()
+    assert [name for name, _ in groups] == ["Tresen", "Regulär"]
+    assert [len(resources) for _, resources in groups] == [3, 5]
+    assert len(floor_plan.get_registry().area("Saal").type_groups()) == 1
+
+
+def test_renamed_areas_render_on_floor_plan(client, data_dir):
+    _rename(data_dir, areas={"Bar": "Lounge"}, types={"Theke": "Tresen", "Regulär": "Tisch"})
+    html = client.get('/?date=2026-10-22&shift=abend').get_data(as_text=True)
+    assert 'id="area-lounge"' in html
+    lounge = html[html.index('id="area-lounge"'):]
+    lounge = lounge[:lounge.index('</section>')]
+    # Theke und Tische der Lounge in zwei Rastern, alle Karten vorhanden
+    assert lounge.count('class="table-grid type-row"') == 2
+    for table_id in floor_plan.get_registry().area("Lounge").ids:
+        assert table_id in lounge
+
+
+def test_renamed_room_areas_render(client, data_dir):
+    _rename(data_dir, areas={"1. Stock": "Dachgeschoss"})
+    html = client.get('/zimmer?date=2026-10-22').get_data(as_text=True)
+    assert 'Dachgeschoss' in html
+    assert 'Keine Zimmer' not in html
+    for room_id in floor_plan.get_registry().room_ids:
+        assert room_id in html
@@ -0,0 +1,65 @@
+from collections import deque
+
+from core import floor_plan, manager
+
+DAY = "2026-10-22"
+
+
+def _floor_state(client, since=None, shift="abend"):
+    url = f'/api/floor_state?date={DAY}&shift={shift}'
+    if since is not None:
+        url += f'&since={since}'
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_without_cursor_all_tables_are_sent(client):
+    manager.load_reservations()
+    state = _floor_state(client)
+    assert state["full"] is True
+    assert len(state["tables"]) == len(floor_plan.get_registry().tables)
+    assert "card_html" not in state["tables"][0]
+
+
+def test_delta_contains_only_changed_tables(client):
+    manager.load_reservations()
+    version = _floor_state(client)["version"]
+    assert _floor_state(client, version) == {"success": True, "version": version, "full": False, "tables": []}
+
+    manager.create_reservation("Abend", DAY, "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Mittag", DAY, "12:00", 2, "saal-2", "", "mittag")
+    manager.create_reservation("Anderer Tag", "2026-10-23", "19:00", 2, "saal-3", "", "abend")
+    delta = _floor_state(client, version)
+    assert delta["full"] is False and delta["version"] != version
+    assert [t["id"] for t in delta["tables"]] == ["saal-1"]
+    assert delta["tables"][0]["reservations_on_table"][0]["name"] == "Abend"
+
+    # Der neue Cursor liefert danach nichts mehr
+    assert _floor_state(client, delta["version"])["tables"] == []
+
+
+def test_unknown_or_too_old_cursor_sends_everything(client, monkeypatch):
+    manager.load_reservations()
+    assert _floor_state(client, "fremd-3")["full"] is True
+
+    monkeypatch.setattr(manager, '_change_log', deque(maxlen=2))
+    version = _floor_state(client)["version"]
+    for hour in ("17:00", "19:00", "21:00"):
+        manager.create_reservation("X", DAY, hour, 2, "saal-1", "", "abend")
+    assert _floor_state(client, version)["full"] is True
+
+
+def test_merging_tables_sends_everything(client):
+    manager.load_reservations()
+    version = _floor_state(client)["version"]
+    manager.merge_tables(["saal-1", "saal-2"])
+    state = _floor_state(client, version)
+    assert state["full"] is True
+    merged = {t["id"]: t["merged_with"] for t in state["tables"]}
+    assert merged["saal-1"] == ["saal-2"]
+
+
+def test_invalid_parameters_are_rejected(client):
+    assert client.get('/api/floor_state?date=gestern&shift=abend').status_code == 400
+    assert client.get(f'/api/floor_state?date={DAY}&shift=nacht').status_code == 400
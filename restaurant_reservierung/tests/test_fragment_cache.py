@@ -0,0 +1,48 @@
+from core import manager
+from core.fragment_cache import FragmentCache
+
+DAY = "2026-10-22"
+
+
+def test_invalidate_evicts_every_variant_of_a_group():
+    cache = FragmentCache()
+    cache.put("saal-1", ("de", 1), "a")
+    cache.put("saal-1", ("it", 1), "b")
+    cache.put("saal-1", ("de", 2), "c")
+    cache.put("saal-2", ("de", 1), "d")
+
+    cache.invalidate(["saal-1", "unbekannt"])
+    assert len(cache) == 1
+    assert cache.get("saal-1", ("de", 1)) is None and cache.get("saal-1", ("it", 1)) is None
+    assert cache.get("saal-2", ("de", 1)) == "d"
+    assert cache._groups == {"saal-2": {("de", 1)}}
+
+
+def test_least_recently_used_entry_falls_out():
+    cache = FragmentCache(max_entries=2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    assert cache.get("a", 1) == "A"  # "b" ist jetzt der älteste Eintrag
+    cache.put("c", 1, "C")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A" and cache.get("c", 1) == "C"
+    assert set(cache._groups) == {"a", "c"}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_change_drops_only_the_cards_of_the_changed_table(client):
+    import app as app_module
+    manager.load_reservations()
+    client.get(f'/?date={DAY}&shift=abend')
+    client.get(f'/?date={DAY}&shift=mittag')
+    cached_groups = set(app_module.TABLE_CARD_CACHE._groups)
+    assert ("saal-1", DAY, "abend") in cached_groups
+
+    manager.create_reservation("Neu", DAY, "19:00", 2, "saal-1", "", "abend")
+    assert set(app_module.TABLE_CARD_CACHE._groups) == cached_groups - {("saal-1", DAY, "abend")}
+
+    # Die neu gerenderte Karte zeigt die Reservierung
+    html = client.get(f'/?date={DAY}&shift=abend').get_data(as_text=True)
+    assert "Neu" in html
+    assert ("saal-1", DAY, "abend") in app_module.TABLE_CARD_CACHE._groups
@@ -0,0 +1,67 @@
+import json
+import threading
+
+from core import manager
+from core.group_commit import GroupCommitWriter
+
+
+def test_submits_within_window_share_one_flush():
+    flushes = []
+    writer = GroupCommitWriter(lambda: flushes.append(1), window_seconds=0.05)
+    tickets = [writer.submit() for _ in range(20)]
+    assert writer.wait(tickets[-1], timeout=5)
+    assert len(flushes) == 1 and not writer.pending
+    writer.stop()
+
+
+def test_failed_flush_is_retried(monkeypatch):
+    monkeypatch.setattr(GroupCommitWriter, 'RETRY_DELAY_SECONDS', 0.01)
+    attempts = []
+
+    def flaky_flush():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("Platte voll")
+
+    writer = GroupCommitWriter(flaky_flush, window_seconds=0.01)
+    ticket = writer.submit()
+    assert writer.wait(ticket, timeout=5)
+    assert len(attempts) == 2
+    writer.stop()
+
+
+def test_concurrent_creates_are_written_in_few_snapshots(monkeypatch):
+    monkeypatch.setattr(manager, 'USE_GROUP_COMMIT', True)
+    monkeypatch.setattr(manager, 'GROUP_COMMIT_WINDOW_MS', 50)
+    snapshots = []
+    write_snapshot = manager._write_snapshot
+
+    def counting_write(reservations_as_dicts):
+        snapshots.append(len(reservations_as_dicts))
+        return write_snapshot(reservations_as_dicts)
+
+    monkeypatch.setattr(manager, '_write_snapshot', counting_write)
+    manager.load_reservations()
+
+    durable = []
+
+    def worker(k):
+        for i in range(10):
+            manager.create_reservation(f"W{k}-{i}", "2026-10-21", f"{12 + i}:00", 2, f"saal-{k + 1}", "", "abend")
+        # Dauerhaftigkeits-Schranke: danach steht die letzte eigene Änderung auf der Platte
+        if manager.wait_for_durability(5):
+            with open(manager.DATA_FILE, encoding='utf-8') as f:
+                durable.append(f"W{k}-9" in {d['name'] for d in json.load(f)})
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.flush_pending_writes()
+
+    assert durable == [True] * 4
+    with open(manager.DATA_FILE, encoding='utf-8') as f:
+        assert len(json.load(f)) == 40
+    assert len(snapshots) < 40
+    assert len(manager.load_reservations(force_reload=True)) == 40
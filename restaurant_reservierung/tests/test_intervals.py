@@ -0,0 +1,116 @@
+import random
+
+from core.intervals import IntervalIndex
+
+
+def make_index(*entries):
+    index = IntervalIndex()
+    for start, end, key in entries:
+        index.add(start, end, key)
+    return index
+
+
+def test_touching_intervals_do_not_overlap():
+    index = make_index((60, 120, "a"))
+    assert not index.has_overlap(120, 180)
+    assert not index.has_overlap(0, 60)
+    assert index.has_overlap(119, 121)
+
+
+def test_long_interval_is_found_behind_short_ones():
+    # Das laufende Maximum muss den langen Eintrag finden, obwohl danach kürzere beginnen
+    index = make_index((0, 600, "lang"), (10, 20, "kurz1"), (30, 40, "kurz2"))
+    assert [key for _, _, key in index.overlapping(500, 510)] == ["lang"]
+    assert [key for _, _, key in index.overlapping(15, 35)] == ["lang", "kurz1", "kurz2"]
+
+
+def test_ignore_key_skips_own_entry():
+    index = make_index((60, 120, "a"))
+    assert not index.has_overlap(90, 150, ignore_key="a")
+    index.add(100, 130, "b")
+    assert index.has_overlap(90, 150, ignore_key="a")
+
+
+def test_add_with_existing_key_replaces_entry():
+    index = make_index((60, 120, "a"))
+    index.add(200, 260, "a")
+    assert len(index) == 1
+    assert not index.has_overlap(60, 120)
+    assert index.has_overlap(200, 201)
+
+
+def test_remove_updates_running_maximum():
+    index = make_index((0, 600, "lang"), (10, 20, "kurz"))
+    assert index.remove("lang")
+    assert not index.remove("lang")
+    assert not index.has_overlap(300, 400)
+    assert index.entries() == [(10, 20, "kurz")]
+
+
+def test_first_free_jumps_over_chained_bookings():
+    index = make_index((60, 150, "a"), (150, 240, "b"), (300, 390, "c"))
+    # 90 Minuten ab 60: a, dann b blockieren; ab 240 reicht es nicht, c beginnt schon bei 300
+    assert index.first_free(60, 90) == 390
+    assert index.first_free(60, 60) == 240
+    assert index.first_free(0, 60) == 0
+    assert index.first_free(60, 90, ignore_key="a") == 60
+    assert index.first_free(60, 90, ignore_key="b") == 150
+    assert index.first_free(240, 60) == 240
+
+
+def test_first_free_on_empty_index():
+    assert IntervalIndex().first_free(17 * 60, 120) == 17 * 60
+
+
+def test_zero_length_entries_start_at_their_day():
+    # Tageszimmer: Anreise = Abreise, überlappt nichts, wird aber über starting_at gefunden
+    index = make_index((10, 10, "tag"), (8, 12, "lang"))
+    assert [key for _, _, key in index.overlapping(10, 11)] == ["lang"]
+    assert [key for _, _, key in index.starting_at(10)] == ["tag"]
+
+
+def test_copy_is_independent():
+    index = make_index((0, 10, "a"))
+    clone = index.copy()
+    clone.add(20, 30, "b")
+    clone.remove("a")
+    assert index.entries() == [(0, 10, "a")]
+    assert clone.entries() == [(20, 30, "b")]
+
+
+def test_matches_brute_force_and_copies_stay_unchanged():
+    rnd = random.Random(7)
+    index = IntervalIndex()
+    expected = {}
+    copies = []
+    for step in range(2000):
+        if rnd.random() < 0.7 or not expected:
+            key = f"k{rnd.randrange(60)}"
+            start = rnd.randrange(200)
+            end = start + rnd.randrange(0, 40)
+            index.add(start, end, key)
+            expected[key] = (start, end, key)
+        else:
+            key = rnd.choice(sorted(expected))
+            assert index.remove(key)
+            del expected[key]
+        if step % 100 == 0:
+            copies.append((index.copy(), sorted(expected.values())))
+        start = rnd.randrange(220)
+        end = start + rnd.randrange(1, 30)
+        assert list(index.overlapping(start, end)) == sorted(
+            e for e in expected.values() if e[0] < end and e[1] > start)
+        assert list(index.starting_at(start)) == sorted(e for e in expected.values() if e[0] == start)
+    assert index.entries() == sorted(expected.values())
+    for copy, entries in copies:
+        assert copy.entries() == entries
+
+
+def test_long_interval_does_not_hide_later_gaps():
+    index = IntervalIndex()
+    index.add(0, 100000, "lang")
+    for i in range(1000):
+        index.add(10 * i + 1, 10 * i + 5, f"k{i}")
+    assert index.has_overlap(5001, 5002, ignore_key="lang")
+    assert not index.has_overlap(5006, 5010, ignore_key="lang")
+    assert index.first_free(5001, 4, ignore_key="lang") == 5005
@@ -0,0 +1,67 @@
+import json
+
+from core import manager
+
+DAY = "2026-10-20"
+
+
+def _reload():
+    """Wie nach einem Neustart: Cache verwerfen und von der Platte lesen."""
+    return manager.load_reservations(force_reload=True)
+
+
+def test_changes_survive_restart_via_journal():
+    manager.load_reservations()
+    r = manager.create_reservation("A", DAY, "19:00", 2, "saal-1", "", "abend")
+    manager.toggle_arrival_status(r.id)
+    manager.update_reservation(r.id, persons=5)
+    other = manager.create_reservation("B", DAY, "19:00", 2, "saal-2", "", "abend")
+    manager.delete_reservation(other.id)
+
+    # Nur das Journal wurde geschrieben, reservations.json ist noch leer
+    with open(manager.JOURNAL_FILE, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 5
+    reloaded = _reload()
+    assert [x.id for x in reloaded] == [r.id]
+    restored = manager.get_reservation_by_id(r.id)
+    assert restored.arrived and restored.persons == 5 and restored.version == 3
+
+
+def test_truncated_last_journal_line_is_dropped():
+    manager.load_reservations()
+    r = manager.create_reservation("A", DAY, "19:00", 2, "saal-1", "", "abend")
+    manager.update_reservation(r.id, persons=4)
+    # Absturz mitten im Schreiben der nächsten Zeile
+    with open(manager.JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"ops": [{"op": "upse')
+
+    reloaded = _reload()
+    assert [x.id for x in reloaded] == [r.id]
+    assert manager.get_reservation_by_id(r.id).persons == 4
+    # Die abgeschnittene Zeile ist entfernt, neue Einträge beginnen auf einer eigenen Zeile
+    with open(manager.JOURNAL_FILE, encoding='utf-8') as f:
+        content = f.read()
+    assert content.endswith("\n")
+    for line in content.splitlines():
+        json.loads(line)
+
+    manager.update_reservation(r.id, persons=6)
+    _reload()
+    assert manager.get_reservation_by_id(r.id).persons == 6
+
+
+def test_compaction_writes_snapshot_and_clears_journal(monkeypatch):
+    monkeypatch.setattr(manager, 'JOURNAL_COMPACT_AFTER', 3)
+    manager.load_reservations()
+    r = manager.create_reservation("A", DAY, "19:00", 2, "saal-1", "", "abend")
+    manager.toggle_arrival_status(r.id)
+    manager.toggle_arrival_status(r.id)
+
+    with open(manager.JOURNAL_FILE, encoding='utf-8') as f:
+        assert f.read() == ""
+    with open(manager.DATA_FILE, encoding='utf-8') as f:
+        stored = json.load(f)
+    assert [x['id'] for x in stored] == [r.id] and stored[0]['version'] == 3
+    assert manager.get_reservation_by_id(r.id).version == 3
+    _reload()
+    assert manager.get_reservation_by_id(r.id).version == 3
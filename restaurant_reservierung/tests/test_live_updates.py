@@ -0,0 +1,71 @@
+import json
+
+from core import manager
+from core.live_updates import ChangeBus
+
+DAY = "2026-10-22"
+
+
+def test_subscribe_returns_none_at_the_limit():
+    bus = ChangeBus()
+    first = bus.subscribe(DAY, "abend", limit=2)
+    second = bus.subscribe(DAY, "mittag", limit=2)
+    assert first is not None and second is not None
+    assert bus.subscribe(DAY, "abend", limit=2) is None
+    assert bus.subscriber_count() == 2
+
+    bus.unsubscribe(first)
+    bus.unsubscribe(first)  # doppelt abmelden zählt nicht doppelt
+    assert bus.subscriber_count() == 1
+    assert bus.subscribe(DAY, "abend", limit=2) is not None
+
+
+def test_publish_reaches_only_matching_date_and_shift():
+    bus = ChangeBus()
+    abend = bus.subscribe(DAY, "abend")
+    mittag = bus.subscribe(DAY, "mittag")
+    bus.publish({("saal-1", DAY, "abend"), ("saal-2", DAY, "abend")})
+
+    assert abend.wait(0) == (False, {"saal-1", "saal-2"})
+    assert mittag.wait(0) == (False, set())
+    # Abgeholte Änderungen sind weg
+    assert abend.wait(0) == (False, set())
+
+
+def test_room_changes_go_to_every_subscription():
+    bus = ChangeBus()
+    abend = bus.subscribe(DAY, "abend")
+    other_day = bus.subscribe("2026-10-25", "mittag")
+    bus.publish({("zimmer-8", DAY, "abend")})
+    assert abend.wait(0) == (False, {"zimmer-8"})
+    assert other_day.wait(0) == (False, {"zimmer-8"})
+
+    bus.publish(None)
+    assert abend.wait(0) == (True, set())
+
+
+def test_stream_answers_busy_at_the_limit(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'LIVE_MAX_STREAMS', 0)
+    response = client.get(f'/api/live?date={DAY}&shift=abend')
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    assert body == f"retry: {app_module.LIVE_BUSY_RETRY_MS}\n\n: busy\n\n"
+    assert app_module.live_updates.bus.subscriber_count() == 0
+
+
+def test_stream_sends_changed_tables_since_the_client_version(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'LIVE_STREAM_MAX_SECONDS', 0)
+    manager.load_reservations()
+    since = manager.get_data_version()
+    manager.create_reservation("Neu", DAY, "19:00", 2, "saal-1", "", "abend")
+
+    body = client.get(f'/api/live?date={DAY}&shift=abend&since={since}').get_data(as_text=True)
+    data_line = next(line for line in body.splitlines() if line.startswith("data: "))
+    payload = json.loads(data_line[len("data: "):])
+    assert [card["id"] for card in payload["tables"]] == ["saal-1"]
+    assert payload["tables"][0]["reservations_on_table"][0]["name"] == "Neu"
+    assert payload["rooms"] == []
+    # Nach dem Ende des Streams ist das Abonnement abgemeldet
+    assert app_module.live_updates.bus.subscriber_count() == 0
@@ -0,0 +1,61 @@
+from core import manager
+from core.merge_groups import MergeGroups
+
+DAY = "2026-10-22"
+
+
+def test_from_dict_joins_chains_into_one_group():
+    groups = MergeGroups.from_dict({"a": ["b"], "c": ["b"], "x": ["y"]})
+    assert [g.id for g in groups.groups()] == ["a-b-c", "x-y"]
+    assert groups.group_of("c") is groups.group_of("a")
+    assert groups.partners("b") == ("a", "c")
+    assert groups.group_size("a") == 3 and groups.group_size("z") == 1
+    assert groups.group_id("y") == "x-y" and groups.group_id("z") == ""
+    assert MergeGroups.from_dict(groups.to_dict()).to_dict() == groups.to_dict()
+
+
+def test_merged_pulls_in_existing_groups():
+    groups = MergeGroups.from_dict({"a": ["b"], "c": ["d"]})
+    merged = groups.merged(["b", "c"])
+    assert [g.id for g in merged.groups()] == ["a-b-c-d"]
+    # Unveränderlich: die alte Sicht bleibt bestehen
+    assert [g.id for g in groups.groups()] == ["a-b", "c-d"]
+
+
+def test_unmerged_keeps_the_rest_of_the_group():
+    groups = MergeGroups.from_dict({"a": ["b", "c"], "x": ["y"]})
+    unmerged = groups.unmerged(["b", "x"])
+    assert [g.id for g in unmerged.groups()] == ["a-c"]
+    assert "b" not in unmerged and "y" not in unmerged
+
+
+def test_merge_and_unmerge_tables_are_stored(monkeypatch):
+    manager.load_reservations()
+    assert manager.merge_tables(["saal-1", "saal-2"])
+    assert manager.merge_tables(["saal-2", "saal-3"])
+    assert manager.get_merge_groups().group_id("saal-1") == "saal-1-saal-2-saal-3"
+
+    # Neu von der Platte gelesen ergibt dieselben Gruppen
+    monkeypatch.setattr(manager, '_merge_groups', None)
+    assert manager.load_merges() == {"saal-1": ["saal-2", "saal-3"], "saal-2": ["saal-1", "saal-3"],
+                                     "saal-3": ["saal-1", "saal-2"]}
+
+    assert manager.unmerge_tables(["saal-3"])
+    assert manager.get_merge_groups().partners("saal-1") == ("saal-2",)
+    assert not manager.unmerge_tables(["saal-4"])
+    assert not manager.merge_tables(["saal-1"])
+
+
+def test_booking_on_merged_table_creates_shadow_bookings():
+    manager.load_reservations()
+    manager.merge_tables(["saal-1", "saal-2", "saal-3"])
+    main = manager.create_reservation("Gruppe", DAY, "19:00", 8, "saal-1", "", "abend")
+
+    shadows = manager.get_child_reservations(main.id)
+    assert sorted(s.table_id for s in shadows) == ["saal-2", "saal-3"]
+    assert all(s.persons == 0 and s.name == "Gruppe" for s in shadows)
+    assert not manager.is_table_available_for_specific_reservation_time("saal-2", DAY, "19:30", "abend")
+
+    manager.delete_reservation(main.id)
+    assert not manager.get_child_reservations(main.id)
+    assert manager.get_reservation_by_id(shadows[0].id) is None
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from core import manager, partitions
+from core.snapshot import ReservationSnapshot
+
+
+@pytest.fixture
+def monthly(monkeypatch):
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', "json_monthly")
+    manager.load_reservations()
+
+
+def _fresh_process(monkeypatch):
+    """Wie nach einem Neustart: nichts geladen, Manifest wird neu gelesen."""
+    monkeypatch.setattr(manager, '_cached_reservations', None)
+    monkeypatch.setattr(manager, '_snapshot', ReservationSnapshot())
+    monkeypatch.setattr(manager, '_loaded_partitions', set())
+    monkeypatch.setattr(manager, '_all_partitions_loaded', False)
+    partitions.forget_manifest()
+
+
+def _stored_ids(month):
+    if not os.path.exists(partitions.partition_path(month)):
+        return set()
+    with open(partitions.partition_path(month), encoding='utf-8') as f:
+        return {d['id'] for d in json.load(f)}
+
+
+def test_writes_touch_only_their_month(monthly):
+    october = manager.create_reservation("Okt", "2026-10-20", "19:00", 2, "saal-1", "", "abend")
+    november = manager.create_reservation("Nov", "2026-11-05", "19:00", 2, "saal-1", "", "abend")
+    november_mtime = os.stat(partitions.partition_path("2026-11")).st_mtime_ns
+
+    manager.update_reservation(october.id, persons=4)
+    assert os.stat(partitions.partition_path("2026-11")).st_mtime_ns == november_mtime
+    assert _stored_ids("2026-10") == {october.id} and _stored_ids("2026-11") == {november.id}
+    assert partitions.load_manifest()["months"]["2026-10"]["records"] == 1
+
+
+def test_manifest_finds_reservation_after_month_move(monthly, monkeypatch):
+    r = manager.create_reservation("Wandert", "2026-10-20", "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Bleibt", "2026-11-05", "19:00", 2, "saal-2", "", "abend")
+    manager.update_reservation(r.id, date_str="2026-12-01")
+    assert partitions.month_of_id(r.id) == "2026-12"
+    assert r.id not in _stored_ids("2026-10") and r.id in _stored_ids("2026-12")
+
+    # Neustart: die ID wird über das Manifest gefunden, geladen wird nur ihr Monat
+    _fresh_process(monkeypatch)
+    assert manager.get_reservation_by_id(r.id).date == "2026-12-01"
+    assert manager._loaded_partitions == {"2026-12"}
+
+
+def test_room_stay_over_month_end_loads_its_arrival_month(monthly, monkeypatch):
+    stay = manager.create_reservation("Z", "2026-10-30", "14:00", 2, "zimmer-8", "", "abend", end_date="2026-11-02")
+    assert "2026-11" in partitions.load_manifest()["months"]["2026-10"]["reaches"]
+
+    _fresh_process(monkeypatch)
+    guests = manager.get_room_reservations_on_date("2026-11-01")
+    assert [r.id for r in guests] == [stay.id]
+    assert not manager.is_room_available("zimmer-8", "2026-11-01", "2026-11-03")
@@ -0,0 +1,98 @@
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from core import manager, process_sync
+
+from conftest import APP_DIR, DATA_DIR
+
+DAY = "2026-10-20"
+
+
+@pytest.fixture
+def multi_process(monkeypatch):
+    monkeypatch.setattr(manager, 'MULTI_PROCESS', True)
+    manager.load_reservations()
+
+
+def _run_other_process(data_dir, code):
+    """Führt code in einem zweiten Python-Prozess auf demselben data/-Verzeichnis aus."""
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {APP_DIR!r})
+        from core import archive, backups, floor_plan, manager, partitions, process_sync, sqlite_backend
+        for module in (archive, backups, floor_plan, manager, partitions, process_sync, sqlite_backend):
+            for name, value in list(vars(module).items()):
+                if isinstance(value, str) and value.startswith({DATA_DIR!r}):
+                    setattr(module, name, {str(data_dir)!r} + value[len({DATA_DIR!r}):])
+        manager.MULTI_PROCESS = True
+    """) + textwrap.dedent(code)
+    return subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60)
+
+
+def test_exclusive_lock_blocks_other_processes(data_dir):
+    pytest.importorskip("fcntl")
+    probe = """
+        import fcntl
+        handle = open(process_sync.LOCK_FILE, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            print("frei")
+        except BlockingIOError:
+            print("gesperrt")
+    """
+    with process_sync.exclusive_lock():
+        assert _run_other_process(data_dir, probe).stdout.strip() == "gesperrt"
+    assert _run_other_process(data_dir, probe).stdout.strip() == "frei"
+
+
+def test_write_by_other_process_is_picked_up(multi_process, data_dir):
+    manager.create_reservation("Hier", DAY, "18:00", 2, "saal-1", "", "abend")
+    stamp_before = process_sync.read_stamp()
+
+    result = _run_other_process(data_dir, f"""
+        manager.create_reservation("Dort", {DAY!r}, "20:00", 2, "saal-2", "", "abend")
+    """)
+    assert result.returncode == 0, result.stderr
+    assert process_sync.read_stamp() != stamp_before
+    names = sorted(r.name for r in manager.get_reservations_for_date_and_shift(DAY, "abend"))
+    assert names == ["Dort", "Hier"]
+
+
+def test_foreign_write_during_transaction_is_a_conflict(multi_process):
+    reservation = manager.create_reservation("V", DAY, "19:00", 2, "saal-1", "", "abend")
+    with pytest.raises(manager.ConflictError):
+        with manager.transaction():
+            current = manager.get_reservation_by_id(reservation.id)
+            # Ein anderer Prozess schreibt zwischen Lesen und Commit
+            process_sync.bump_version()
+            manager.update_reservation(reservation.id, persons=current.persons + 1)
+    assert manager.get_reservation_by_id(reservation.id).persons == 2
+    # Erneut versucht, auf dem neuen Stand
+    assert manager.update_reservation(reservation.id, persons=3).persons == 3
+
+
+def test_partition_locks_do_not_serialize_threads(multi_process):
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold_other_day():
+        with manager.partition_lock(("2026-10-21", "abend")):
+            holding.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold_other_day)
+    worker.start()
+    try:
+        assert holding.wait(5)
+        # Die flock-Sperre wird nur um den Commit gehalten, nicht während der Partitionssperre
+        assert process_sync._depth == 0
+        with manager.partition_lock((DAY, "abend")):
+            created = manager.create_reservation("B", DAY, "19:00", 2, "saal-1", "", "abend")
+        assert manager.get_reservation_by_id(created.id) is not None
+    finally:
+        release.set()
+        worker.join()
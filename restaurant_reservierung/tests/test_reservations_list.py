@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from core import manager
+
+DAY = "2026-10-22"
+
+
+def _day(offset):
+    return (datetime.date.today() + datetime.timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture
+def serialized(client, monkeypatch):
+    """Zählt, welche Reservierungen für die Liste aufbereitet werden."""
+    import app as app_module
+    names = []
+    original = app_module._reservation_list_entry
+
+    def counting(res_obj, merge_groups):
+        names.append(res_obj.name)
+        return original(res_obj, merge_groups)
+
+    monkeypatch.setattr(app_module, '_reservation_list_entry', counting)
+    return names
+
+
+def test_date_filter_serializes_only_that_day(client, serialized):
+    manager.load_reservations()
+    for offset in range(1, 30):
+        manager.create_reservation(f"X{offset}", f"2026-11-{offset:02d}", "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Gast Abend", DAY, "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Gast Mittag", DAY, "12:00", 2, "saal-2", "", "mittag")
+    manager.create_reservation("Gast Zimmer", DAY, "14:00", 2, "zimmer-8", "", "abend", end_date="2026-10-24")
+
+    html = client.get(f'/reservierungen?filter_date={DAY}&shift=abend').get_data(as_text=True)
+    assert sorted(serialized) == ["Gast Abend", "Gast Zimmer"]
+    assert "Gast Abend" in html and "Gast Zimmer" in html and "Gast Mittag" not in html
+
+
+def test_show_all_starts_today_and_keeps_running_stays(client, serialized):
+    manager.load_reservations()
+    manager.create_reservation("Gestern", _day(-1), "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Morgen", _day(1), "12:00", 2, "saal-1", "", "mittag")
+    manager.create_reservation("Im Haus", _day(-3), "14:00", 2, "zimmer-8", "", "abend", end_date=_day(2))
+    manager.create_reservation("Abgereist", _day(-3), "14:00", 2, "zimmer-9", "", "abend", end_date=_day(-1))
+
+    client.get('/reservierungen?filter_date=')
+    assert sorted(serialized) == ["Im Haus", "Morgen"]
+
+
+@pytest.mark.parametrize("backend", ["json_monthly", "sqlite"])
+def test_get_reservations_from_date_loads_only_later_months(monkeypatch, backend):
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', backend)
+    manager.load_reservations()
+    manager.create_reservation("Alt", "2026-01-10", "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Neu", "2026-11-10", "19:00", 2, "saal-1", "", "abend")
+    manager.create_reservation("Lang", "2026-09-25", "14:00", 2, "zimmer-8", "", "abend", end_date="2026-10-25")
+
+    # Frischer Prozess: nichts geladen
+    monkeypatch.setattr(manager, '_cached_reservations', None)
+    names = sorted(r.name for r in manager.get_reservations_from_date("2026-10-18"))
+    assert names == ["Lang", "Neu"]
+    assert "2026-01" not in manager._loaded_partitions
@@ -0,0 +1,50 @@
+from datetime import date
+
+from core import floor_plan
+from core.models import Reservation
+from core.snapshot import ReservationSnapshot
+
+
+def _table(rid, day, time="19:00", table_id="saal-1", **kwargs):
+    return Reservation(rid, rid.upper(), day, time, 2, table_id, "", shift="abend", **kwargs)
+
+
+def _ordinal(day):
+    return date.fromisoformat(day).toordinal()
+
+
+def test_apply_leaves_previous_snapshot_unchanged():
+    old = ReservationSnapshot.build([_table("a", "2026-10-20"), _table("b", "2026-11-03")], version=1)
+    moved = _table("a", "2026-11-03", time="21:00", table_id="saal-2")
+    new = old.apply(upserts=[moved], deleted_ids=["b"])
+
+    assert new.version == 2 and len(new) == 1 and len(old) == 2
+    assert [r.id for r in old.for_date_shift("2026-10-20", "abend")] == ["a"]
+    assert new.for_date_shift("2026-10-20", "abend") == ()
+    assert [r.id for r in new.for_date_shift("2026-11-03", "abend")] == ["a"]
+    assert [r.id for r in new.for_month("2026-11")] == ["a"] and len(old.for_month("2026-11")) == 1
+    assert [r.id for r in new.for_table("saal-2")] == ["a"] and new.for_table("saal-1") == ()
+    assert old.table_bookings("saal-1", "2026-10-20") is not None
+    assert new.table_bookings("saal-1", "2026-10-20") is None
+    assert new.table_bookings("saal-2", "2026-11-03").entries() == [(21 * 60, 21 * 60 + 90, "a")]
+
+
+def test_apply_copies_only_touched_shards():
+    old = ReservationSnapshot.build([_table(f"r{i}", f"2026-10-{i % 28 + 1:02d}") for i in range(500)], version=1)
+    new = old.apply(upserts=[_table("r0", "2026-10-01", time="20:00")])
+    for name in ("_shards", "_by_date_shift", "_by_table", "_by_slot", "_table_bookings"):
+        shared = sum(a is b for a, b in zip(getattr(old, name), getattr(new, name)))
+        # Höchstens die Teil-dicts des alten und neuen Schlüssels sind kopiert
+        assert shared >= len(getattr(old, name)) - 2, name
+
+
+def test_room_stay_across_month_end():
+    room = floor_plan.get_registry().rooms[0].id
+    stay = Reservation("z", "Z", "2026-01-30", "", 2, room, "", end_date_str="2026-02-03")
+    snapshot = ReservationSnapshot.build([stay], version=1)
+
+    assert snapshot.room_has_overlap(room, _ordinal("2026-02-02"), _ordinal("2026-02-04"))
+    assert not snapshot.room_has_overlap(room, _ordinal("2026-02-03"), _ordinal("2026-02-05"))
+    assert not snapshot.room_has_overlap(room, _ordinal("2026-02-02"), _ordinal("2026-02-04"), ignore_key="z")
+    assert list(snapshot.room_stays_on(_ordinal("2026-02-01"))) == ["z"]
+    assert list(snapshot.room_stays_on(_ordinal("2026-02-03"))) == []
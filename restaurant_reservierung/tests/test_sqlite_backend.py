@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from core import manager, sqlite_backend
+from core.snapshot import ReservationSnapshot
+
+
+def _fresh_process(monkeypatch):
+    """Wie nach einem Neustart: nichts geladen, neue SQLite-Verbindung."""
+    monkeypatch.setattr(manager, '_cached_reservations', None)
+    monkeypatch.setattr(manager, '_snapshot', ReservationSnapshot())
+    monkeypatch.setattr(manager, '_loaded_partitions', set())
+    monkeypatch.setattr(manager, '_all_partitions_loaded', False)
+    monkeypatch.setattr(sqlite_backend, '_local', threading.local())
+
+
+@pytest.fixture
+def sqlite_mode(monkeypatch):
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', "sqlite")
+    manager.load_reservations()
+
+
+def test_migrate_json_to_sqlite_keeps_records_and_merges(monkeypatch):
+    manager.load_reservations()
+    a = manager.create_reservation("A", "2026-10-20", "19:00", 2, "saal-1", "Fenster", "abend")
+    manager.update_reservation(a.id, persons=3)
+    stay = manager.create_reservation("Z", "2026-10-30", "14:00", 2, "zimmer-8", "", "abend", end_date="2026-11-02")
+    manager.merge_tables(["stube-1", "stube-2"])
+    expected = {r.id: r.to_dict() for r in manager.load_reservations()}
+
+    manager.migrate_json_to_sqlite()
+    monkeypatch.setattr(manager, 'STORAGE_BACKEND', "sqlite")
+    _fresh_process(monkeypatch)
+
+    assert {r.id: r.to_dict() for r in manager.load_reservations()} == expected
+    assert manager.get_reservation_by_id(a.id).version == 2
+    assert manager.get_merge_groups().partners("stube-1") == ("stube-2",)
+    assert not manager.is_room_available("zimmer-8", "2026-11-01", "2026-11-03")
+    assert stay.id in {r.id for r in manager.get_room_reservations_on_date("2026-11-01")}
+
+
+def test_changes_round_trip_and_load_by_month(sqlite_mode, monkeypatch):
+    october = manager.create_reservation("Okt", "2026-10-20", "19:00", 2, "saal-1", "", "abend")
+    november = manager.create_reservation("Nov", "2026-11-05", "19:00", 2, "saal-1", "", "abend")
+    gone = manager.create_reservation("Weg", "2026-10-21", "19:00", 2, "saal-2", "", "abend")
+    manager.update_reservation(october.id, persons=4, info="Geburtstag")
+    manager.delete_reservation(gone.id)
+
+    _fresh_process(monkeypatch)
+    restored = manager.get_reservation_by_id(october.id)
+    assert (restored.persons, restored.info, restored.version) == (4, "Geburtstag", 2)
+    # Nur der Monat der Reservierung wurde geladen
+    assert manager._loaded_partitions == {"2026-10"}
+    assert november.id not in manager._snapshot
+    assert manager.get_reservation_by_id(gone.id) is None
+    assert [r.name for r in manager.get_reservations_for_date_and_shift("2026-11-05", "abend")] == ["Nov"]
+
+
+def test_room_overlap_on_cold_start_uses_index(sqlite_mode, monkeypatch):
+    stay = manager.create_reservation("Z", "2026-10-30", "14:00", 2, "zimmer-8", "", "abend", end_date="2026-11-02")
+
+    _fresh_process(monkeypatch)
+    assert not manager.is_room_available("zimmer-8", "2026-11-01", "2026-11-04")
+    assert manager.is_room_available("zimmer-8", "2026-11-02", "2026-11-04")
+    assert manager.is_room_available("zimmer-8", "2026-10-28", "2026-11-01", ignore_id=stay.id)
+    # Geprüft ohne den Cache zu laden
+    assert manager._cached_reservations is None
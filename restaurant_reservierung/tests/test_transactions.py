@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from core import manager
+
+DAY = "2026-10-20"
+
+
+@pytest.fixture
+def reservation():
+    manager.load_reservations()
+    return manager.create_reservation("V", DAY, "19:00", 1, "bar-theke-1", "", "abend")
+
+
+def test_stale_version_raises_conflict(reservation):
+    assert reservation.version == 1
+    toggled = manager.toggle_arrival_status(reservation.id)
+    assert toggled.version == 2 and reservation.version == 1
+
+    with pytest.raises(manager.ConflictError):
+        manager.update_reservation(reservation.id, name="alt", expected_version=1)
+    assert manager.get_reservation_by_id(reservation.id).name == "V"
+    assert manager.update_reservation(reservation.id, name="neu", expected_version=2).version == 3
+
+
+def test_non_numeric_version_is_rejected(reservation):
+    with pytest.raises(manager.TransactionError):
+        manager.update_reservation(reservation.id, name="x", expected_version="abc")
+
+
+def test_concurrent_toggles_lose_no_update(reservation):
+    done = []
+    conflicts = []
+
+    def worker():
+        for _ in range(25):
+            try:
+                manager.toggle_arrival_status(reservation.id)
+            except manager.ConflictError:
+                # Ein anderer Thread hat zwischen Lesen und Schreiben committet
+                conflicts.append(1)
+            else:
+                done.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Jede erfolgreiche Änderung ist genau einmal angekommen
+    current = manager.get_reservation_by_id(reservation.id)
+    assert len(done) + len(conflicts) == 100
+    assert current.version == 1 + len(done)
+    assert current.arrived is (len(done) % 2 == 1)
+
+
+def test_api_answers_409_for_stale_version(client, reservation):
+    manager.toggle_arrival_status(reservation.id)
+
+    response = client.post(f'/api/reservierung_bearbeiten/{reservation.id}',
+                           json={"name": "X", "persons": 1, "version": 1})
+    assert response.status_code == 409
+    response = client.post(f'/api/reservierung_angekommen/{reservation.id}', json={"version": 1})
+    assert response.status_code == 409
+    response = client.delete(f'/api/reservierung_loeschen/{reservation.id}', json={"version": 1})
+    assert response.status_code == 409
+    assert manager.get_reservation_by_id(reservation.id).version == 2
+
+    response = client.post(f'/api/reservierung_angekommen/{reservation.id}', json={"version": 2})
+    assert response.status_code == 200 and response.json["version"] == 3
+
+
+def test_api_answers_400_for_invalid_version(client, reservation):
+    response = client.post(f'/api/reservierung_bearbeiten/{reservation.id}',
+                           json={"name": "X", "persons": 1, "version": "abc"})
+    assert response.status_code == 400
+    response = client.post(f'/api/reservierung_angekommen/{reservation.id}', json={"version": "abc"})
+    assert response.status_code == 400
+    response = client.delete(f'/api/reservierung_loeschen/{reservation.id}', json={"version": -1})
+    assert response.status_code == 400
+    assert manager.get_reservation_by_id(reservation.id).version == 1
+
+
+def test_room_update_onto_occupied_room_is_rejected(client):
+    manager.load_reservations()
+    stay = manager.create_reservation("S", "2026-11-02", "14:00", 2, "zimmer-8", "", "abend", end_date="2026-11-05")
+    other = manager.create_reservation("T", "2026-11-04", "14:00", 2, "zimmer-9", "", "abend",
+                                       end_date="2026-11-06")
+
+    response = client.post(f'/api/reservierung_bearbeiten/{other.id}',
+                           json={"persons": 2, "table_id": "zimmer-8"})
+    assert response.status_code == 409
+    assert manager.get_reservation_by_id(other.id).table_id == "zimmer-9"
+
+    # Die eigene Buchung blockiert nicht: Verlängern im selben Zimmer geht
+    response = client.post(f'/api/reservierung_bearbeiten/{stay.id}',
+                           json={"persons": 2, "end_date": "2026-11-07"})
+    assert response.status_code == 200
+    assert manager.get_reservation_by_id(stay.id).end_date == "2026-11-07"
@@ -0,0 +1,88 @@
+import pytest
+
+from core import manager
+
+DAY = "2026-10-22"
+
+
+@pytest.fixture
+def bookings():
+    """Auf saal-1 A um 18:00 (2 Personen = 90 Minuten) und B ab 19:30, auf saal-2 O um 18:00."""
+    manager.load_reservations()
+    a = manager.create_reservation("A", DAY, "18:00", 2, "saal-1", "", "abend")
+    b = manager.create_reservation("B", DAY, "19:30", 2, "saal-1", "", "abend")
+    o = manager.create_reservation("O", DAY, "18:00", 2, "saal-2", "", "abend")
+    return a, b, o
+
+
+def _update(client, reservation_id, **data):
+    return client.post(f'/api/reservierung_bearbeiten/{reservation_id}', json=data)
+
+
+def test_more_persons_extending_into_next_booking_is_rejected(client, bookings):
+    a, b, o = bookings
+    response = _update(client, a.id, persons=6)
+    assert response.status_code == 409
+    assert manager.get_reservation_by_id(a.id).persons == 2
+
+
+def test_longer_duration_is_rejected(client, bookings):
+    a, b, o = bookings
+    response = _update(client, a.id, persons=2, duration=120)
+    assert response.status_code == 409
+    assert manager.get_reservation_by_id(a.id).duration is None
+
+
+def test_moving_onto_occupied_table_is_rejected(client, bookings):
+    a, b, o = bookings
+    response = _update(client, o.id, persons=2, table_id="saal-1")
+    assert response.status_code == 409
+    assert manager.get_reservation_by_id(o.id).table_id == "saal-2"
+
+
+def test_updates_that_still_fit_are_accepted(client, bookings):
+    a, b, o = bookings
+    assert _update(client, a.id, persons=2, name="A2").status_code == 200
+    assert _update(client, a.id, persons=2, duration=60).status_code == 200
+    assert manager.get_reservation_by_id(a.id).duration == 60
+    # 0 setzt auf die Standard-Verweildauer zurück
+    assert _update(client, a.id, persons=2, duration=0).status_code == 200
+    assert manager.get_reservation_by_id(a.id).duration is None
+    # Die eigene Buchung blockiert nicht
+    assert _update(client, b.id, persons=2, time="19:45").status_code == 200
+
+
+def test_manager_check_uses_dwell_time(bookings):
+    a, b, o = bookings
+    check = manager.is_table_available_for_specific_reservation_time
+    assert not check("saal-1", DAY, "18:00", "abend", reservation_id_to_ignore=a.id, persons=6)
+    assert check("saal-1", DAY, "18:00", "abend", reservation_id_to_ignore=a.id, persons=2)
+    assert manager.get_next_free_time("saal-1", DAY, "18:00", persons=2) == "21:00"
+
+
+@pytest.mark.parametrize("duration", [-30, "-30", "abc", 1.5, True])
+def test_invalid_duration_is_rejected_on_update(client, bookings, duration):
+    a, b, o = bookings
+    response = _update(client, a.id, persons=2, duration=duration)
+    assert response.status_code == 400
+    assert manager.get_reservation_by_id(a.id).duration is None
+
+
+@pytest.mark.parametrize("duration", [0, -30, "abc"])
+def test_invalid_duration_is_rejected_on_create(client, bookings, duration):
+    response = client.post('/api/neue_reservierung', json={
+        "name": "N", "date": DAY, "time": "18:30", "persons": 2, "table_id": "saal-1",
+        "shift": "abend", "duration": duration})
+    assert response.status_code == 400
+    assert not [r for r in manager.get_reservations_for_date_and_shift(DAY, "abend") if r.name == "N"]
+
+
+def test_manager_rejects_non_positive_duration(bookings):
+    a, b, o = bookings
+    with pytest.raises(ValueError):
+        manager.is_table_available_for_specific_reservation_time("saal-1", DAY, "18:00", "abend", duration=-30)
+    with pytest.raises(ValueError):
+        manager.create_reservation("N", DAY, "22:00", 2, "saal-1", "", "abend", duration=-30)
+    with pytest.raises(ValueError):
+        manager.update_reservation(a.id, duration=-30)
+    assert manager.get_reservation_by_id(a.id).duration is None